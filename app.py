@@ -1,12 +1,29 @@
 import logging
+import os
 from flask import Flask, redirect, url_for
 from flask_pymongo import PyMongo
 from werkzeug.utils import find_modules
 from importlib import import_module
 
+from commands import register_commands
+from core.bittrex.generator import BittrexGeneratorStub
 from core.bittrex.stub import BittrexApiStub
+from core.bundle import load_bundle, prewarm
+from core.cache import init_store
+from core.clock import MongoOffset, ScaledClock, get_clock, set_clock, make_clock
+from core.poloniex.generator import PoloniexGeneratorStub
 from core.poloniex.stub import PoloniexApiStub
+from core.replay import HistoryRecorder, HistoryReplay
 from core.executor import SimpleExecutor
+from core.generator import MarketGenerator
+from core.http import upstream
+from core.indexes import ensure_indexes
+from core.journal import MemoryJournal, MongoJournal, restore
+from core.matching import MatchingExecutor
+from core.nonces import MemoryNonceStore, SharedNonceStore, MongoNonceStore
+from core.scheduler import ExecutionScheduler, ExecutionSchedulerParams, MongoLease, get_tick_interval
+from core.storage.memory import MemoryStorage
+from core.storage.mongo import MongoStorage
 
 
 def create_app(config='dev', *args, **kwargs):
@@ -17,16 +34,116 @@ def create_app(config='dev', *args, **kwargs):
     app.logger.setLevel(logging.DEBUG)
 
     app.mongo = PyMongo(app=app)
+    recorder, replay = None, None
+    # gunicorn workers share the database, clock advances must reach all of them
+    offset = MongoOffset(app.mongo.db) if app.config.get('EXECUTOR_STORAGE') != 'memory' else None
+    if app.config.get('REPLAY_PATH'):
+        replay = HistoryReplay.load(os.path.join(app.root_path, app.config['REPLAY_PATH']))
+        set_clock(ScaledClock(
+            start=app.config.get('REPLAY_START') or replay.start,
+            speed=app.config.get('REPLAY_SPEED') or 1.,
+            offset=offset
+        ))
+    else:
+        set_clock(make_clock(
+            mode=app.config.get('CLOCK_MODE', 'wall'),
+            start=app.config.get('CLOCK_START'),
+            speed=app.config.get('CLOCK_SPEED') or 1.,
+            offset=offset
+        ))
+        if app.config.get('RECORD_PATH'):
+            recorder = HistoryRecorder(os.path.join(app.root_path, app.config['RECORD_PATH']))
+    app.clock = get_clock()
 
-    app.executor = SimpleExecutor(db=app.mongo.db)
-    app.poloniex_stub = PoloniexApiStub(executor=app.executor)
-    app.bittrex_stub = BittrexApiStub(executor=app.executor)
+    upstream.configure(
+        pool_size=app.config.get('UPSTREAM_POOL_SIZE'),
+        connect_timeout=app.config.get('UPSTREAM_CONNECT_TIMEOUT'),
+        read_timeout=app.config.get('UPSTREAM_READ_TIMEOUT'),
+        retries=app.config.get('UPSTREAM_RETRIES'),
+        backoff_factor=app.config.get('UPSTREAM_BACKOFF_FACTOR'),
+        recorder=recorder,
+        replay=replay
+    )
+    cache_path = app.config.get('PROXY_CACHE_PATH')
+    init_store(
+        path=None if replay or not cache_path else os.path.join(app.root_path, cache_path),
+        max_entries=app.config.get('PROXY_CACHE_MAX_ENTRIES')
+    )
+    if app.config.get('EXECUTOR_STORAGE') == 'memory':
+        storage = MemoryStorage()
+    else:
+        storage = MongoStorage(
+            db=app.mongo.db,
+            fixed_point=app.config.get('MONGO_FIXED_POINT'),
+            decimal_codec=app.config.get('MONGO_DECIMAL_CODEC')
+        )
+        if app.config.get('MONGO_ENSURE_INDEXES'):
+            ensure_indexes(app.mongo.db)
+
+    journal = None
+    if app.config.get('EXECUTOR_JOURNAL') == 'mongo':
+        journal = MongoJournal(app.mongo.db)
+        if app.config.get('EXECUTOR_STORAGE') == 'memory':
+            restore(storage, journal)
+    elif app.config.get('EXECUTOR_JOURNAL') == 'memory':
+        journal = MemoryJournal()
+
+    executors = dict(
+        simple=SimpleExecutor,
+        matching=MatchingExecutor
+    )
+    executor_options = dict(storage=storage, journal=journal, clock=app.clock)
+    if app.config.get('EXECUTOR') == 'matching' and app.config.get('EXECUTOR_STORAGE') != 'memory':
+        # the order books live in one process, other workers refuse to match against stale copies
+        executor_options['lease'] = MongoLease(app.mongo.db, name='matching')
+    app.executor = executors[app.config.get('EXECUTOR', 'simple')](**executor_options)
+    nonce_stores = dict(
+        memory=MemoryNonceStore,
+        shared=SharedNonceStore,
+        mongo=lambda: MongoNonceStore(app.mongo.db)
+    )
+    nonce_store = nonce_stores[app.config.get('NONCE_STORE', 'memory')]()
+    if app.config.get('MARKET_DATA') == 'generator':
+        app.generator = MarketGenerator(
+            process=app.config.get('GENERATOR_PROCESS'),
+            volatility=app.config.get('GENERATOR_VOLATILITY'),
+            seed=app.config.get('GENERATOR_SEED'),
+            timer=app.clock.time
+        )
+        app.poloniex_stub = PoloniexGeneratorStub(app.generator, executor=app.executor, nonce_store=nonce_store)
+        app.bittrex_stub = BittrexGeneratorStub(app.generator, executor=app.executor, nonce_store=nonce_store)
+    else:
+        app.poloniex_stub = PoloniexApiStub(executor=app.executor, nonce_store=nonce_store)
+        app.bittrex_stub = BittrexApiStub(executor=app.executor, nonce_store=nonce_store)
+    if app.config.get('MARKET_DATA') != 'generator' and app.config.get('METADATA_BUNDLE_PATH'):
+        bundle = load_bundle(os.path.join(app.root_path, app.config['METADATA_BUNDLE_PATH']))
+        if bundle:
+            prewarm(bundle, app.bittrex_stub, app.poloniex_stub)
+    if app.config.get('EXECUTOR_STORAGE') != 'memory' and app.config.get('DEPTH_RESYNC_INTERVAL'):
+        # in-memory storage is private to the worker, its deltas already cover every order
+        for stub in [app.poloniex_stub, app.bittrex_stub]:
+            stub.depth_book.start(app.executor, interval=app.config['DEPTH_RESYNC_INTERVAL'])
+
+    interval = get_tick_interval(app.config.get('EXECUTOR_TICK_INTERVAL'), app.clock)
+    lease = None
+    if app.config.get('EXECUTOR_STORAGE') != 'memory':
+        # gunicorn workers share the database, only the lease holder ticks over it
+        lease = MongoLease(app.mongo.db, ttl=max(ExecutionSchedulerParams.LEASE_TTL, 3 * (interval or 0)))
+    app.scheduler = ExecutionScheduler(
+        executor=app.executor,
+        interval=interval,
+        lease=lease
+    )
+    if app.config.get('EXECUTOR_TICK_INTERVAL'):
+        app.scheduler.start()
 
     for module_name in find_modules('blueprints', recursive=True):
         module = import_module(module_name)
         if hasattr(module, 'blueprint'):
             app.register_blueprint(getattr(module, 'blueprint'))
 
+    register_commands(app)
+
     @app.errorhandler(404)
     def redirect_to_docs(_e):
         return redirect(url_for('pages.documentation')), 404
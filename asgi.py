@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from importlib import import_module
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+from quart import Quart
+from werkzeug.utils import find_modules
+
+from core.aio.executor import AsyncExecutor
+from core.aio.scheduler import AsyncExecutionScheduler
+from core.aio.storage import MotorStorage
+from core.aio.stub import AsyncBittrexApiStub, AsyncPoloniexApiStub
+from core.clock import MongoOffset, get_clock, set_clock, make_clock
+from core.indexes import ensure_indexes
+from core.journal import MemoryJournal, MongoJournal
+from core.nonces import MemoryNonceStore, SharedNonceStore
+from core.scheduler import ExecutionSchedulerParams, MongoLease, get_tick_interval
+from core.schema import NonceStore
+
+
+# nonces are checked on the event loop, blocking stores are not supported
+nonce_stores = dict(
+    memory=MemoryNonceStore,
+    shared=SharedNonceStore
+)
+
+
+def make_nonce_store(name='shared') -> NonceStore:
+    if name not in nonce_stores:
+        raise ValueError('make_nonce_store: {} nonce store is not supported, use one of {}'.format(
+            name, ', '.join(nonce_stores)))
+    return nonce_stores[name]()
+
+
+def create_asgi_app(config='dev', *args, **kwargs):
+    app = Quart(import_name=__name__, *args, **kwargs)
+    app.config.from_pyfile('config/{}.py'.format(config))
+    app.config.setdefault('MAX_CONTENT_LENGTH', 1024 * 1024)
+
+    app.logger.propagate = True
+    app.logger.setLevel(logging.DEBUG)
+
+    if app.config.get('EXECUTOR_STORAGE') != 'mongo' or app.config.get('EXECUTOR') != 'simple':
+        app.logger.warning('create_asgi_app: only the simple executor on mongo is async, using it instead')
+
+    db = MongoClient(app.config['MONGO_URI']).get_database()
+    if app.config.get('MONGO_ENSURE_INDEXES'):
+        ensure_indexes(db)
+
+    journal = None
+    if app.config.get('EXECUTOR_JOURNAL') == 'mongo':
+        journal = MongoJournal(db)
+    elif app.config.get('EXECUTOR_JOURNAL') == 'memory':
+        journal = MemoryJournal()
+
+    set_clock(make_clock(
+        mode=app.config.get('CLOCK_MODE', 'wall'),
+        start=app.config.get('CLOCK_START'),
+        speed=app.config.get('CLOCK_SPEED') or 1.,
+        offset=MongoOffset(db)
+    ))
+    app.clock = get_clock()
+    app.executor = AsyncExecutor(journal=journal, clock=app.clock)
+    nonce_store = make_nonce_store(app.config.get('ASGI_NONCE_STORE', 'shared'))
+    app.poloniex_stub = AsyncPoloniexApiStub(executor=app.executor, nonce_store=nonce_store)
+    app.bittrex_stub = AsyncBittrexApiStub(executor=app.executor, nonce_store=nonce_store)
+
+    interval = get_tick_interval(app.config.get('EXECUTOR_TICK_INTERVAL'), app.clock)
+    app.scheduler = AsyncExecutionScheduler(
+        executor=app.executor,
+        interval=interval,
+        # hypercorn workers share the database, only the lease holder ticks over it
+        lease=MongoLease(db, ttl=max(ExecutionSchedulerParams.LEASE_TTL, 3 * (interval or 0)))
+    )
+
+    @app.before_serving
+    async def startup():
+        app.motor = AsyncIOMotorClient(app.config['MONGO_URI'])
+        app.executor.init_storage(MotorStorage(
+            db=app.motor.get_default_database(),
+            fixed_point=app.config.get('MONGO_FIXED_POINT')
+        ))
+        if app.scheduler.interval:
+            app.scheduler.start()
+
+    @app.after_serving
+    async def shutdown():
+        await app.scheduler.stop()
+        await asyncio.gather(app.poloniex_stub.proxy.close(), app.bittrex_stub.proxy.close())
+        app.motor.close()
+
+    for module_name in find_modules('blueprints_aio'):
+        module = import_module(module_name)
+        if hasattr(module, 'blueprint'):
+            app.register_blueprint(getattr(module, 'blueprint'))
+
+    return app
+
+
+if __name__ == '__main__':
+    application = create_asgi_app()
+    application.run(debug=True)
@@ -0,0 +1,47 @@
+from flask import Blueprint, current_app, jsonify, request
+
+from core.breaker import get_breaker_stats
+from core.cache import get_cache_stats
+from core.http import upstream
+
+blueprint = Blueprint('admin', __name__, url_prefix='/admin')
+
+
+@blueprint.route('/stats', methods=['GET'])
+def stats():
+    return jsonify(dict(
+        upstream=upstream.get_stats(),
+        caches=get_cache_stats(),
+        breakers=get_breaker_stats(),
+        scheduler=dict(
+            ticks=current_app.scheduler.ticks,
+            coalesced_ticks=current_app.scheduler.coalesced_ticks,
+            leased_ticks=current_app.scheduler.leased_ticks
+        ),
+        saved_round_trips=current_app.executor.saved_round_trips
+    ))
+
+
+@blueprint.route('/clock', methods=['GET'])
+def clock():
+    return jsonify(current_app.clock.to_dict())
+
+
+@blueprint.route('/clock', methods=['POST'])
+def advance_clock():
+    if not current_app.config.get('ADMIN_CLOCK_ENABLED'):
+        return jsonify(dict(error='clock control is disabled')), 403
+
+    seconds = request.values.get('seconds', type=float)
+    if seconds is None:
+        return jsonify(dict(error='seconds is required')), 400
+
+    try:
+        current_app.clock.advance(seconds)
+    except ValueError as e:
+        return jsonify(dict(error=str(e))), 400
+
+    ticks = 0
+    if current_app.config.get('EXECUTOR_TICK_INTERVAL'):
+        ticks = current_app.scheduler.catch_up(int(seconds // current_app.config['EXECUTOR_TICK_INTERVAL']))
+    return jsonify(dict(current_app.clock.to_dict(), ticks=ticks))
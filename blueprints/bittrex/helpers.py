@@ -1,6 +1,6 @@
 import logging
 from pprint import pformat
-from flask import jsonify, current_app, request
+from flask import jsonify, current_app, request, g
 from functools import wraps
 
 from core.bittrex.types import BittrexApiError
@@ -12,15 +12,13 @@ def bittrex_api_method(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
-            current_app.executor.process()
-            current_app.bittrex_stub.switch_user(
+            g.api_key = current_app.bittrex_stub.authenticate(
                 url=request.url,
                 nonce=request.args.get('nonce'),
                 api_key=request.args.get('apikey'),
                 api_sign=request.headers.get('apisign')
             )
             response = f(*args, **kwargs)
-            current_app.executor.process()
         except BittrexApiError as e:
             response = e.get_response()
             logger.error('{}: {}\n{}'.format(
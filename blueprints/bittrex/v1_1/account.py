@@ -1,4 +1,4 @@
-from flask import Blueprint, current_app, request
+from flask import Blueprint, current_app, request, g
 
 from blueprints.bittrex.helpers import bittrex_api_method
 
@@ -8,13 +8,14 @@ blueprint = Blueprint('bittrex_account_v1.1', __name__, url_prefix='/bittrex.com
 @blueprint.route('/getbalances')
 @bittrex_api_method
 def getbalances():
-    return current_app.bittrex_stub.get_balances()
+    return current_app.bittrex_stub.get_balances(api_key=g.api_key)
 
 
 @blueprint.route('/getbalance')
 @bittrex_api_method
 def getbalance():
     return current_app.bittrex_stub.get_balance(
+        api_key=g.api_key,
         currency=request.args.get('currency')
     )
 
@@ -23,6 +24,7 @@ def getbalance():
 @bittrex_api_method
 def getdepositaddress():
     return current_app.bittrex_stub.get_deposit_address(
+        api_key=g.api_key,
         currency=request.args.get('currency')
     )
 
@@ -31,6 +33,7 @@ def getdepositaddress():
 @bittrex_api_method
 def withdraw():
     return current_app.bittrex_stub.withdraw(
+        api_key=g.api_key,
         currency=request.args.get('currency'),
         quantity=request.args.get('quantity'),
         address=request.args.get('address'),
@@ -42,6 +45,7 @@ def withdraw():
 @bittrex_api_method
 def getorder():
     return current_app.bittrex_stub.get_order(
+        api_key=g.api_key,
         uuid=request.args.get('uuid')
     )
 
@@ -50,6 +54,7 @@ def getorder():
 @bittrex_api_method
 def getorderhistory():
     return current_app.bittrex_stub.get_order_history(
+        api_key=g.api_key,
         market=request.args.get('market')
     )
 
@@ -58,6 +63,7 @@ def getorderhistory():
 @bittrex_api_method
 def getwithdrawalhistory():
     return current_app.bittrex_stub.get_withdrawal_history(
+        api_key=g.api_key,
         currency=request.args.get('currency')
     )
 
@@ -66,5 +72,6 @@ def getwithdrawalhistory():
 @bittrex_api_method
 def getdeposithistory():
     return current_app.bittrex_stub.get_deposit_history(
+        api_key=g.api_key,
         currency=request.args.get('currency')
     )
@@ -1,4 +1,4 @@
-from flask import Blueprint, current_app, request
+from flask import Blueprint, current_app, request, g
 
 from blueprints.bittrex.helpers import bittrex_api_method
 from core.schema import OrderDirection
@@ -10,6 +10,7 @@ blueprint = Blueprint('bittrex_market_v1.1', __name__, url_prefix='/bittrex.com/
 @bittrex_api_method
 def buylimit():
     return current_app.bittrex_stub.send_order(
+        api_key=g.api_key,
         direction=OrderDirection.BUY,
         market=request.args.get('market'),
         quantity=request.args.get('quantity'),
@@ -21,6 +22,7 @@ def buylimit():
 @bittrex_api_method
 def selllimit():
     return current_app.bittrex_stub.send_order(
+        api_key=g.api_key,
         direction=OrderDirection.SELL,
         market=request.args.get('market'),
         quantity=request.args.get('quantity'),
@@ -32,6 +34,7 @@ def selllimit():
 @bittrex_api_method
 def cancel():
     return current_app.bittrex_stub.cancel(
+        api_key=g.api_key,
         uuid=request.args.get('uuid')
     )
 
@@ -40,5 +43,6 @@ def cancel():
 @bittrex_api_method
 def getopenorders():
     return current_app.bittrex_stub.get_open_orders(
+        api_key=g.api_key,
         market=request.args.get('market')
     )
@@ -6,12 +6,15 @@ from blueprints.forms import DepositForm
 blueprint = Blueprint('pages', __name__, url_prefix='')
 
 
+@blueprint.record_once
+def prerender(state):
+    with open(os.path.join(state.app.root_path, 'README.md')) as file:
+        state.app.readme = mistune.markdown(file.read())
+
+
 @blueprint.route('/')
 def documentation():
-    with open(os.path.join(current_app.root_path, 'README.md')) as file:
-        readme = mistune.markdown(file.read())
-
-    return render_template('documentation.html', readme=readme)
+    return render_template('documentation.html', readme=current_app.readme)
 
 
 @blueprint.route('/deposit', methods=['GET', 'POST'])
@@ -1,6 +1,6 @@
 import logging
 from pprint import pformat
-from flask import jsonify, current_app, request, abort
+from flask import jsonify, current_app, request, g, abort
 from functools import wraps
 
 from core.poloniex.types import PoloniexApiError
@@ -18,15 +18,13 @@ def poloniex_api_method(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
-            current_app.executor.process()
-            current_app.poloniex_stub.switch_user(
+            g.api_key = current_app.poloniex_stub.authenticate(
                 data=request.get_data(as_text=True),
                 api_key=request.headers.get('Key'),
                 api_sign=request.headers.get('Sign'),
                 nonce=request.form.get('nonce')
             )
             response = f(*args, **kwargs)
-            current_app.executor.process()
         except PoloniexApiError as e:
             response = e.get_response()
             logger.error('{}: {}\n{}'.format(
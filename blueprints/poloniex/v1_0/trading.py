@@ -1,4 +1,4 @@
-from flask import Blueprint, current_app, request
+from flask import Blueprint, current_app, request, g
 
 from blueprints.poloniex.helpers import poloniex_api_method, prevent_form_parse
 from core.poloniex.types import PoloniexErrorMessage, PoloniexApiError
@@ -13,28 +13,33 @@ blueprint.before_request(prevent_form_parse)
 def trading_api():
     command = request.form.get('command')
     if command == 'returnBalances':
-        response = current_app.poloniex_stub.return_balances()
+        response = current_app.poloniex_stub.return_balances(api_key=g.api_key)
     elif command == 'returnCompleteBalances':
         response = current_app.poloniex_stub.return_complete_balances(
+            api_key=g.api_key,
             account=request.form.get('account')
         )
     elif command == 'returnDepositAddresses':
-        response = current_app.poloniex_stub.return_deposit_addresses()
+        response = current_app.poloniex_stub.return_deposit_addresses(api_key=g.api_key)
     elif command == 'generateNewAddress':
         response = current_app.poloniex_stub.generate_new_address(
+            api_key=g.api_key,
             currency=request.form.get('currency')
         )
     elif command == 'returnDepositsWithdrawals':
         response = current_app.poloniex_stub.return_deposits_withdrawals(
+            api_key=g.api_key,
             start=request.form.get('start'),
             end=request.form.get('end')
         )
     elif command == 'returnOpenOrders':
         response = current_app.poloniex_stub.return_open_orders(
+            api_key=g.api_key,
             currency_pair=request.form.get('currencyPair')
         )
     elif command == 'returnTradeHistory':
         response = current_app.poloniex_stub.return_account_trade_history(
+            api_key=g.api_key,
             currency_pair=request.form.get('currencyPair'),
             start=request.form.get('start'),
             end=request.form.get('end'),
@@ -42,14 +47,17 @@ def trading_api():
         )
     elif command == 'returnOrderTrades':
         response = current_app.poloniex_stub.return_order_trades(
+            api_key=g.api_key,
             order_number=request.form.get('orderNumber')
         )
     elif command == 'returnOrderStatus':
         response = current_app.poloniex_stub.return_order_status(
+            api_key=g.api_key,
             order_number=request.form.get('orderNumber')
         )
     elif command == 'buy':
         response = current_app.poloniex_stub.send_order(
+            api_key=g.api_key,
             direction=OrderDirection.BUY,
             currency_pair=request.form.get('currencyPair'),
             rate=request.form.get('rate'),
@@ -60,6 +68,7 @@ def trading_api():
         )
     elif command == 'sell':
         response = current_app.poloniex_stub.send_order(
+            api_key=g.api_key,
             direction=OrderDirection.SELL,
             currency_pair=request.form.get('currencyPair'),
             rate=request.form.get('rate'),
@@ -70,10 +79,12 @@ def trading_api():
         )
     elif command == 'cancelOrder':
         response = current_app.poloniex_stub.cancel_order(
+            api_key=g.api_key,
             order_number=request.form.get('orderNumber')
         )
     elif command == 'moveOrder':
         response = current_app.poloniex_stub.move_order(
+            api_key=g.api_key,
             order_number=request.form.get('orderNumber'),
             rate=request.form.get('rate'),
             amount=request.form.get('amount'),
@@ -82,15 +93,17 @@ def trading_api():
         )
     elif command == 'withdraw':
         response = current_app.poloniex_stub.withdraw(
+            api_key=g.api_key,
             currency=request.form.get('currency'),
             amount=request.form.get('amount'),
             address=request.form.get('address'),
             payment_id=request.form.get('paymentId')
         )
     elif command == 'returnFeeInfo':
-        response = current_app.poloniex_stub.return_fee_info()
+        response = current_app.poloniex_stub.return_fee_info(api_key=g.api_key)
     elif command == 'returnAvailableAccountBalances':
         response = current_app.poloniex_stub.return_available_account_balances(
+            api_key=g.api_key,
             account=request.form.get('account')
         )
     else:
@@ -0,0 +1,164 @@
+from quart import Blueprint, current_app, request, g
+
+from blueprints_aio.helpers import bittrex_api_method, make_quart_response
+from core.schema import OrderDirection
+
+blueprint = Blueprint('bittrex_v1.1', __name__, url_prefix='/bittrex.com/api/v1.1')
+
+
+@blueprint.route('/public/getmarkets', methods=['GET'])
+async def getmarkets():
+    return make_quart_response(await current_app.bittrex_stub.proxy.get_markets())
+
+
+@blueprint.route('/public/getcurrencies', methods=['GET'])
+async def getcurrencies():
+    return make_quart_response(await current_app.bittrex_stub.proxy.get_currencies())
+
+
+@blueprint.route('/public/getticker', methods=['GET'])
+async def getticker():
+    return make_quart_response(await current_app.bittrex_stub.proxy.get_ticker(
+        market=request.args.get('market')
+    ))
+
+
+@blueprint.route('/public/getmarketsummaries', methods=['GET'])
+async def getmarketsummaries():
+    return make_quart_response(await current_app.bittrex_stub.proxy.get_market_summaries())
+
+
+@blueprint.route('/public/getorderbook', methods=['GET'])
+async def getorderbook():
+    return make_quart_response(await current_app.bittrex_stub.proxy.get_order_book(
+        market=request.args.get('market'),
+        _type=request.args.get('type')
+    ))
+
+
+@blueprint.route('/public/getmarketsummary', methods=['GET'])
+async def getmarketsummary():
+    return make_quart_response(await current_app.bittrex_stub.proxy.get_market_summary(
+        market=request.args.get('market')
+    ))
+
+
+@blueprint.route('/public/getmarkethistory', methods=['GET'])
+async def getmarkethistory():
+    return make_quart_response(await current_app.bittrex_stub.proxy.get_market_history(
+        market=request.args.get('market')
+    ))
+
+
+@blueprint.route('/market/buylimit')
+@bittrex_api_method
+async def buylimit():
+    return await current_app.bittrex_stub.send_order(
+        api_key=g.api_key,
+        direction=OrderDirection.BUY,
+        market=request.args.get('market'),
+        quantity=request.args.get('quantity'),
+        rate=request.args.get('rate')
+    )
+
+
+@blueprint.route('/market/selllimit')
+@bittrex_api_method
+async def selllimit():
+    return await current_app.bittrex_stub.send_order(
+        api_key=g.api_key,
+        direction=OrderDirection.SELL,
+        market=request.args.get('market'),
+        quantity=request.args.get('quantity'),
+        rate=request.args.get('rate')
+    )
+
+
+@blueprint.route('/market/cancel')
+@bittrex_api_method
+async def cancel():
+    return await current_app.bittrex_stub.cancel(
+        api_key=g.api_key,
+        uuid=request.args.get('uuid')
+    )
+
+
+@blueprint.route('/market/getopenorders')
+@bittrex_api_method
+async def getopenorders():
+    return await current_app.bittrex_stub.get_open_orders(
+        api_key=g.api_key,
+        market=request.args.get('market')
+    )
+
+
+@blueprint.route('/account/getbalances')
+@bittrex_api_method
+async def getbalances():
+    return await current_app.bittrex_stub.get_balances(api_key=g.api_key)
+
+
+@blueprint.route('/account/getbalance')
+@bittrex_api_method
+async def getbalance():
+    return await current_app.bittrex_stub.get_balance(
+        api_key=g.api_key,
+        currency=request.args.get('currency')
+    )
+
+
+@blueprint.route('/account/getdepositaddress')
+@bittrex_api_method
+async def getdepositaddress():
+    return current_app.bittrex_stub.get_deposit_address(
+        api_key=g.api_key,
+        currency=request.args.get('currency')
+    )
+
+
+@blueprint.route('/account/withdraw')
+@bittrex_api_method
+async def withdraw():
+    return await current_app.bittrex_stub.withdraw(
+        api_key=g.api_key,
+        currency=request.args.get('currency'),
+        quantity=request.args.get('quantity'),
+        address=request.args.get('address'),
+        payment_id=request.args.get('paymentid')
+    )
+
+
+@blueprint.route('/account/getorder')
+@bittrex_api_method
+async def getorder():
+    return await current_app.bittrex_stub.get_order(
+        api_key=g.api_key,
+        uuid=request.args.get('uuid')
+    )
+
+
+@blueprint.route('/account/getorderhistory')
+@bittrex_api_method
+async def getorderhistory():
+    return await current_app.bittrex_stub.get_order_history(
+        api_key=g.api_key,
+        market=request.args.get('market')
+    )
+
+
+@blueprint.route('/account/getwithdrawalhistory')
+@bittrex_api_method
+async def getwithdrawalhistory():
+    return await current_app.bittrex_stub.get_withdrawal_history(
+        api_key=g.api_key,
+        currency=request.args.get('currency')
+    )
+
+
+@blueprint.route('/account/getdeposithistory')
+@bittrex_api_method
+async def getdeposithistory():
+    return await current_app.bittrex_stub.get_deposit_history(
+        api_key=g.api_key,
+        currency=request.args.get('currency')
+    )
@@ -0,0 +1,67 @@
+import logging
+import simplejson as json
+from pprint import pformat
+from quart import current_app, request, g
+from functools import wraps
+
+from core.bittrex.types import BittrexApiError
+from core.payload import Payload
+from core.poloniex.types import PoloniexApiError
+
+logger = logging.getLogger('testex')
+
+
+def make_quart_response(response):
+    if isinstance(response, Payload):
+        headers = {'content-type': 'application/json', 'vary': 'Accept-Encoding'}
+        gzipped = response.gzipped if 'gzip' in request.accept_encodings else None
+        headers['etag'] = response.gzip_etag if gzipped else response.etag
+
+        if response.status_code == 200 and request.if_none_match.contains_raw(headers['etag']):
+            return b'', 304, headers
+
+        if gzipped:
+            headers['content-encoding'] = 'gzip'
+            return gzipped, response.status_code, headers
+        return response.content, response.status_code, headers
+
+    return json.dumps(response), 200, {'content-type': 'application/json'}
+
+
+def bittrex_api_method(f):
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        try:
+            await current_app.bittrex_stub.proxy.refresh()
+            g.api_key = current_app.bittrex_stub.authenticate(
+                url=request.url,
+                nonce=request.args.get('nonce'),
+                api_key=request.args.get('apikey'),
+                api_sign=request.headers.get('apisign')
+            )
+            response = await f(*args, **kwargs)
+        except BittrexApiError as e:
+            response = e.get_response()
+            logger.error('{}: {}\n{}'.format(request.path, e.message, pformat(request.args, compact=True)))
+        return make_quart_response(response)
+    return decorated_function
+
+
+def poloniex_api_method(f):
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        form = await request.form
+        try:
+            await current_app.poloniex_stub.proxy.refresh()
+            g.api_key = current_app.poloniex_stub.authenticate(
+                data=await request.get_data(as_text=True),
+                api_key=request.headers.get('Key'),
+                api_sign=request.headers.get('Sign'),
+                nonce=form.get('nonce')
+            )
+            response = await f(*args, **kwargs)
+        except PoloniexApiError as e:
+            response = e.get_response()
+            logger.error('{}: {}\n{}'.format(request.path, e.message, pformat(form.to_dict(), compact=True)))
+        return make_quart_response(response)
+    return decorated_function
@@ -0,0 +1,35 @@
+import os
+import mistune
+from decimal import Decimal, InvalidOperation
+from quart import Blueprint, current_app, render_template, request
+
+from blueprints_aio.helpers import make_quart_response
+
+blueprint = Blueprint('pages', __name__, url_prefix='')
+
+
+@blueprint.route('/')
+async def documentation():
+    with open(os.path.join(current_app.root_path, 'README.md')) as file:
+        readme = mistune.markdown(file.read())
+
+    return await render_template('documentation.html', readme=readme)
+
+
+@blueprint.route('/deposit', methods=['POST'])
+async def deposit():
+    form = await request.form
+    try:
+        amount = Decimal(form.get('amount'))
+    except (TypeError, InvalidOperation):
+        return make_quart_response(dict(success=False, message='INVALID_AMOUNT'))
+
+    if not form.get('api_key') or not form.get('currency') or amount <= 0:
+        return make_quart_response(dict(success=False, message='REQUIRED_PARAMETER_MISSING'))
+
+    transaction = await current_app.executor.deposit(
+        api_key=form.get('api_key'),
+        currency=form.get('currency'),
+        quantity=amount
+    )
+    return make_quart_response(dict(success=True, message='', result=dict(uuid=transaction['_id'])))
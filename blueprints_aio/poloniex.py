@@ -0,0 +1,149 @@
+from quart import Blueprint, current_app, request, g
+
+from blueprints_aio.helpers import poloniex_api_method, make_quart_response
+from core.poloniex.types import PoloniexErrorMessage, PoloniexApiError
+from core.schema import OrderDirection
+
+blueprint = Blueprint('poloniex_v1.0', __name__, url_prefix='/poloniex.com')
+
+
+@blueprint.route('/public', methods=['GET'])
+async def public():
+    command = request.args.get('command')
+    if command == 'returnTicker':
+        response = await current_app.poloniex_stub.proxy.return_ticker()
+    elif command == 'return24hVolume':
+        response = await current_app.poloniex_stub.proxy.return_24h_volume()
+    elif command == 'returnOrderBook':
+        response = await current_app.poloniex_stub.proxy.return_order_book(
+            currency_pair=request.args.get('currencyPair'),
+            depth=request.args.get('depth')
+        )
+    elif command == 'returnTradeHistory':
+        response = await current_app.poloniex_stub.proxy.return_trade_history(
+            currency_pair=request.args.get('currencyPair'),
+            start=request.args.get('start'),
+            end=request.args.get('end')
+        )
+    elif command == 'returnChartData':
+        response = await current_app.poloniex_stub.proxy.return_chart_data(
+            currency_pair=request.args.get('currencyPair'),
+            start=request.args.get('start'),
+            end=request.args.get('end'),
+            period=request.args.get('period')
+        )
+    elif command == 'returnCurrencies':
+        response = await current_app.poloniex_stub.proxy.return_currencies()
+    elif command == 'returnLoanOrders':
+        response = await current_app.poloniex_stub.proxy.return_loan_orders(
+            currency=request.args.get('currency')
+        )
+    else:
+        return make_quart_response(dict(error=PoloniexErrorMessage.INVALID_COMMAND))
+
+    return make_quart_response(response)
+
+
+@blueprint.route('/tradingApi', methods=['POST'])
+@poloniex_api_method
+async def trading_api():
+    form = await request.form
+    command = form.get('command')
+    if command == 'returnBalances':
+        response = await current_app.poloniex_stub.return_balances(api_key=g.api_key)
+    elif command == 'returnCompleteBalances':
+        response = await current_app.poloniex_stub.return_complete_balances(
+            api_key=g.api_key,
+            account=form.get('account')
+        )
+    elif command == 'returnDepositAddresses':
+        response = current_app.poloniex_stub.return_deposit_addresses(api_key=g.api_key)
+    elif command == 'generateNewAddress':
+        response = current_app.poloniex_stub.generate_new_address(
+            api_key=g.api_key,
+            currency=form.get('currency')
+        )
+    elif command == 'returnDepositsWithdrawals':
+        response = await current_app.poloniex_stub.return_deposits_withdrawals(
+            api_key=g.api_key,
+            start=form.get('start'),
+            end=form.get('end')
+        )
+    elif command == 'returnOpenOrders':
+        response = await current_app.poloniex_stub.return_open_orders(
+            api_key=g.api_key,
+            currency_pair=form.get('currencyPair')
+        )
+    elif command == 'returnTradeHistory':
+        response = await current_app.poloniex_stub.return_account_trade_history(
+            api_key=g.api_key,
+            currency_pair=form.get('currencyPair'),
+            start=form.get('start'),
+            end=form.get('end'),
+            limit=form.get('limit')
+        )
+    elif command == 'returnOrderTrades':
+        response = await current_app.poloniex_stub.return_order_trades(
+            api_key=g.api_key,
+            order_number=form.get('orderNumber')
+        )
+    elif command == 'returnOrderStatus':
+        response = await current_app.poloniex_stub.return_order_status(
+            api_key=g.api_key,
+            order_number=form.get('orderNumber')
+        )
+    elif command == 'buy':
+        response = await current_app.poloniex_stub.send_order(
+            api_key=g.api_key,
+            direction=OrderDirection.BUY,
+            currency_pair=form.get('currencyPair'),
+            rate=form.get('rate'),
+            amount=form.get('amount'),
+            fill_or_kill=form.get('fillOrKill'),
+            immediate_or_cancel=form.get('immediateOrCancel'),
+            post_only=form.get('postOnly')
+        )
+    elif command == 'sell':
+        response = await current_app.poloniex_stub.send_order(
+            api_key=g.api_key,
+            direction=OrderDirection.SELL,
+            currency_pair=form.get('currencyPair'),
+            rate=form.get('rate'),
+            amount=form.get('amount'),
+            fill_or_kill=form.get('fillOrKill'),
+            immediate_or_cancel=form.get('immediateOrCancel'),
+            post_only=form.get('postOnly')
+        )
+    elif command == 'cancelOrder':
+        response = await current_app.poloniex_stub.cancel_order(
+            api_key=g.api_key,
+            order_number=form.get('orderNumber')
+        )
+    elif command == 'moveOrder':
+        response = current_app.poloniex_stub.move_order(
+            api_key=g.api_key,
+            order_number=form.get('orderNumber'),
+            rate=form.get('rate'),
+            amount=form.get('amount'),
+            immediate_or_cancel=form.get('immediateOrCancel'),
+            post_only=form.get('postOnly')
+        )
+    elif command == 'withdraw':
+        response = await current_app.poloniex_stub.withdraw(
+            api_key=g.api_key,
+            currency=form.get('currency'),
+            amount=form.get('amount'),
+            address=form.get('address'),
+            payment_id=form.get('paymentId')
+        )
+    elif command == 'returnFeeInfo':
+        response = current_app.poloniex_stub.return_fee_info(api_key=g.api_key)
+    elif command == 'returnAvailableAccountBalances':
+        response = await current_app.poloniex_stub.return_available_account_balances(
+            api_key=g.api_key,
+            account=form.get('account')
+        )
+    else:
+        raise PoloniexApiError(PoloniexErrorMessage.INVALID_COMMAND)
+
+    return response
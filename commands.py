@@ -0,0 +1,56 @@
+import click
+import os
+from flask import current_app
+from tabulate import tabulate
+
+from core.bundle import make_bundle, save_bundle
+from core.indexes import ensure_indexes, get_index_report
+from core.journal import restore, take_snapshot
+from core.storage.memory import MemoryStorage
+from core.storage.mongo import migrate_fixed_point
+
+
+def register_commands(app):
+
+    @app.cli.command('indexes')
+    @click.option('--apply', is_flag=True, help='Create missing indexes before reporting.')
+    def indexes(apply):
+        if apply:
+            ensure_indexes(current_app.mongo.db)
+
+        report = get_index_report(current_app.mongo.db)
+        click.echo(tabulate(report, headers=['collection', 'index', 'status', 'ops']))
+
+    @app.cli.command('fixed-point')
+    @click.option('--reverse', is_flag=True, help='Convert fixed-point amounts back to Decimal128.')
+    def fixed_point(reverse):
+        migrated = migrate_fixed_point(current_app.mongo.db, reverse=reverse)
+        click.echo('{} documents migrated'.format(migrated))
+
+    @app.cli.command('bundle')
+    @click.option('--path', help='Bundle file, defaults to METADATA_BUNDLE_PATH.')
+    def bundle(path):
+        path = path or os.path.join(current_app.root_path, current_app.config['METADATA_BUNDLE_PATH'])
+        save_bundle(make_bundle(current_app.bittrex_stub, current_app.poloniex_stub), path)
+        click.echo('metadata bundle saved to {}'.format(path))
+
+    @app.cli.command('snapshot')
+    def snapshot():
+        seq = take_snapshot(current_app.executor.journal)
+        click.echo('snapshot #{} saved'.format(seq))
+
+    @app.cli.command('replay')
+    @click.option('--until', type=click.DateTime(), help='Restore the state as of this UTC time.')
+    @click.option('--apply', is_flag=True, help='Replace the executor storage with the replayed state.')
+    def replay(until, apply):
+        storage = MemoryStorage()
+        seq = restore(storage, current_app.executor.journal, until=until)
+        data = storage.dump()
+        if apply:
+            current_app.executor.storage.load(data)
+
+        click.echo(tabulate(
+            [(collection, len(documents)) for collection, documents in data.items()],
+            headers=['collection', 'documents']
+        ))
+        click.echo('replayed up to event #{}'.format(seq))
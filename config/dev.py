@@ -2,3 +2,33 @@ CACHE_TYPE = 'simple'
 MONGO_URI = 'mongodb://127.0.0.1:27017/testex'
 SECRET_KEY = 'you-never-know-you-never-know'
 WTF_CSRF_ENABLED = False
+EXECUTOR_TICK_INTERVAL = 1
+EXECUTOR = 'simple'
+MONGO_ENSURE_INDEXES = True
+EXECUTOR_STORAGE = 'mongo'
+EXECUTOR_JOURNAL = 'mongo'
+DEPTH_RESYNC_INTERVAL = 5  # seconds, reloads other workers' open orders into the order book overlay
+MONGO_FIXED_POINT = False
+MONGO_DECIMAL_CODEC = True
+NONCE_STORE = 'memory'
+ASGI_NONCE_STORE = 'memory'  # memory or shared, the async app checks nonces on the event loop
+UPSTREAM_POOL_SIZE = 10
+UPSTREAM_CONNECT_TIMEOUT = 3.05
+UPSTREAM_READ_TIMEOUT = 10
+UPSTREAM_RETRIES = 3
+UPSTREAM_BACKOFF_FACTOR = 0.3
+PROXY_CACHE_PATH = 'var/proxy-cache.sqlite'  # relative to the app root, created private
+PROXY_CACHE_MAX_ENTRIES = 1024
+METADATA_BUNDLE_PATH = 'data/metadata.json'
+MARKET_DATA = 'upstream'
+GENERATOR_PROCESS = 'gbm'
+GENERATOR_VOLATILITY = 0.05
+GENERATOR_SEED = None
+REPLAY_PATH = None  # gzip json lines written by RECORD_PATH
+REPLAY_SPEED = 1
+REPLAY_START = None  # unix timestamp, defaults to the first record
+RECORD_PATH = None
+CLOCK_MODE = 'wall'  # wall, frozen or fast
+CLOCK_START = None  # unix timestamp, defaults to now
+CLOCK_SPEED = 1
+ADMIN_CLOCK_ENABLED = True  # lets POST /admin/clock move the clock forward
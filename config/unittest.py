@@ -1,3 +1,33 @@
 CACHE_TYPE = 'simple'
 MONGO_URI = 'mongodb://localhost:27017/testex'
 SECRET_KEY = 'you-never-know-you-never-know'
+EXECUTOR_TICK_INTERVAL = None
+EXECUTOR = 'simple'
+MONGO_ENSURE_INDEXES = False
+EXECUTOR_STORAGE = 'memory'
+EXECUTOR_JOURNAL = None
+DEPTH_RESYNC_INTERVAL = None  # seconds, reloads other workers' open orders into the order book overlay
+MONGO_FIXED_POINT = False
+MONGO_DECIMAL_CODEC = False
+NONCE_STORE = 'memory'
+ASGI_NONCE_STORE = 'memory'  # memory or shared, the async app checks nonces on the event loop
+UPSTREAM_POOL_SIZE = 10
+UPSTREAM_CONNECT_TIMEOUT = 3.05
+UPSTREAM_READ_TIMEOUT = 10
+UPSTREAM_RETRIES = 3
+UPSTREAM_BACKOFF_FACTOR = 0.3
+PROXY_CACHE_PATH = None
+PROXY_CACHE_MAX_ENTRIES = 1024
+METADATA_BUNDLE_PATH = None
+MARKET_DATA = 'upstream'
+GENERATOR_PROCESS = 'gbm'
+GENERATOR_VOLATILITY = 0.05
+GENERATOR_SEED = None
+REPLAY_PATH = None  # gzip json lines written by RECORD_PATH
+REPLAY_SPEED = 1
+REPLAY_START = None  # unix timestamp, defaults to the first record
+RECORD_PATH = None
+CLOCK_MODE = 'wall'  # wall, frozen or fast
+CLOCK_START = None  # unix timestamp, defaults to now
+CLOCK_SPEED = 1
+ADMIN_CLOCK_ENABLED = True  # lets POST /admin/clock move the clock forward
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+from decimal import Decimal
+from functools import partial
+from typing import List
+
+from core.aio.storage import MotorStorage
+from core.executor import ExecutorLogic, SimpleExecutorParams, make_deposit, merge_increments, \
+    get_order_opened_increments, get_order_closed_increments, get_transaction_submitted_increments, \
+    get_transaction_confirmed_increments
+from core.journal import is_snapshot_due, take_snapshot
+from core.schema import OrderStatus, TransactionStatus, Journal, EventType
+
+logger = logging.getLogger('testex')
+
+
+class AsyncExecutor(ExecutorLogic):
+
+    def __init__(self, storage=None, journal=None, clock=None):
+        super(AsyncExecutor, self).__init__(clock)
+        self.storage = None  # type: MotorStorage
+        self.journal = None  # type: Journal
+        if storage:
+            self.init_storage(storage)
+        if journal:
+            self.init_journal(journal)
+
+    def init_storage(self, storage: MotorStorage):
+        self.storage = storage
+
+    def init_journal(self, journal: Journal):
+        self.journal = journal
+
+    async def run_sync(self, func, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, partial(func, *args, **kwargs))
+
+    async def record(self, _type, api_key, **payload):
+        if self.journal:
+            await self.run_sync(self.journal.append, _type, api_key, **payload)
+
+    async def execute_order(self, order: dict,
+                            non_execute_prob=SimpleExecutorParams.NON_EXECUTE_PROB,
+                            trade_amount=None):
+
+        fill = self.prepare_fill(order, non_execute_prob, trade_amount)
+        if fill is None:
+            return
+
+        order, trade, inc, fields = fill
+        if not await self.storage.update_order(
+            api_key=order['api_key'],
+            number=order['_id'],
+            inc=inc,
+            fields=fields,
+            cond=dict(status=OrderStatus.OPENED)
+        ):
+            logger.debug('execute_order: {} was closed meanwhile'.format(order['_id']))
+            return
+        await self.storage.insert_trade(trade)
+        await self.record(EventType.TRADE, order['api_key'], trade=trade, inc=inc, fields=fields)
+        self.after_fill(order, trade)
+
+        if order['status'] == OrderStatus.CLOSED:
+            increments = await self.on_order_closed(order)
+            await self.record(EventType.ORDER_CLOSED, order['api_key'], number=order['_id'], increments=increments)
+        return order
+
+    async def sync_transaction(self, transaction: dict):
+        fields = self.make_status_fields(TransactionStatus.CONFIRMED)
+        await self.storage.update_transaction(
+            api_key=transaction['api_key'],
+            number=transaction['_id'],
+            fields=fields
+        )
+        transaction.update(fields)
+        increments = await self.on_transaction_confirmed(transaction)
+        await self.record(EventType.TRANSACTION_CONFIRMED, transaction['api_key'], number=transaction['_id'],
+                          fields=fields, increments=increments)
+
+    async def sync_transactions(self):
+        transactions = await self.storage.get_transactions(status=TransactionStatus.UNCONFIRMED)
+        for transaction in transactions:
+            await self.sync_transaction(transaction)
+
+    async def execute_orders(self):
+        orders = await self.storage.get_orders(status=OrderStatus.OPENED)
+        for order in orders:
+            await self.execute_order(order)
+
+    async def process(self):
+        await self.execute_orders()
+        await self.sync_transactions()
+
+        if self.journal and await self.run_sync(is_snapshot_due, self.journal):
+            await self.run_sync(take_snapshot, self.journal)
+
+    async def send_order(self, api_key, number, **kwargs):
+        order = self.make_order(api_key, number, **kwargs)
+        await self.storage.insert_order(order)
+
+        increments = await self.on_order_opened(order)
+        await self.record(EventType.ORDER_OPENED, api_key, order=order, increments=increments)
+        self.after_send_order(order)
+        return order
+
+    async def send_transaction(self, api_key, number, **kwargs):
+        transaction = self.make_transaction(api_key, number, **kwargs)
+        await self.storage.insert_transaction(transaction)
+        increments = await self.on_transaction_submitted(transaction)
+        await self.record(EventType.TRANSACTION_SUBMITTED, api_key, transaction=transaction, increments=increments)
+        self.after_send_transaction(transaction)
+        return transaction
+
+    async def get_order(self, api_key, number):
+        order = await self.storage.get_order(api_key, number)
+        if order:
+            return self.extend_order(order)
+
+    async def cancel_order(self, api_key, number):
+        order = await self.storage.get_order(api_key, number)
+        if order:
+            fields = self.make_status_fields(OrderStatus.CLOSED)
+            if not await self.storage.update_order(api_key, number, fields=fields,
+                                                   cond=dict(status=OrderStatus.OPENED)):
+                return self.extend_order(order)
+
+            # fills are applied to opened orders only, the stored one is final now
+            order = self.after_cancel_order(await self.storage.get_order(api_key, number))
+            increments = await self.on_order_closed(order)
+            await self.record(EventType.ORDER_CLOSED, api_key, number=number, fields=fields, increments=increments)
+            return order
+
+    async def get_orders(self, api_key, status, market=None):
+        orders = await self.storage.get_orders(
+            api_key=api_key,
+            status=status,
+            market=market
+        )
+        return list(map(self.extend_order, orders))
+
+    async def get_transactions(self, api_key, _type=None, currency=None,
+                               start_at=None, end_at=None) -> List[dict]:
+        return await self.storage.get_transactions(
+            api_key=api_key,
+            _type=_type,
+            currency=currency,
+            start_at=start_at,
+            end_at=end_at
+        )
+
+    async def get_trades(self, api_key, order_number=None, market=None, limit=None,
+                         start_at=None, end_at=None) -> List[dict]:
+        return await self.storage.get_trades(
+            api_key=api_key,
+            order_number=order_number,
+            market=market,
+            limit=limit,
+            start_at=start_at,
+            end_at=end_at
+        )
+
+    async def get_balances(self, api_key):
+        return await self.storage.get_balances(api_key)
+
+    async def get_balance(self, api_key, currency=None):
+        return self.make_balance(api_key, currency, await self.storage.get_balance(api_key, currency))
+
+    async def increment_balances(self, api_key, increments: dict):
+        await self.storage.increment_balances(api_key, increments)
+        self.after_increment_balances(increments)
+
+    async def on_order_closed(self, order: dict):
+        increments = get_order_closed_increments(order)
+        await self.increment_balances(order['api_key'], increments)
+        return increments
+
+    async def on_order_opened(self, order: dict):
+        increments = get_order_opened_increments(order)
+        await self.increment_balances(order['api_key'], increments)
+        return increments
+
+    async def on_transaction_submitted(self, transaction: dict):
+        increments = get_transaction_submitted_increments(transaction)
+        await self.increment_balances(transaction['api_key'], increments)
+        return increments
+
+    async def on_transaction_confirmed(self, transaction: dict):
+        increments = get_transaction_confirmed_increments(transaction)
+        await self.increment_balances(transaction['api_key'], increments)
+        return increments
+
+    async def deposit(self, api_key, currency, quantity: Decimal):
+        transaction = make_deposit(api_key, currency, quantity, created_at=self.clock.utcnow())
+        await self.storage.insert_transaction(transaction)
+
+        increments = merge_increments(
+            await self.on_transaction_submitted(transaction),
+            await self.on_transaction_confirmed(transaction)
+        )
+        await self.record(EventType.DEPOSIT, api_key, transaction=transaction, increments=increments)
+        self.after_deposit(transaction)
+        return transaction
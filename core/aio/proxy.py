@@ -0,0 +1,249 @@
+import aiohttp
+import asyncio
+import simplejson as json
+from cachetools import TTLCache
+from cachetools.keys import hashkey
+from functools import wraps
+from urllib.parse import urljoin
+
+from core.bittrex.types import BittrexApiError
+from core.clock import monotonic
+from core.helpers import obj_dropna
+from core.payload import Payload
+from core.poloniex.types import PoloniexApiError
+
+
+class AsyncRequestParams:
+    TIMEOUT = 10.  # seconds
+    CONNECTIONS_LIMIT = 100
+
+
+def async_cached(ttl, maxsize=128):
+    def decorator(f):
+        cache = TTLCache(ttl=ttl, maxsize=maxsize, timer=monotonic)
+        pending = dict()
+
+        @wraps(f)
+        async def wrapper(*args, **kwargs):
+            key = hashkey(*args, **kwargs)
+            try:
+                return cache[key]
+            except KeyError:
+                pass
+
+            if key not in pending:
+                pending[key] = asyncio.ensure_future(f(*args, **kwargs))
+            future = pending[key]
+            try:
+                value = await asyncio.shield(future)
+            finally:
+                if future.done():
+                    pending.pop(key, None)
+
+            cache[key] = value
+            return value
+        return wrapper
+    return decorator
+
+
+class AsyncRawRequest:
+    base_url = None
+
+    def __init__(self, timeout=AsyncRequestParams.TIMEOUT):
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session = None  # type: aiohttp.ClientSession
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                headers={'content-Type': 'application/json'},
+                connector=aiohttp.TCPConnector(limit=AsyncRequestParams.CONNECTIONS_LIMIT)
+            )
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    async def get_response(self, response: aiohttp.ClientResponse):
+        return Payload(await response.read(), response.status)
+
+    async def fetch(self, url, **params):
+        params = {k: str(v) for k, v in obj_dropna(params).items()}
+        async with self.get_session().get(url, params=params) as response:
+            return await self.get_response(response)
+
+
+class AsyncBittrexRawRequest(AsyncRawRequest):
+    base_url = 'https://bittrex.com/api/v1.1/public/'
+
+    async def request(self, method, **params):
+        return await self.fetch(urljoin(self.base_url, method), **params)
+
+    def __getattr__(self, item):
+        def method(**kwargs):
+            return self.request(method=item, **kwargs)
+
+        return method
+
+
+class AsyncBittrexJsonRequest(AsyncBittrexRawRequest):
+
+    async def get_response(self, response: aiohttp.ClientResponse):
+        if response.status in [200, 201]:
+            data = json.loads(await response.text(), use_decimal=True)
+            if not data['success']:
+                raise BittrexApiError(data.get('message', ''))
+        else:
+            raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status)
+
+        return data.get('result')
+
+
+class AsyncPoloniexRawRequest(AsyncRawRequest):
+    base_url = 'https://poloniex.com/public'
+
+    async def request(self, **params):
+        return await self.fetch(self.base_url, **params)
+
+    def __getattr__(self, command):
+        def method(**kwargs):
+            return self.request(command=command, **kwargs)
+
+        return method
+
+
+class AsyncPoloniexJsonRequest(AsyncPoloniexRawRequest):
+
+    async def get_response(self, response: aiohttp.ClientResponse):
+        if response.status in [200, 201]:
+            data = json.loads(await response.text(), use_decimal=True)
+            if data.get('error'):
+                raise PoloniexApiError(data['error'])
+        else:
+            raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status)
+
+        return data
+
+
+class AsyncBittrexApiProxy:
+
+    def __init__(self):
+        self.raw = AsyncBittrexRawRequest()
+        self.json = AsyncBittrexJsonRequest()
+        self.currencies = dict()
+        self.markets = dict()
+
+    async def close(self):
+        await asyncio.gather(self.raw.close(), self.json.close())
+
+    @async_cached(ttl=3600)
+    async def get_markets(self):
+        return await self.raw.getmarkets()
+
+    @async_cached(ttl=3600)
+    async def get_currencies(self):
+        return await self.raw.getcurrencies()
+
+    @async_cached(ttl=5)
+    async def get_ticker(self, market):
+        return await self.raw.getticker(market=market)
+
+    @async_cached(ttl=60)
+    async def get_market_summaries(self):
+        return await self.raw.getmarketsummaries()
+
+    @async_cached(ttl=60)
+    async def get_market_summary(self, market):
+        return await self.raw.getmarketsummary(market=market)
+
+    @async_cached(ttl=5)
+    async def get_order_book(self, market, _type='both'):
+        return await self.raw.getorderbook(market=market, type=_type)
+
+    @async_cached(ttl=5)
+    async def get_market_history(self, market):
+        return await self.raw.getmarkethistory(market=market)
+
+    @async_cached(ttl=3600)
+    async def load_currencies(self) -> dict:
+        result = await self.json.getcurrencies()
+        return {
+            item['Currency']: item
+            for item in result
+        }
+
+    @async_cached(ttl=3600)
+    async def load_markets(self) -> dict:
+        result = await self.json.getmarkets()
+        return {
+            item['MarketName']: item
+            for item in result
+        }
+
+    async def refresh(self):
+        self.currencies, self.markets = await asyncio.gather(self.load_currencies(), self.load_markets())
+
+
+class AsyncPoloniexApiProxy:
+
+    def __init__(self):
+        self.raw = AsyncPoloniexRawRequest()
+        self.json = AsyncPoloniexJsonRequest()
+        self.tickers = dict()
+        self.currencies = dict()
+
+    async def close(self):
+        await asyncio.gather(self.raw.close(), self.json.close())
+
+    @async_cached(ttl=5)
+    async def return_ticker(self):
+        return await self.raw.returnTicker()
+
+    @async_cached(ttl=3600)
+    async def return_24h_volume(self):
+        return await self.raw.return24hVolume()
+
+    @async_cached(ttl=5)
+    async def return_order_book(self, currency_pair, depth):
+        return await self.raw.returnOrderBook(
+            currencyPair=currency_pair,
+            depth=depth
+        )
+
+    @async_cached(ttl=5)
+    async def return_trade_history(self, currency_pair, start, end):
+        return await self.raw.returnTradeHistory(
+            currencyPair=currency_pair,
+            start=start,
+            end=end
+        )
+
+    @async_cached(ttl=60)
+    async def return_chart_data(self, currency_pair, start, end, period):
+        return await self.raw.returnChartData(
+            currencyPair=currency_pair,
+            start=start,
+            end=end,
+            period=period
+        )
+
+    @async_cached(ttl=3600)
+    async def return_currencies(self):
+        return await self.raw.returnCurrencies()
+
+    @async_cached(ttl=60)
+    async def return_loan_orders(self, currency):
+        return await self.raw.returnLoanOrders(currency=currency)
+
+    @async_cached(ttl=60)
+    async def load_tickers(self) -> dict:
+        return await self.json.returnTicker()
+
+    @async_cached(ttl=3600)
+    async def load_currencies(self) -> dict:
+        return await self.json.returnCurrencies()
+
+    async def refresh(self):
+        self.tickers, self.currencies = await asyncio.gather(self.load_tickers(), self.load_currencies())
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+
+from core.aio.executor import AsyncExecutor
+from core.scheduler import ExecutionSchedulerParams, MongoLease
+
+logger = logging.getLogger('testex')
+
+
+class AsyncExecutionScheduler:
+
+    def __init__(self, executor=None, interval=ExecutionSchedulerParams.TICK_INTERVAL, lease=None):
+        self.executor = executor  # type: AsyncExecutor
+        self.interval = interval
+        self.lease = lease  # type: MongoLease
+        self.lock = None  # type: asyncio.Lock
+        self.task = None  # type: asyncio.Task
+        self.ticks = 0
+        self.coalesced_ticks = 0
+        self.leased_ticks = 0
+
+    def init_lock(self):
+        # the lock binds to the running loop, which does not exist yet when the app is created
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+
+    async def tick(self) -> bool:
+        self.init_lock()
+        if self.lock.locked():
+            self.coalesced_ticks += 1
+            logger.debug('tick: previous tick is still running, coalesced')
+            return False
+
+        async with self.lock:
+            try:
+                if self.lease and not await self.executor.run_sync(self.lease.acquire):
+                    self.leased_ticks += 1
+                    logger.debug('tick: another process holds the lease, skipped')
+                    return False
+                await self.executor.process()
+                self.ticks += 1
+            except Exception:
+                logger.exception('tick: processing failed')
+
+        return True
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.tick()
+
+    def is_running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def start(self):
+        if self.is_running():
+            return
+
+        self.init_lock()
+        self.task = asyncio.ensure_future(self.run())
+        logger.info('start: ticking every {} seconds'.format(self.interval))
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+            if self.lease:
+                await self.executor.run_sync(self.lease.release)
+            logger.info('stop: {} ticks processed, {} coalesced'.format(self.ticks, self.coalesced_ticks))
@@ -0,0 +1,116 @@
+from functools import partial
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import List
+from uuid import uuid4
+
+from core.helpers import obj_dec_to_fixed, obj_fixed_to_dec, obj_dropna, make_mongo_interval_cond
+from core.schema import Model, Order, Trade, Transaction, Balance
+from core.storage.mongo import AMOUNT_FIELDS, make_update, make_in_cond, with_decimal_codec, as_is
+
+
+class MotorStorage:
+
+    def __init__(self, db: AsyncIOMotorDatabase, fixed_point=False):
+        self.db = with_decimal_codec(db)
+        self.encode = partial(obj_dec_to_fixed, fields=AMOUNT_FIELDS) if fixed_point else as_is
+        self.fixed_point = fixed_point
+
+    def to_model(self, model, document: dict) -> Model:
+        if self.fixed_point:
+            return model.from_document(obj_fixed_to_dec(document, fields=model.__amounts__))
+        return model.from_document(document)
+
+    def to_models(self, model, documents) -> List[Model]:
+        return [self.to_model(model, document) for document in documents]
+
+    async def insert_order(self, order: dict):
+        await self.db.orders.insert_one(dict(self.encode(order)))
+
+    async def update_order(self, api_key, number, inc=None, fields=None, cond=None) -> bool:
+        result = await self.db.orders.update_one(
+            filter=dict(_id=number, api_key=api_key, **self.encode(cond or {})),
+            update=make_update(inc, fields, encode=self.encode)
+        )
+        return result.matched_count > 0
+
+    async def get_order(self, api_key, number) -> dict:
+        order = await self.db.orders.find_one(dict(
+            _id=number,
+            api_key=api_key
+        ))
+        if order:
+            return self.to_model(Order, order)
+
+    async def get_orders(self, api_key=None, status=None, market=None) -> List[dict]:
+        query = dict(
+            api_key=api_key,
+            status=status,
+            market=market
+        )
+        orders = await self.db.orders.find(obj_dropna(query)).sort('created_at').to_list(None)
+        return self.to_models(Order, orders)
+
+    async def insert_trade(self, trade: dict):
+        await self.db.trades.insert_one(dict(self.encode(trade)))
+
+    async def get_trades(self, api_key, order_number=None, market=None, limit=None,
+                         start_at=None, end_at=None) -> List[dict]:
+        query = {'$and': [
+            obj_dropna(dict(
+                api_key=api_key,
+                market=market,
+                order_number=order_number
+            )),
+            *make_mongo_interval_cond('created_at', start_at, end_at)
+        ]}
+        trades = await self.db.trades.find(query).to_list(limit or None)
+        return self.to_models(Trade, trades)
+
+    async def insert_transaction(self, transaction: dict):
+        await self.db.transactions.insert_one(dict(self.encode(transaction)))
+
+    async def update_transaction(self, api_key, number, fields=None):
+        await self.db.transactions.update_one(
+            filter=dict(_id=number, api_key=api_key),
+            update=make_update(fields=fields, encode=self.encode)
+        )
+
+    async def get_transactions(self, api_key=None, _type=None, currency=None, status=None,
+                               start_at=None, end_at=None) -> List[dict]:
+        query = {'$and': [
+            obj_dropna(dict(
+                api_key=api_key,
+                type=_type,
+                currency=currency,
+                status=make_in_cond(status)
+            )),
+            *make_mongo_interval_cond('created_at', start_at, end_at)
+        ]}
+        transactions = await self.db.transactions.find(query).to_list(None)
+        return self.to_models(Transaction, transactions)
+
+    async def get_balances(self, api_key) -> List[dict]:
+        balances = await self.db.balances.find(dict(api_key=api_key)).to_list(None)
+        return self.to_models(Balance, balances)
+
+    async def get_balance(self, api_key, currency) -> dict:
+        balance = await self.db.balances.find_one(dict(
+            api_key=api_key,
+            currency=currency
+        ))
+        if balance:
+            return self.to_model(Balance, balance)
+
+    async def increment_balances(self, api_key, increments: dict):
+        for currency, balance in increments.items():
+            await self.db.balances.update_one(
+                filter=dict(
+                    api_key=api_key,
+                    currency=currency
+                ),
+                update={
+                    '$inc': dict(self.encode(balance)),
+                    '$setOnInsert': {'_id': str(uuid4())}
+                },
+                upsert=True
+            )
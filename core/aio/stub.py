@@ -0,0 +1,354 @@
+from decimal import Decimal
+from itertools import groupby
+from uuid import uuid4
+
+from core.aio.proxy import AsyncBittrexApiProxy, AsyncPoloniexApiProxy
+from core.bittrex.formatters import parse_quantity, parse_rate, parse_uuid, parse_address, format_balance, \
+    format_history_order, format_open_order, format_single_order, format_deposit, format_withdrawal
+from core.bittrex.stub import BittrexApiStub
+from core.bittrex.types import BittrexApiError, BittrexErrorMessage, BittrexParams
+from core.helpers import make_response
+from core.poloniex import formatters as poloniex_formatters
+from core.poloniex.formatters import parse_datetime, format_order, parse_limit, format_trade, \
+    format_order_status, parse_decimal, split_currency_pair, format_resulting_trade
+from core.poloniex.stub import PoloniexApiStub
+from core.poloniex.types import PoloniexApiError, PoloniexErrorMessage, PoloniexParams, PoloniexAccountType
+from core.schema import OrderDirection, OrderStatus, OrderType, TransactionType
+
+
+class AsyncBittrexApiStub(BittrexApiStub):
+
+    def __init__(self, executor=None, nonce_store=None):
+        super(AsyncBittrexApiStub, self).__init__(executor=executor, nonce_store=nonce_store)
+        self.proxy = AsyncBittrexApiProxy()
+
+    @property
+    def currencies(self) -> dict:
+        return self.proxy.currencies
+
+    @property
+    def markets(self) -> dict:
+        return self.proxy.markets
+
+    async def check_balance(self, api_key, amount: Decimal, currency):
+        balance = await self.executor.get_balance(api_key, currency)
+        if amount > balance.get('available', Decimal()):
+            raise BittrexApiError(BittrexErrorMessage.INSUFFICIENT_FUNDS)
+
+    async def send_order(self, api_key, direction, market, quantity: Decimal, rate: Decimal):
+        market = self.parse_market(market)
+        quantity = parse_quantity(quantity)
+        rate = parse_rate(rate)
+
+        base_currency = self.markets[market]['BaseCurrency']
+        market_currency = self.markets[market]['MarketCurrency']
+
+        await self.check_balance(api_key, quantity,
+                                 base_currency if direction == OrderDirection.BUY else market_currency)
+
+        min_trade_size = self.markets[market]['MinTradeSize']
+        if quantity < min_trade_size:
+            raise BittrexApiError(BittrexErrorMessage.MIN_TRADE_REQUIREMENT_NOT_MET)
+
+        if quantity * rate < BittrexParams.MIN_TRADE_TOTAL:
+            raise BittrexApiError(BittrexErrorMessage.DUST_TRADE_DISALLOWED_MIN_VALUE_50K_SAT)
+
+        uuid = str(uuid4())
+        await self.executor.send_order(
+            api_key=api_key,
+            exchange_id=self.__exchange_id__,
+            number=uuid,
+            direction=direction,
+            amount=quantity,
+            price=rate,
+            market=market,
+            base_currency=base_currency,
+            market_currency=market_currency,
+            fee_currency=base_currency
+        )
+        return make_response(dict(uuid=uuid))
+
+    async def cancel(self, api_key, uuid):
+        uuid = parse_uuid(uuid)
+        order = await self.executor.get_order(api_key, uuid)
+        if not order:
+            raise BittrexApiError(BittrexErrorMessage.INVALID_ORDER)
+
+        if order['status'] != OrderStatus.OPENED:
+            raise BittrexApiError(BittrexErrorMessage.ORDER_NOT_OPEN)
+
+        await self.executor.cancel_order(api_key, uuid)
+        return make_response()
+
+    async def get_open_orders(self, api_key, market=None):
+        market = self.parse_market(market, optional=True)
+        orders = await self.executor.get_orders(
+            api_key=api_key,
+            status=OrderStatus.OPENED,
+            market=market
+        )
+        return make_response(list(map(format_open_order, orders)))
+
+    async def get_balances(self, api_key):
+        balances = await self.executor.get_balances(api_key)
+        return make_response(list(map(format_balance, balances)))
+
+    async def get_balance(self, api_key, currency):
+        currency = self.parse_currency(currency)
+        balance = await self.executor.get_balance(api_key, currency)
+        return make_response(format_balance(balance))
+
+    async def withdraw(self, api_key, currency, quantity: Decimal, address, payment_id=None):
+        currency = self.parse_currency(currency)
+        quantity = parse_quantity(quantity)
+        address = parse_address(address, currency)
+
+        await self.check_balance(api_key, quantity, currency)
+
+        uuid = str(uuid4())
+        await self.executor.send_transaction(
+            api_key=api_key,
+            number=uuid,
+            type=TransactionType.WITHDRAWAL,
+            currency=currency,
+            amount=quantity,
+            address=address,
+            fee=self.currencies[currency]['TxFee'],
+            payment_id=payment_id
+        )
+        return make_response(dict(uuid=uuid))
+
+    async def get_order(self, api_key, uuid):
+        uuid = parse_uuid(uuid)
+        order = await self.executor.get_order(
+            api_key=api_key,
+            number=uuid
+        )
+        if not order:
+            raise BittrexApiError(BittrexErrorMessage.INVALID_ORDER)
+
+        return make_response(format_single_order(order))
+
+    async def get_order_history(self, api_key, market=None):
+        market = self.parse_market(market, optional=True)
+        orders = await self.executor.get_orders(
+            api_key=api_key,
+            status=OrderStatus.CLOSED,
+            market=market
+        )
+        return make_response(list(map(format_history_order, orders)))
+
+    async def get_transactions(self, api_key, _type, formatter, currency=None):
+        currency = self.parse_currency(currency, optional=True)
+        transactions = await self.executor.get_transactions(
+            api_key=api_key,
+            _type=_type,
+            currency=currency
+        )
+        return make_response(list(map(formatter, transactions)))
+
+    async def get_withdrawal_history(self, api_key, currency=None):
+        return await self.get_transactions(
+            api_key,
+            _type=TransactionType.WITHDRAWAL,
+            currency=currency,
+            formatter=format_withdrawal
+        )
+
+    async def get_deposit_history(self, api_key, currency=None):
+        return await self.get_transactions(
+            api_key,
+            _type=TransactionType.DEPOSIT,
+            currency=currency,
+            formatter=format_deposit
+        )
+
+
+class AsyncPoloniexApiStub(PoloniexApiStub):
+
+    def __init__(self, executor=None, nonce_store=None):
+        super(AsyncPoloniexApiStub, self).__init__(executor=executor, nonce_store=nonce_store)
+        self.proxy = AsyncPoloniexApiProxy()
+
+    @property
+    def tickers(self) -> dict:
+        return self.proxy.tickers
+
+    @property
+    def currencies(self) -> dict:
+        return self.proxy.currencies
+
+    async def check_balance(self, api_key, amount: Decimal, currency):
+        balance = await self.executor.get_balance(api_key=api_key, currency=currency)
+        if amount > balance.get('available', Decimal()):
+            raise PoloniexApiError(PoloniexErrorMessage.NOT_ENOUGH_CURRENCY.format(currency=currency))
+
+    async def return_balances(self, api_key):
+        result = {
+            currency: Decimal()
+            for currency in self.currencies
+        }
+
+        balances = await self.executor.get_balances(api_key)
+        for item in balances:
+            result[item['currency']] = item.get('available', Decimal())
+
+        return result
+
+    async def return_complete_balances(self, api_key, account):
+        if account and account != PoloniexAccountType.EXCHANGE:
+            raise PoloniexApiError(PoloniexErrorMessage.INVALID_ACCOUNT)
+
+        balances = await self.executor.get_balances(api_key)
+        return {
+            item['currency']: poloniex_formatters.format_balance(item, self.tickers)
+            for item in balances
+        }
+
+    async def return_deposits_withdrawals(self, api_key, start, end):
+        transactions = await self.executor.get_transactions(
+            api_key=api_key,
+            start_at=parse_datetime(start, PoloniexErrorMessage.INVALID_START),
+            end_at=parse_datetime(end, PoloniexErrorMessage.INVALID_END)
+        )
+
+        deposits = filter(lambda x: x['type'] == TransactionType.DEPOSIT, transactions)
+        withdrawals = filter(lambda x: x['type'] == TransactionType.WITHDRAWAL, transactions)
+
+        return dict(
+            deposits=list(map(poloniex_formatters.format_deposit, deposits)),
+            withdrawals=list(map(poloniex_formatters.format_withdrawal, withdrawals))
+        )
+
+    async def return_open_orders(self, api_key, currency_pair):
+        currency_pair = self.parse_currency_pair(currency_pair)
+        orders = await self.executor.get_orders(
+            api_key=api_key,
+            status=OrderStatus.OPENED,
+            market=currency_pair
+        )
+
+        if currency_pair:
+            return list(map(format_order, orders))
+
+        return {
+            market: list(map(format_order, g))
+            for market, g in groupby(orders, key=lambda x: x['market'])
+        }
+
+    async def return_account_trade_history(self, api_key, currency_pair, start, end, limit):
+        currency_pair = self.parse_currency_pair(currency_pair)
+        trades = await self.executor.get_trades(
+            api_key=api_key,
+            limit=parse_limit(limit),
+            market=currency_pair,
+            start_at=parse_datetime(start, PoloniexErrorMessage.INVALID_START),
+            end_at=parse_datetime(end, PoloniexErrorMessage.INVALID_END)
+        )
+
+        if currency_pair:
+            return list(map(format_trade, trades))
+
+        return {
+            market: list(map(format_trade, g))
+            for market, g in groupby(trades, key=lambda x: x['market'])
+        }
+
+    async def return_order_trades(self, api_key, order_number):
+        trades = await self.executor.get_trades(
+            api_key=api_key,
+            order_number=order_number
+        )
+        return list(map(format_trade, trades))
+
+    async def get_order(self, api_key, order_number):
+        if not order_number:
+            raise PoloniexApiError(PoloniexErrorMessage.REQUIRED_PARAMETER_MISSING)
+
+        try:
+            order_number = int(order_number)
+        except TypeError:
+            raise PoloniexApiError(PoloniexErrorMessage.INVALID_ORDER_NUMBER)
+
+        order = await self.executor.get_order(api_key, order_number)
+        if not order:
+            raise PoloniexApiError(PoloniexErrorMessage.ORDER_NOT_FOUND)
+
+        return order
+
+    async def return_order_status(self, api_key, order_number):
+        order = await self.get_order(api_key, order_number)
+        if order['status'] == OrderStatus.OPENED:
+            return dict(
+                result={order_number: format_order_status(order)},
+                success=1
+            )
+        return dict(success=0)
+
+    async def send_order(self, api_key, direction, currency_pair, rate, amount,
+                         fill_or_kill=None, immediate_or_cancel=None, post_only=None):
+        number = self.get_number()
+        price = parse_decimal(rate, PoloniexErrorMessage.INVALID_RATE)
+        amount = parse_decimal(amount, PoloniexErrorMessage.INVALID_AMOUNT)
+        market = self.parse_currency_pair(currency_pair)
+
+        if price * amount < PoloniexParams.MIN_TRADE_TOTAL:
+            raise PoloniexApiError(PoloniexErrorMessage.TOTAL_TOO_SMALL)
+
+        base_currency, market_currency = split_currency_pair(market)
+        await self.check_balance(api_key, amount,
+                                 base_currency if direction == OrderDirection.BUY else market_currency)
+
+        order = await self.executor.send_order(
+            api_key=api_key,
+            exchange_id=self.__exchange_id__,
+            number=number,
+            direction=direction,
+            market=market,
+            price=price,
+            amount=amount,
+            type=OrderType.init(fill_or_kill, immediate_or_cancel, post_only),
+            base_currency=base_currency,
+            market_currency=market_currency,
+            fee_currency=base_currency if direction == OrderDirection.SELL else market_currency
+        )
+        return dict(
+            orderNumber=number,
+            resultingTrades=list(map(format_resulting_trade, order.get('resulting_trades', [])))
+        )
+
+    async def cancel_order(self, api_key, order_number):
+        order = await self.get_order(api_key, order_number)
+        if order['status'] != OrderStatus.OPENED:
+            raise PoloniexApiError(PoloniexErrorMessage.ORDER_NOT_FOUND)
+
+        order = await self.executor.cancel_order(api_key, order_number)
+        return dict(
+            amount=order['remaining_amount'],
+            message='Order #{} canceled.'.format(order_number),
+            success=1
+        )
+
+    async def withdraw(self, api_key, currency, amount, address, payment_id=None):
+        currency = self.parse_currency(currency)
+        amount = parse_decimal(amount, PoloniexErrorMessage.INVALID_AMOUNT)
+        await self.check_balance(api_key, amount, currency)
+
+        await self.executor.send_transaction(
+            api_key=api_key,
+            exchange_id=self.__exchange_id__,
+            number=self.get_number(),
+            type=TransactionType.WITHDRAWAL,
+            currency=currency,
+            amount=amount,
+            address=poloniex_formatters.parse_address(address, currency),
+            payment_id=payment_id
+        )
+        return dict(response='Withdrew {} {}.'.format(amount, currency))
+
+    async def return_available_account_balances(self, api_key, account=None):
+        if account:
+            if account != 'exchange':
+                raise NotImplementedError
+            return await self.return_balances(api_key)
+        return dict(exchange=await self.return_balances(api_key))
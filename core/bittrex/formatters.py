@@ -1,7 +1,7 @@
 from decimal import Decimal, InvalidOperation
 from uuid import UUID
 
-from core.bittrex.types import BittrexApiError, BittrexErrorMessage, BittrexOrderType
+from core.bittrex.types import BittrexApiError, BittrexErrorMessage, BittrexOrderType, BittrexParams
 from core.schema import OrderStatus, TransactionStatus
 from core.helpers import is_address_valid
 
@@ -181,3 +181,15 @@ def format_withdrawal(transaction: dict) -> dict:
         'TxId': transaction.get('hash')
     }
     return result
+
+
+def format_public_trade(trade: dict) -> dict:
+    return {
+        'Id': UUID(trade['_id']).int % 4294967296,
+        'TimeStamp': format_datetime(trade['created_at']),
+        'Quantity': trade['amount'],
+        'Price': trade['price'],
+        'Total': (trade['price'] * trade['amount']).quantize(BittrexParams.DECIMAL_SCALE),
+        'FillType': 'FILL',
+        'OrderType': trade['direction'].upper()
+    }
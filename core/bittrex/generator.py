@@ -0,0 +1,160 @@
+from datetime import datetime
+from decimal import Decimal
+
+from core.bittrex.formatters import format_datetime
+from core.bittrex.stub import BittrexApiStub
+from core.bittrex.types import BittrexApiError, BittrexErrorMessage
+from core.generator import GeneratorParams, MarketGenerator, RenderCache
+from core.helpers import make_response
+
+
+def get_market_name(base, quote):
+    return '{}-{}'.format(base, quote)
+
+
+class BittrexGeneratorStub(BittrexApiStub):
+
+    def __init__(self, generator: MarketGenerator, *args, **kwargs):
+        super(BittrexGeneratorStub, self).__init__(*args, **kwargs)
+        self.generator = generator
+        self.rendered = RenderCache(generator)
+        self.market_names = [get_market_name(base, quote) for base, quote in generator.names]
+        self.market_index = {name: i for i, name in enumerate(self.market_names)}
+        created = format_datetime(generator.created_at)
+        self.generated_markets = {
+            get_market_name(base, quote): {
+                'MarketCurrency': quote,
+                'BaseCurrency': base,
+                'MarketCurrencyLong': GeneratorParams.CURRENCIES.get(quote, (quote,))[0],
+                'BaseCurrencyLong': GeneratorParams.CURRENCIES.get(base, (base,))[0],
+                'MinTradeSize': Decimal('0.00000001'),
+                'MarketName': get_market_name(base, quote),
+                'IsActive': True,
+                'Created': created,
+                'Notice': None,
+                'IsSponsored': None,
+                'LogoUrl': None
+            }
+            for base, quote in generator.names
+        }
+        self.generated_currencies = {
+            currency: {
+                'Currency': currency,
+                'CurrencyLong': GeneratorParams.CURRENCIES.get(currency, (currency,))[0],
+                'MinConfirmation': 1,
+                'TxFee': Decimal(str(GeneratorParams.CURRENCIES.get(currency, (currency, 0.))[1])),
+                'IsActive': True,
+                'CoinType': 'BITCOIN',
+                'BaseAddress': None,
+                'Notice': None
+            }
+            for currency in generator.currencies
+        }
+
+    @property
+    def markets(self) -> dict:
+        return self.generated_markets
+
+    @property
+    def currencies(self) -> dict:
+        return self.generated_currencies
+
+    def format_summaries(self, indices) -> list:
+        summaries = self.generator.get_summaries()
+        columns = {key: value[indices].round(8).tolist() for key, value in summaries.items()}
+        timestamp = format_datetime(datetime.utcfromtimestamp(self.generator.updated_at))
+        return [
+            {
+                'MarketName': self.market_names[index],
+                'High': columns['high'][i],
+                'Low': columns['low'][i],
+                'Volume': columns['volume'][i],
+                'Last': columns['last'][i],
+                'BaseVolume': columns['base_volume'][i],
+                'TimeStamp': timestamp,
+                'Bid': columns['bid'][i],
+                'Ask': columns['ask'][i],
+                'OpenBuyOrders': GeneratorParams.DEPTH,
+                'OpenSellOrders': GeneratorParams.DEPTH,
+                'PrevDay': columns['prev_day'][i],
+                'Created': self.generated_markets[self.market_names[index]]['Created']
+            }
+            for i, index in enumerate(indices)
+        ]
+
+    def format_side(self, rates, quantities) -> list:
+        return [
+            {'Quantity': quantity, 'Rate': rate}
+            for rate, quantity in zip(rates.round(8).tolist(), quantities.round(8).tolist())
+        ]
+
+    def get_markets(self):
+        return self.rendered.get('getmarkets', lambda: make_response(list(self.markets.values())))
+
+    def get_currencies(self):
+        return self.rendered.get('getcurrencies', lambda: make_response(list(self.currencies.values())))
+
+    def get_ticker(self, market):
+        try:
+            index = self.market_index[self.parse_market(market)]
+        except BittrexApiError as e:
+            return e.get_response()
+
+        def build():
+            summary = self.format_summaries([index])[0]
+            return make_response(dict(Bid=summary['Bid'], Ask=summary['Ask'], Last=summary['Last']))
+
+        return self.rendered.get(('getticker', index), build)
+
+    def get_market_summaries(self):
+        return self.rendered.get('getmarketsummaries', lambda: make_response(
+            self.format_summaries(list(range(len(self.market_names))))
+        ))
+
+    def get_market_summary(self, market):
+        try:
+            index = self.market_index[self.parse_market(market)]
+        except BittrexApiError as e:
+            return e.get_response()
+
+        return self.rendered.get(('getmarketsummary', index), lambda: make_response(
+            self.format_summaries([index])
+        ))
+
+    def get_order_book(self, market, _type='both'):
+        try:
+            index = self.market_index[self.parse_market(market)]
+        except BittrexApiError as e:
+            return e.get_response()
+        _type = _type or 'both'
+        if _type not in ['both', 'buy', 'sell']:
+            return BittrexApiError(BittrexErrorMessage.TYPE_INVALID).get_response()
+
+        def build():
+            bids, bid_quantities, asks, ask_quantities = self.generator.get_order_book(index)
+            book = dict(buy=self.format_side(bids, bid_quantities), sell=self.format_side(asks, ask_quantities))
+            return make_response(book if _type == 'both' else book[_type])
+
+        return self.rendered.get(('getorderbook', index, _type), build)
+
+    def get_market_history(self, market):
+        try:
+            index = self.market_index[self.parse_market(market)]
+        except BittrexApiError as e:
+            return e.get_response()
+
+        def build():
+            return make_response([
+                {
+                    'Id': trade_id,
+                    'TimeStamp': format_datetime(datetime.utcfromtimestamp(timestamp)),
+                    'Quantity': round(quantity, 8),
+                    'Price': round(price, 8),
+                    'Total': round(price * quantity, 8),
+                    'FillType': 'FILL',
+                    'OrderType': 'BUY' if is_buy else 'SELL'
+                }
+                for trade_id, timestamp, price, quantity, is_buy in self.generator.get_trades(index)
+            ])
+
+        return self.rendered.get(('getmarkethistory', index), build)
@@ -1,25 +1,28 @@
 import requests
-import simplejson as json
-from cachetools import TTLCache, cached
+from functools import partial
 from urllib.parse import urljoin
 
 from core.bittrex.types import BittrexApiError, BittrexErrorMessage
+from core.breaker import CircuitBreakerParams, guarded_call, last_known_good, make_key
+from core.cache import swr_cached
 from core.helpers import obj_dropna
+from core.http import upstream
+from core.payload import Payload, parse_payload
 
 
 class BittrexRawRequest:
     base_url = 'https://bittrex.com/api/v1.1/public/'
 
-    def get_response(self, response: requests.Response):
-        return response
+    def get_response(self, payload: Payload):
+        return payload
 
     def request(self, method, **params):
-        res = requests.get(
+        res = upstream.get(
             url=urljoin(self.base_url, method),
             headers={'content-Type': 'application/json'},
             params=obj_dropna(params)
         )
-        return self.get_response(res)
+        return self.get_response(Payload.from_response(res))
 
     def __getattr__(self, item):
         def method(**kwargs):
@@ -29,14 +32,26 @@ class BittrexRawRequest:
 
 
 class BittrexJsonRequest(BittrexRawRequest):
+    failure_thresholds = dict(getmarkets=2, getcurrencies=2)
 
-    def get_response(self, response: requests.Response):
-        if response.status_code in [200, 201]:
-            data = json.loads(response.text, use_decimal=True)
+    def seed(self, method, result):
+        last_known_good.set(make_key(urljoin(self.base_url, method), dict()), result, persist=False)
+
+    def request(self, method, **params):
+        return guarded_call(
+            endpoint=urljoin(self.base_url, method),
+            func=partial(super(BittrexJsonRequest, self).request, method),
+            params=params,
+            failure_threshold=self.failure_thresholds.get(method, CircuitBreakerParams.FAILURE_THRESHOLD)
+        )
+
+    def get_response(self, payload: Payload):
+        if payload.status_code in [200, 201]:
+            data = parse_payload(payload)
             if not data['success']:
                 raise BittrexApiError(data.get('message', ''))
         else:
-            raise requests.HTTPError(response=response)
+            raise requests.HTTPError('{} upstream response'.format(payload.status_code))
 
         return data.get('result')
 
@@ -47,36 +62,36 @@ class BittrexApiProxy:
         self.raw = BittrexRawRequest()
         self.json = BittrexJsonRequest()
 
-    @cached(TTLCache(ttl=3600, maxsize=128))
+    @swr_cached(soft_ttl=3600, hard_ttl=86400)
     def get_markets(self):
         return self.raw.getmarkets()
 
-    @cached(TTLCache(ttl=3600, maxsize=128))
+    @swr_cached(soft_ttl=3600, hard_ttl=86400)
     def get_currencies(self):
         return self.raw.getcurrencies()
 
-    @cached(TTLCache(ttl=5, maxsize=128))
+    @swr_cached(soft_ttl=5, hard_ttl=60)
     def get_ticker(self, market):
         return self.raw.getticker(market=market)
 
-    @cached(TTLCache(ttl=60, maxsize=128))
+    @swr_cached(soft_ttl=60, hard_ttl=600)
     def get_market_summaries(self):
         return self.raw.getmarketsummaries()
 
-    @cached(TTLCache(ttl=60, maxsize=128))
+    @swr_cached(soft_ttl=60, hard_ttl=600)
     def get_market_summary(self, market):
         return self.raw.getmarketsummary(market=market)
 
-    @cached(TTLCache(ttl=5, maxsize=128))
+    @swr_cached(soft_ttl=5, hard_ttl=60)
     def get_order_book(self, market, _type='both'):
         return self.raw.getorderbook(market=market, type=_type)
 
-    @cached(TTLCache(ttl=5, maxsize=128))
+    @swr_cached(soft_ttl=5, hard_ttl=60)
     def get_market_history(self, market):
         return self.raw.getmarkethistory(market=market)
 
     @property
-    @cached(TTLCache(ttl=3600, maxsize=128))
+    @swr_cached(soft_ttl=3600, hard_ttl=86400)
     def currencies(self) -> dict:
         result = self.json.getcurrencies()
         return {
@@ -85,7 +100,7 @@ class BittrexApiProxy:
         }
 
     @property
-    @cached(TTLCache(ttl=3600, maxsize=128))
+    @swr_cached(soft_ttl=3600, hard_ttl=86400)
     def markets(self) -> dict:
         result = self.json.getmarkets()
         return {
@@ -93,6 +108,24 @@ class BittrexApiProxy:
             for item in result
         }
 
+    def export_bundle(self) -> dict:
+        return dict(
+            markets=self.json.getmarkets(),
+            currencies=self.json.getcurrencies()
+        )
+
+    def prewarm(self, bundle: dict):
+        self.json.seed('getmarkets', bundle['markets'])
+        self.json.seed('getcurrencies', bundle['currencies'])
+        BittrexApiProxy.markets.fget.prime(self, value={
+            item['MarketName']: item
+            for item in bundle['markets']
+        }, stale=True)
+        BittrexApiProxy.currencies.fget.prime(self, value={
+            item['Currency']: item
+            for item in bundle['currencies']
+        }, stale=True)
+
     def parse_market(self, market, optional=False):
         if not market:
             if optional:
@@ -1,29 +1,89 @@
+import logging
+import requests
 from decimal import Decimal
 from uuid import uuid4
 
 from core.helpers import sign_message, make_response
-from core.schema import Executor, OrderDirection, OrderStatus, TransactionType, CustomLogicMixin
+from core.depth import DepthBook, merge_levels
+from core.nonces import MemoryNonceStore
+from core.payload import parse_payload
+from core.tape import TradeTape, merge_trades
+from core.schema import Executor, OrderDirection, OrderStatus, TransactionType, CustomLogicMixin, Order, NonceStore
 from core.bittrex.proxy import BittrexApiProxy
 from core.bittrex.types import BittrexApiError, BittrexErrorMessage, BittrexParams
 from core.bittrex.formatters import parse_quantity, parse_rate, parse_uuid, parse_address, format_balance, \
-    format_history_order, format_open_order, format_single_order, format_deposit, format_withdrawal
+    format_history_order, format_open_order, format_single_order, format_deposit, format_withdrawal, \
+    format_public_trade
+
+logger = logging.getLogger('testex')
 
 
 class BittrexApiStub(BittrexApiProxy, CustomLogicMixin):
     __exchange_id__ = 'bittrex'
 
-    def __init__(self, executor=None, *args, **kwargs):
+    def __init__(self, executor=None, nonce_store=None, *args, **kwargs):
         super(BittrexApiStub, self).__init__(*args, **kwargs)
-        self.api_key = kwargs.get('api_key')
         self.executor = None  # type: Executor
+        self.nonce_store = nonce_store or MemoryNonceStore()  # type: NonceStore
+        self.tape = TradeTape(self.__exchange_id__)
+        self.depth_book = DepthBook(self.__exchange_id__)
         if executor:
             self.init_executor(executor)
 
     def init_executor(self, executor):
         self.executor = executor
         self.executor.register_custom_logic(self)
-
-    def switch_user(self, url, nonce, api_key, api_sign):
+        self.executor.register_listener(self.tape)
+        self.executor.register_listener(self.depth_book)
+
+    def get_market_history(self, market):
+        if not self.tape.has_market(market):
+            return super(BittrexApiStub, self).get_market_history(market)
+
+        upstream = list()
+        try:
+            payload = super(BittrexApiStub, self).get_market_history(market)
+        except requests.RequestException as e:
+            logger.warning('get_market_history: serving local trades only: {}'.format(e))
+        else:
+            data = parse_payload(payload) if payload.status_code == 200 else dict()
+            if data.get('success') and data.get('result'):
+                upstream = data['result']
+
+        trades = self.tape.get_trades(market, limit=BittrexParams.MARKET_HISTORY_LIMIT)
+        return make_response(merge_trades(
+            upstream=upstream,
+            local=list(map(format_public_trade, trades)),
+            key=lambda trade: trade['TimeStamp'],
+            limit=BittrexParams.MARKET_HISTORY_LIMIT
+        ))
+
+    def merge_order_book_side(self, market, direction, levels: list) -> list:
+        upstream = [(level['Rate'], level['Quantity']) for level in levels]
+        depth = max(len(upstream), BittrexParams.ORDER_BOOK_DEPTH)
+        local = self.depth_book.get_levels(market, direction, depth)
+        return [
+            dict(Quantity=quantity, Rate=rate)
+            for rate, quantity in merge_levels(upstream, local, direction == OrderDirection.BUY, depth)
+        ]
+
+    def get_order_book(self, market, _type='both'):
+        payload = super(BittrexApiStub, self).get_order_book(market, _type)
+        if not self.depth_book.has_market(market) or payload.status_code != 200:
+            return payload
+
+        data = parse_payload(payload)
+        if not data.get('success') or data.get('result') is None:
+            return payload
+
+        if _type in [OrderDirection.BUY, OrderDirection.SELL]:
+            return make_response(self.merge_order_book_side(market, _type, data['result']))
+        return make_response(dict(
+            buy=self.merge_order_book_side(market, OrderDirection.BUY, data['result']['buy']),
+            sell=self.merge_order_book_side(market, OrderDirection.SELL, data['result']['sell'])
+        ))
+
+    def authenticate(self, url, nonce, api_key, api_sign):
         if not nonce:
             raise BittrexApiError(BittrexErrorMessage.NONCE_NOT_PROVIDED)
         if not api_key:
@@ -36,35 +96,37 @@ class BittrexApiStub(BittrexApiProxy, CustomLogicMixin):
         if valid_sign != api_sign:
             raise BittrexApiError(BittrexErrorMessage.INVALID_SIGNATURE)
 
-        self.api_key = api_key
+        try:
+            nonce = int(nonce)
+        except ValueError:
+            raise BittrexApiError(BittrexErrorMessage.NONCE_INVALID)
+        if nonce <= self.nonce_store.check_and_set(api_key, nonce):
+            raise BittrexApiError(BittrexErrorMessage.NONCE_USED)
 
-    def extend_order(self, order: dict) -> dict:
-        order = order.copy()
+        return api_key
 
-        order['executed_amount'] = order.get('executed_amount', Decimal())
-        order['total'] = (order['executed_amount'] * order.get('average_price', Decimal()))\
+    def calc_order_fields(self, order: Order):
+        order.total = (order['executed_amount'] * order.get('average_price', Decimal()))\
             .quantize(BittrexParams.DECIMAL_SCALE)
-        order['fee'] = (order['total'] * BittrexParams.TRADE_FEE_PCT)\
+        order.fee = (order.total * BittrexParams.TRADE_FEE_PCT)\
             .quantize(BittrexParams.DECIMAL_SCALE)
-        order['remaining_amount'] = order['amount'] - order['executed_amount']
+        order.remaining_amount = order['amount'] - order['executed_amount']
 
         if order['direction'] == OrderDirection.BUY:
-            order['reserved'] = (order['amount'] * order['price'])\
+            order.reserved = (order['amount'] * order['price'])\
                 .quantize(BittrexParams.DECIMAL_SCALE)
-            order['reserved_fee'] = (order['reserved'] * BittrexParams.TRADE_FEE_PCT)\
+            order.reserved_fee = (order.reserved * BittrexParams.TRADE_FEE_PCT)\
                 .quantize(BittrexParams.DECIMAL_SCALE)
         else:
-            order['reserved'] = order['amount']
-            order['reserved_fee'] = Decimal()
-
-        return order
+            order.reserved = order['amount']
+            order.reserved_fee = Decimal()
 
-    def check_balance(self, amount: Decimal, currency):
-        balance = self.get_balance(currency)
+    def check_balance(self, api_key, amount: Decimal, currency):
+        balance = self.get_balance(api_key, currency)
         if amount > balance.get('available', Decimal()):
             raise BittrexApiError(BittrexErrorMessage.INSUFFICIENT_FUNDS)
 
-    def send_order(self, direction, market, quantity: Decimal, rate: Decimal):
+    def send_order(self, api_key, direction, market, quantity: Decimal, rate: Decimal):
         market = self.parse_market(market)
         quantity = parse_quantity(quantity)
         rate = parse_rate(rate)
@@ -72,7 +134,7 @@ class BittrexApiStub(BittrexApiProxy, CustomLogicMixin):
         base_currency = self.markets[market]['BaseCurrency']
         market_currency = self.markets[market]['MarketCurrency']
 
-        self.check_balance(quantity, base_currency if direction == OrderDirection.BUY else market_currency)
+        self.check_balance(api_key, quantity, base_currency if direction == OrderDirection.BUY else market_currency)
 
         min_trade_size = self.markets[market]['MinTradeSize']
         if quantity < min_trade_size:
@@ -84,7 +146,7 @@ class BittrexApiStub(BittrexApiProxy, CustomLogicMixin):
         uuid = str(uuid4())
         # TODO: connection reset here (with prob)
         self.executor.send_order(
-            api_key=self.api_key,
+            api_key=api_key,
             exchange_id=self.__exchange_id__,
             number=uuid,
             direction=direction,
@@ -98,53 +160,50 @@ class BittrexApiStub(BittrexApiProxy, CustomLogicMixin):
         # TODO: and here (with prob too)
         return make_response(dict(uuid=uuid))
 
-    def cancel(self, uuid):
+    def cancel(self, api_key, uuid):
         uuid = parse_uuid(uuid)
-        order = self.executor.get_order(self.api_key, uuid)
+        order = self.executor.get_order(api_key, uuid)
         if not order:
             raise BittrexApiError(BittrexErrorMessage.INVALID_ORDER)
 
         if order['status'] != OrderStatus.OPENED:
             raise BittrexApiError(BittrexErrorMessage.ORDER_NOT_OPEN)
 
-        self.executor.cancel_order(self.api_key, uuid)
+        self.executor.cancel_order(api_key, uuid)
         return make_response()
 
-    def get_open_orders(self, market=None):
+    def get_open_orders(self, api_key, market=None):
         market = self.parse_market(market, optional=True)
         orders = self.executor.get_orders(
-            api_key=self.api_key,
+            api_key=api_key,
             status=OrderStatus.OPENED,
             market=market
         )
-        return make_response(list(map(
-            lambda x: format_open_order(self.extend_order(x)),
-            orders
-        )))
+        return make_response(list(map(format_open_order, orders)))
 
-    def get_balances(self):
-        balances = self.executor.get_balances(self.api_key)
+    def get_balances(self, api_key):
+        balances = self.executor.get_balances(api_key)
         return make_response(list(map(format_balance, balances)))
 
-    def get_balance(self, currency):
+    def get_balance(self, api_key, currency):
         currency = self.parse_currency(currency)
-        balance = self.executor.get_balance(self.api_key, currency)
+        balance = self.executor.get_balance(api_key, currency)
         return make_response(format_balance(balance))
 
-    def get_deposit_address(self, currency):
+    def get_deposit_address(self, api_key, currency):
         self.parse_currency(currency)
         raise BittrexApiError(BittrexErrorMessage.ADDRESS_GENERATING)  # TODO: testnet wallet
 
-    def withdraw(self, currency, quantity: Decimal, address, payment_id=None):
+    def withdraw(self, api_key, currency, quantity: Decimal, address, payment_id=None):
         currency = self.parse_currency(currency)
         quantity = parse_quantity(quantity)
         address = parse_address(address, currency)
 
-        self.check_balance(quantity, currency)
+        self.check_balance(api_key, quantity, currency)
 
         uuid = str(uuid4())
         self.executor.send_transaction(
-            api_key=self.api_key,
+            api_key=api_key,
             number=uuid,
             type=TransactionType.WITHDRAWAL,
             currency=currency,
@@ -155,47 +214,46 @@ class BittrexApiStub(BittrexApiProxy, CustomLogicMixin):
         )
         return make_response(dict(uuid=uuid))
 
-    def get_order(self, uuid):
+    def get_order(self, api_key, uuid):
         uuid = parse_uuid(uuid)
         order = self.executor.get_order(
-            api_key=self.api_key,
+            api_key=api_key,
             number=uuid
         )
         if not order:
             raise BittrexApiError(BittrexErrorMessage.INVALID_ORDER)
 
-        return make_response(format_single_order(self.extend_order(order)))
+        return make_response(format_single_order(order))
 
-    def get_order_history(self, market=None):
+    def get_order_history(self, api_key, market=None):
         market = self.parse_market(market, optional=True)
         orders = self.executor.get_orders(
-            api_key=self.api_key,
+            api_key=api_key,
             status=OrderStatus.CLOSED,
             market=market
         )
-        return make_response(list(map(
-            lambda x: format_history_order(self.extend_order(x)),
-            orders
-        )))
+        return make_response(list(map(format_history_order, orders)))
 
-    def get_transactions(self, _type, formatter, currency=None):
+    def get_transactions(self, api_key, _type, formatter, currency=None):
         currency = self.parse_currency(currency, optional=True)
         transactions = self.executor.get_transactions(
-            api_key=self.api_key,
+            api_key=api_key,
             _type=_type,
             currency=currency
         )
         return make_response(list(map(formatter, transactions)))
 
-    def get_withdrawal_history(self, currency=None):
+    def get_withdrawal_history(self, api_key, currency=None):
         return self.get_transactions(
+            api_key,
             _type=TransactionType.WITHDRAWAL,
             currency=currency,
             formatter=format_withdrawal
         )
 
-    def get_deposit_history(self, currency=None):
+    def get_deposit_history(self, api_key, currency=None):
         return self.get_transactions(
+            api_key,
             _type=TransactionType.DEPOSIT,
             currency=currency,
             formatter=format_deposit
@@ -7,12 +7,16 @@ class BittrexParams:
     MIN_TRADE_TOTAL = Decimal('0.001')  # BTC
     TRADE_FEE_PCT = Decimal('0.0025')
     DECIMAL_SCALE = Decimal('0.00000001')
+    MARKET_HISTORY_LIMIT = 100
+    ORDER_BOOK_DEPTH = 50
 
 
 class BittrexErrorMessage:
     MARKET_NOT_PROVIDED = 'MARKET_NOT_PROVIDED'
     CURRENCY_NOT_PROVIDED = 'CURRENCY_NOT_PROVIDED'
     NONCE_NOT_PROVIDED = 'NONCE_NOT_PROVIDED'
+    NONCE_INVALID = 'NONCE_INVALID'
+    NONCE_USED = 'NONCE_USED'
     APIKEY_NOT_PROVIDED = 'APIKEY_NOT_PROVIDED'
     APISIGN_NOT_PROVIDED = 'APISIGN_NOT_PROVIDED'
     RATE_NOT_PROVIDED = 'RATE_NOT_PROVIDED'
@@ -21,6 +25,7 @@ class BittrexErrorMessage:
     INVALID_SIGNATURE = 'INVALID_SIGNATURE'
     INVALID_MARKET = 'INVALID_MARKET'
     INVALID_CURRENCY = 'INVALID_CURRENCY'
+    TYPE_INVALID = 'TYPE_INVALID'
     QUANTITY_INVALID = 'QUANTITY_INVALID'
     RATE_INVALID = 'RATE_INVALID'
     MIN_TRADE_REQUIREMENT_NOT_MET = 'MIN_TRADE_REQUIREMENT_NOT_MET'
@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+import requests
+from typing import Dict
+
+from core import cache
+
+logger = logging.getLogger('testex')
+
+
+class CircuitBreakerParams:
+    FAILURE_THRESHOLD = 3  # consecutive failures
+    RESET_TIMEOUT = 30.  # seconds
+
+
+class CircuitState:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(requests.RequestException):
+    pass
+
+
+class CircuitBreaker:
+
+    def __init__(self, name, failure_threshold=CircuitBreakerParams.FAILURE_THRESHOLD,
+                 reset_timeout=CircuitBreakerParams.RESET_TIMEOUT, timer=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.timer = timer
+        self.lock = threading.Lock()
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+
+    def before_call(self):
+        with self.lock:
+            if self.state == CircuitState.CLOSED:
+                return
+            if self.state == CircuitState.OPEN and self.timer() - self.opened_at >= self.reset_timeout:
+                self.state = CircuitState.HALF_OPEN
+                logger.info('before_call: {} half-open, probing upstream'.format(self.name))
+                return
+            self.rejected += 1
+            raise CircuitOpenError('{} circuit is open'.format(self.name))
+
+    def on_success(self):
+        with self.lock:
+            if self.state != CircuitState.CLOSED:
+                logger.info('on_success: {} closed'.format(self.name))
+            self.state = CircuitState.CLOSED
+            self.failures = 0
+
+    def on_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != CircuitState.OPEN:
+                    logger.warning('on_failure: {} opened after {} failures'.format(self.name, self.failures))
+                self.state = CircuitState.OPEN
+                self.opened_at = self.timer()
+
+    def on_error(self):
+        with self.lock:
+            if self.state == CircuitState.HALF_OPEN:
+                logger.warning('on_error: {} probe failed unexpectedly, reopened'.format(self.name))
+                self.state = CircuitState.OPEN
+                self.opened_at = self.timer()
+
+    def call(self, func, *args, **kwargs):
+        self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except requests.RequestException:
+            self.on_failure()
+            raise
+        except BaseException:
+            self.on_error()
+            raise
+        self.on_success()
+        return result
+
+    def get_stats(self) -> dict:
+        return dict(
+            state=self.state,
+            failures=self.failures,
+            rejected=self.rejected
+        )
+
+
+class LastKnownGood:
+
+    def __init__(self):
+        self.values = dict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.values.get(key)
+        if value is None and cache.store is not None:
+            entry = cache.store.get('lkg:' + key, max_age=float('inf'))
+            if entry is not None:
+                value = entry[0]
+        return value
+
+    def set(self, key, value, persist=True):
+        with self.lock:
+            self.values[key] = value
+        if persist and cache.store is not None:
+            cache.store.set('lkg:' + key, value)
+
+
+breakers = dict()  # type: Dict[str, CircuitBreaker]
+breakers_lock = threading.Lock()
+last_known_good = LastKnownGood()
+
+
+def get_breaker(name, failure_threshold=CircuitBreakerParams.FAILURE_THRESHOLD) -> CircuitBreaker:
+    with breakers_lock:
+        if name not in breakers:
+            breakers[name] = CircuitBreaker(name, failure_threshold=failure_threshold)
+        return breakers[name]
+
+
+def make_key(endpoint, params: dict) -> str:
+    return repr((endpoint, sorted(params.items())))
+
+
+def guarded_call(endpoint, func, params: dict, failure_threshold=CircuitBreakerParams.FAILURE_THRESHOLD):
+    key = make_key(endpoint, params)
+    try:
+        result = get_breaker(endpoint, failure_threshold).call(func, **params)
+    except requests.RequestException as e:
+        fallback = last_known_good.get(key)
+        if fallback is None:
+            raise
+        logger.warning('guarded_call: {} failed, serving last known good: {}'.format(endpoint, e))
+        return fallback
+
+    last_known_good.set(key, result)
+    return result
+
+
+def get_breaker_stats() -> dict:
+    with breakers_lock:
+        return {name: breaker.get_stats() for name, breaker in breakers.items()}
@@ -0,0 +1,54 @@
+import logging
+import os
+import simplejson as json
+from datetime import datetime
+
+from core.bittrex.proxy import BittrexApiProxy
+from core.poloniex.proxy import PoloniexApiProxy
+
+logger = logging.getLogger('testex')
+
+
+class BundleParams:
+    VERSION = 1
+
+
+def make_bundle(bittrex: BittrexApiProxy, poloniex: PoloniexApiProxy) -> dict:
+    return dict(
+        version=BundleParams.VERSION,
+        created_at=datetime.utcnow().isoformat(),
+        bittrex=bittrex.export_bundle(),
+        poloniex=poloniex.export_bundle()
+    )
+
+
+def save_bundle(bundle: dict, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    temp_path = '{}.tmp'.format(path)
+    with open(temp_path, 'w') as file:
+        json.dump(bundle, file, use_decimal=True, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+    logger.info('save_bundle: {} saved'.format(path))
+
+
+def load_bundle(path) -> dict:
+    if not path or not os.path.exists(path):
+        return None
+
+    with open(path) as file:
+        bundle = json.load(file, use_decimal=True)
+
+    if bundle.get('version') != BundleParams.VERSION:
+        logger.warning('load_bundle: {} has version {}, expected {}'.format(
+            path, bundle.get('version'), BundleParams.VERSION))
+        return None
+    return bundle
+
+
+def prewarm(bundle: dict, bittrex: BittrexApiProxy, poloniex: PoloniexApiProxy):
+    bittrex.prewarm(bundle['bittrex'])
+    poloniex.prewarm(bundle['poloniex'])
+    logger.info('prewarm: metadata from {} loaded'.format(bundle['created_at']))
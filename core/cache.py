@@ -0,0 +1,222 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import simplejson as json
+from cachetools import LRUCache
+from cachetools.keys import hashkey
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import wraps
+from typing import Dict
+
+from core.clock import monotonic
+from core.payload import Payload
+
+logger = logging.getLogger('testex')
+
+
+class SwrCacheParams:
+    MAXSIZE = 128
+    REFRESH_WORKERS = 4
+    STORE_MAX_ENTRIES = 1024
+    STORE_TIMEOUT = 5.  # seconds
+
+
+refresh_executor = ThreadPoolExecutor(
+    max_workers=SwrCacheParams.REFRESH_WORKERS,
+    thread_name_prefix='testex-cache'
+)
+caches = dict()  # type: Dict[str, SwrCache]
+store = None  # type: SqliteCacheStore
+
+
+def encode_entry(value):
+    if isinstance(value, Payload):
+        return 'payload', sqlite3.Binary(value.content), value.status_code
+    return 'json', json.dumps(value, use_decimal=True), None
+
+
+def decode_entry(kind, content, status_code):
+    if kind == 'payload':
+        return Payload(bytes(content), status_code)
+    return json.loads(content, use_decimal=True)
+
+
+class SqliteCacheStore:
+    """Keeps upstream responses as plain columns and json, never as pickles which would run code on load"""
+
+    def __init__(self, path, max_entries=SwrCacheParams.STORE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        self.connection = sqlite3.connect(
+            path,
+            timeout=SwrCacheParams.STORE_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        os.chmod(path, 0o600)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('DROP TABLE IF EXISTS entries')  # pickled by earlier versions
+        self.connection.execute('CREATE TABLE IF NOT EXISTS responses ('
+                                'key TEXT PRIMARY KEY, kind TEXT, content BLOB, status_code INTEGER, '
+                                'loaded_at REAL, accessed_at REAL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+
+    def get(self, key, max_age):
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT kind, content, status_code, loaded_at FROM responses WHERE key = ? AND loaded_at > ?',
+                (key, now - max_age)
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+        return decode_entry(*row[:3]), now - row[3]
+
+    def set(self, key, value):
+        now = time.time()
+        try:
+            kind, content, status_code = encode_entry(value)
+        except TypeError as e:
+            logger.warning('set: {} is not serializable: {}'.format(key, e))
+            return
+
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO responses (key, kind, content, status_code, loaded_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, kind, content, status_code, now, now)
+            )
+            self.connection.execute(
+                'DELETE FROM responses WHERE key IN '
+                '(SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class SwrCache:
+
+    def __init__(self, name, soft_ttl, hard_ttl, maxsize=SwrCacheParams.MAXSIZE, timer=monotonic,
+                 store=None):
+        assert soft_ttl <= hard_ttl
+        self.name = name
+        self.store = store  # type: SqliteCacheStore
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.timer = timer
+        self.entries = LRUCache(maxsize=maxsize)
+        self.flights = dict()  # type: Dict[tuple, Future]
+        self.lock = threading.Lock()
+        self.stats = Counter(hits=0, stale_hits=0, misses=0, coalesced=0, refreshes=0, errors=0, store_hits=0)
+
+    def fetch(self, store_key, loader, max_age):
+        if self.store is not None and store_key:
+            entry = self.store.get(store_key, max_age)
+            if entry is not None:
+                self.stats['store_hits'] += 1
+                value, age = entry
+                return value, self.timer() - age
+
+        value = loader()
+        if self.store is not None and store_key:
+            self.store.set(store_key, value)
+        return value, self.timer()
+
+    def load(self, key, loader, flight: Future, store_key=None, max_age=None):
+        try:
+            value, loaded_at = self.fetch(store_key, loader, max_age or self.hard_ttl)
+        except Exception as e:
+            with self.lock:
+                self.stats['errors'] += 1
+                self.flights.pop(key, None)
+            flight.set_exception(e)
+            return
+
+        with self.lock:
+            self.entries[key] = value, loaded_at
+            self.flights.pop(key, None)
+        flight.set_result(value)
+
+    def refresh(self, key, loader, store_key=None):
+        flight = self.flights[key] = Future()
+        self.stats['refreshes'] += 1
+        refresh_executor.submit(self.load, key, loader, flight, store_key, self.soft_ttl)
+
+    def put(self, key, value, stale=False):
+        with self.lock:
+            self.entries[key] = value, self.timer() - (self.soft_ttl if stale else 0)
+
+    def get(self, key, loader, store_key=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, loaded_at = entry
+                age = self.timer() - loaded_at
+                if age < self.soft_ttl:
+                    self.stats['hits'] += 1
+                    return value
+                if age < self.hard_ttl:
+                    self.stats['stale_hits'] += 1
+                    if key not in self.flights:
+                        self.refresh(key, loader, store_key)
+                    return value
+
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Future()
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if leader:
+            self.load(key, loader, flight, store_key)
+        return flight.result()
+
+
+def swr_cached(soft_ttl, hard_ttl, maxsize=SwrCacheParams.MAXSIZE):
+    def decorator(f):
+        cache = caches[f.__qualname__] = SwrCache(f.__qualname__, soft_ttl, hard_ttl, maxsize=maxsize,
+                                                  store=store)
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            return cache.get(
+                key=hashkey(*args, **kwargs),
+                loader=lambda: f(*args, **kwargs),
+                store_key=repr((cache.name, hashkey(*args[1:], **kwargs)))
+            )
+
+        def prime(*args, value, stale=False, **kwargs):
+            cache.put(hashkey(*args, **kwargs), value, stale=stale)
+
+        wrapper.cache = cache
+        wrapper.prime = prime
+        return wrapper
+    return decorator
+
+
+def init_store(path, max_entries=SwrCacheParams.STORE_MAX_ENTRIES):
+    global store
+    store = SqliteCacheStore(path, max_entries=max_entries) if path else None
+    for cache in caches.values():
+        cache.store = store
+    logger.info('init_store: {}'.format(path or 'disabled'))
+
+
+def get_cache_stats() -> dict:
+    return {name: dict(cache.stats) for name, cache in caches.items()}
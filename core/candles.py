@@ -0,0 +1,148 @@
+import calendar
+import threading
+from decimal import Decimal
+from typing import Dict, List
+
+from core.schema import Trade, TradeListener
+
+
+class CandleParams:
+    PERIODS = (300, 900, 1800, 7200, 14400, 86400)  # seconds
+    MAX_CANDLES = 1000  # per market and period
+
+
+def get_timestamp(dt) -> int:
+    return calendar.timegm(dt.utctimetuple())
+
+
+class Candle:
+    __slots__ = ('date', 'open', 'high', 'low', 'close', 'volume', 'quote_volume')
+
+    def __init__(self, date, price: Decimal):
+        self.date = date
+        self.open = self.high = self.low = self.close = price
+        self.volume = Decimal()
+        self.quote_volume = Decimal()
+
+    def update(self, price: Decimal, amount: Decimal):
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += price * amount
+        self.quote_volume += amount
+
+    def to_dict(self) -> dict:
+        return dict(
+            date=self.date,
+            high=self.high,
+            low=self.low,
+            open=self.open,
+            close=self.close,
+            volume=self.volume,
+            quoteVolume=self.quote_volume,
+            weightedAverage=self.volume / self.quote_volume if self.quote_volume else self.close
+        )
+
+
+class CandleSeries:
+
+    def __init__(self, period, maxsize=CandleParams.MAX_CANDLES):
+        self.period = period
+        self.maxsize = maxsize
+        self.candles = [None] * maxsize  # type: List[Candle]
+        self.head = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i) -> Candle:
+        return self.candles[(self.head + i) % self.maxsize]
+
+    def bisect(self, date) -> int:
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self[mid].date < date:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def add(self, timestamp, price: Decimal, amount: Decimal):
+        date = timestamp - timestamp % self.period
+        if self.size and self[self.size - 1].date == date:
+            candle = self[self.size - 1]
+        elif not self.size or self[self.size - 1].date < date:
+            candle = Candle(date, price)
+            if self.size == self.maxsize:
+                self.head = (self.head + 1) % self.maxsize
+                self.size -= 1
+            self.candles[(self.head + self.size) % self.maxsize] = candle
+            self.size += 1
+        else:
+            i = self.bisect(date)
+            if i == self.size or self[i].date != date:
+                return  # late trade outside of the retained candles
+            candle = self[i]
+        candle.update(price, amount)
+
+    def get_range(self, start, end) -> List[Candle]:
+        return [self[i] for i in range(self.bisect(start), self.bisect(end + 1))]
+
+
+def merge_candles(upstream: List[dict], local: List[dict]) -> List[dict]:
+    candles = {candle['date']: candle for candle in upstream if candle['date']}
+    for candle in local:
+        other = candles.get(candle['date'])
+        if other is not None:
+            volume = other['volume'] + candle['volume']
+            quote_volume = other['quoteVolume'] + candle['quoteVolume']
+            candle = dict(
+                date=candle['date'],
+                high=max(other['high'], candle['high']),
+                low=min(other['low'], candle['low']),
+                open=other['open'],
+                close=candle['close'],
+                volume=volume,
+                quoteVolume=quote_volume,
+                weightedAverage=volume / quote_volume if quote_volume else candle['close']
+            )
+        candles[candle['date']] = candle
+    return [candles[date] for date in sorted(candles)]
+
+
+class CandleAggregator(TradeListener):
+
+    def __init__(self, exchange_id, periods=CandleParams.PERIODS, maxsize=CandleParams.MAX_CANDLES):
+        self.exchange_id = exchange_id
+        self.periods = periods
+        self.maxsize = maxsize
+        self.series = dict()  # type: Dict[str, Dict[int, CandleSeries]]
+        self.lock = threading.Lock()
+
+    def on_trade(self, exchange_id, trade: Trade):
+        if exchange_id != self.exchange_id:
+            return
+
+        timestamp = get_timestamp(trade['created_at'])
+        with self.lock:
+            if trade['market'] not in self.series:
+                self.series[trade['market']] = {
+                    period: CandleSeries(period, self.maxsize)
+                    for period in self.periods
+                }
+            for series in self.series[trade['market']].values():
+                series.add(timestamp, trade['price'], trade['amount'])
+
+    def has_market(self, market) -> bool:
+        return market in self.series
+
+    def get_candles(self, market, period, start, end) -> List[dict]:
+        with self.lock:
+            series = self.series.get(market, dict()).get(period)
+            if series is None:
+                return []
+            return [candle.to_dict() for candle in series.get_range(start, end)]
@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from pymongo import ReturnDocument
+from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
+
+from core.helpers import mongo_auto_reconnect
+
+logger = logging.getLogger('testex')
+
+
+class ClockParams:
+    MAX_SPEED = 1000.
+    OFFSET_REFRESH_INTERVAL = 1.  # seconds
+
+
+class LocalOffset:
+
+    def __init__(self):
+        self.value = 0.
+        self.lock = threading.Lock()
+        self.timer = time.monotonic
+
+    def get(self) -> float:
+        return self.value
+
+    def share_epoch(self, epoch: dict) -> dict:
+        return epoch
+
+    def add(self, seconds: float):
+        with self.lock:
+            self.value += seconds
+
+
+class MongoOffset:
+    """Shares clock advances between the processes over one database"""
+
+    def __init__(self, db: Database, name='clock', refresh_interval=ClockParams.OFFSET_REFRESH_INTERVAL):
+        self.db = db
+        self.name = name
+        self.refresh_interval = refresh_interval
+        self.value = 0.
+        self.refreshed_at = None
+        self.timer = time.time  # origins are compared across processes
+
+    @mongo_auto_reconnect
+    def share_epoch(self, epoch: dict) -> dict:
+        """The first process sets where the clock starts, the others and restarts continue from it"""
+        try:
+            document = self.db.clocks.find_one_and_update(
+                filter={'_id': self.name, 'epoch': {'$exists': False}},
+                update={'$set': {'epoch': epoch}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            document = self.db.clocks.find_one({'_id': self.name})
+        return document['epoch']
+
+    @mongo_auto_reconnect
+    def get(self) -> float:
+        if self.refreshed_at is None or time.monotonic() - self.refreshed_at >= self.refresh_interval:
+            document = self.db.clocks.find_one({'_id': self.name})
+            self.value = document.get('offset', 0.) if document else 0.
+            self.refreshed_at = time.monotonic()
+        return self.value
+
+    @mongo_auto_reconnect
+    def add(self, seconds: float):
+        document = self.db.clocks.find_one_and_update(
+            filter={'_id': self.name},
+            update={'$inc': {'offset': seconds}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self.value = document['offset']
+        self.refreshed_at = time.monotonic()
+
+
+class Clock:
+    mode = 'wall'
+    speed = 1.
+
+    def __init__(self, offset=None):
+        self.offset = offset or LocalOffset()
+
+    def time(self) -> float:
+        return time.time() + self.offset.get()
+
+    def monotonic(self) -> float:
+        return time.monotonic() + self.offset.get()
+
+    def utcnow(self) -> datetime:
+        return datetime.utcfromtimestamp(self.time())
+
+    def advance(self, seconds: float):
+        if seconds < 0:
+            raise ValueError('clock cannot go backwards')
+        self.offset.add(seconds)
+
+    def to_dict(self) -> dict:
+        return dict(
+            mode=self.mode,
+            speed=self.speed,
+            time=self.time(),
+            datetime=self.utcnow().isoformat()
+        )
+
+
+class ScaledClock(Clock):
+    mode = 'fast'
+
+    def __init__(self, start=None, speed=1., timer=None, offset=None):
+        super(ScaledClock, self).__init__(offset)
+        if not 0 < speed <= ClockParams.MAX_SPEED:
+            raise ValueError('clock speed must be within (0, {}]'.format(ClockParams.MAX_SPEED))
+        self.timer = timer or self.offset.timer
+        epoch = self.offset.share_epoch(dict(
+            start=time.time() if start is None else start,
+            origin=self.timer(),
+            speed=speed
+        ))
+        self.start, self.origin, self.speed = epoch['start'], epoch['origin'], epoch['speed']
+        if self.speed != speed:
+            logger.warning('ScaledClock: the shared clock keeps its speed {}, not {}'.format(self.speed, speed))
+
+    def time(self) -> float:
+        return self.start + self.offset.get() + (self.timer() - self.origin) * self.speed
+
+    def monotonic(self) -> float:
+        return self.time()
+
+
+class FrozenClock(Clock):
+    mode = 'frozen'
+
+    def __init__(self, start=None, offset=None):
+        super(FrozenClock, self).__init__(offset)
+        self.start = self.offset.share_epoch(dict(
+            start=time.time() if start is None else start,
+            origin=self.offset.timer(),
+            speed=self.speed
+        ))['start']
+
+    def time(self) -> float:
+        return self.start + self.offset.get()
+
+    def monotonic(self) -> float:
+        return self.time()
+
+
+clocks = dict(
+    wall=lambda start, speed, offset: Clock(offset),
+    frozen=lambda start, speed, offset: FrozenClock(start, offset),
+    fast=lambda start, speed, offset: ScaledClock(start, speed, offset=offset)
+)
+
+
+def make_clock(mode='wall', start=None, speed=1., offset=None) -> Clock:
+    return clocks[mode](start, speed, offset)
+
+
+current = Clock()
+
+
+def get_clock() -> Clock:
+    return current
+
+
+def set_clock(clock: Clock):
+    global current
+    current = clock
+
+
+def now() -> float:
+    return current.time()
+
+
+def monotonic() -> float:
+    return current.monotonic()
+
+
+def utcnow() -> datetime:
+    return current.utcnow()
@@ -0,0 +1,140 @@
+import atexit
+import logging
+import threading
+from bisect import bisect_left, insort
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from core.schema import DepthListener, Executor, OrderDirection, OrderStatus
+
+logger = logging.getLogger('testex')
+
+
+class DepthBookParams:
+    RESYNC_INTERVAL = 5.  # seconds
+    STOP_TIMEOUT = 10.  # seconds
+
+
+class DepthSide:
+
+    def __init__(self, descending=False):
+        self.descending = descending
+        self.prices = list()  # type: List[Decimal]
+        self.amounts = dict()  # type: Dict[Decimal, Decimal]
+
+    def __len__(self):
+        return len(self.prices)
+
+    def update(self, price: Decimal, delta: Decimal):
+        amount = self.amounts.get(price, Decimal()) + delta
+        if amount > 0:
+            if price not in self.amounts:
+                insort(self.prices, price)
+            self.amounts[price] = amount
+        elif price in self.amounts:
+            del self.amounts[price]
+            del self.prices[bisect_left(self.prices, price)]
+
+    def top(self, depth) -> List[Tuple[Decimal, Decimal]]:
+        if depth <= 0:
+            return []
+        if self.descending:
+            prices = reversed(self.prices[-depth:])
+        else:
+            prices = self.prices[:depth]
+        return [(price, self.amounts[price]) for price in prices]
+
+
+class DepthBook(DepthListener):
+    """Open orders of one exchange by price level, kept up to date by the executor's depth deltas"""
+
+    def __init__(self, exchange_id):
+        self.exchange_id = exchange_id
+        self.sides = dict()  # type: Dict[Tuple[str, str], DepthSide]
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None  # type: threading.Thread
+        self.resyncs = 0
+
+    def resync(self, executor: Executor):
+        # holding the lock for the whole scan queues the deltas that arrive meanwhile instead of losing them
+        with self.lock:
+            sides = dict()
+            for order in executor.get_orders(api_key=None, status=OrderStatus.OPENED):
+                if order.get('exchange_id') != self.exchange_id:
+                    continue
+                side = sides.get((order['market'], order['direction']))
+                if side is None:
+                    side = sides[order['market'], order['direction']] = \
+                        DepthSide(descending=order['direction'] == OrderDirection.BUY)
+                side.update(order['price'], order['amount'] - order.get('executed_amount', Decimal()))
+            self.sides = sides
+            self.resyncs += 1
+
+    def run(self, executor: Executor, interval):
+        while True:
+            try:
+                self.resync(executor)
+            except Exception:
+                logger.exception('resync: loading open orders failed')
+            if self.stopped.wait(interval):
+                break
+
+    def start(self, executor: Executor, interval=DepthBookParams.RESYNC_INTERVAL):
+        """Other workers' orders only reach this book through storage, reloads it off the request threads"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, args=(executor, interval), name='testex-depth', daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout=DepthBookParams.STOP_TIMEOUT):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def on_depth_change(self, exchange_id, market, direction, price: Decimal, delta: Decimal):
+        if exchange_id != self.exchange_id or not delta:
+            return
+
+        with self.lock:
+            side = self.sides.get((market, direction))
+            if side is None:
+                side = self.sides[market, direction] = DepthSide(descending=direction == OrderDirection.BUY)
+            side.update(price, delta)
+
+    def has_market(self, market) -> bool:
+        return any(self.sides.get((market, direction)) for direction in [OrderDirection.BUY, OrderDirection.SELL])
+
+    def get_markets(self) -> List[str]:
+        with self.lock:
+            return sorted(set(market for (market, _), side in self.sides.items() if side))
+
+    def get_levels(self, market, direction, depth) -> List[Tuple[Decimal, Decimal]]:
+        with self.lock:
+            side = self.sides.get((market, direction))
+            return side.top(depth) if side else []
+
+
+def is_better(price, other, descending) -> bool:
+    return price > other if descending else price < other
+
+
+def merge_levels(upstream: list, local: list, descending, depth) -> List[Tuple[Decimal, Decimal]]:
+    result = list()
+    i = j = 0
+    while len(result) < depth and (i < len(upstream) or j < len(local)):
+        if j == len(local) or (i < len(upstream) and is_better(upstream[i][0], local[j][0], descending)):
+            result.append(upstream[i])
+            i += 1
+        elif i == len(upstream) or is_better(local[j][0], upstream[i][0], descending):
+            result.append(local[j])
+            j += 1
+        else:
+            result.append((upstream[i][0], upstream[i][1] + local[j][1]))
+            i += 1
+            j += 1
+    return result
@@ -1,353 +1,505 @@
 import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from tabulate import tabulate
 from uuid import uuid4
 from pymongo.database import Database
-from pymongo import ReturnDocument
 from typing import List
 from random import SystemRandom
 from decimal import Decimal
-from bson import Decimal128
-from datetime import datetime
 from collections import defaultdict
 from typing import Dict
 
-from core.helpers import obj_dec128_to_dec, obj_dec_to_dec128, obj_list_dec128_to_dec, obj_dropna, \
-    make_mongo_interval_cond, mongo_auto_reconnect
+from core.clock import Clock, get_clock, utcnow
+from core.journal import is_snapshot_due, take_snapshot
 from core.schema import Executor, OrderDirection, OrderStatus, TransactionType, TransactionStatus, \
-    CustomLogicMixin
+    CustomLogicMixin, Storage, Journal, EventType, Order, Trade, Transaction, Balance, TradeListener, DepthListener
+from core.storage.mongo import MongoStorage
 
 logger = logging.getLogger('testex')
 
 
 class SimpleExecutorParams:
     NON_EXECUTE_PROB = .3
+    TRADE_SEED_WINDOW = 86400  # seconds of stored trades replayed to new trade listeners
 
 
-class SimpleExecutor(Executor):
+def get_remaining_amount(order: dict) -> Decimal:
+    return order['amount'] - order.get('executed_amount', Decimal())
 
-    def __init__(self, db=None):
+
+def make_increments():
+    return defaultdict(lambda: defaultdict(Decimal))
+
+
+def merge_increments(*items) -> dict:
+    increments = make_increments()
+    for item in items:
+        for currency, balance in item.items():
+            for key, value in balance.items():
+                increments[currency][key] += value
+    return increments
+
+
+def get_order_opened_increments(order: dict) -> dict:
+    increments = make_increments()
+
+    if order['direction'] == OrderDirection.BUY:
+        increments[order['base_currency']]['frozen'] = order['reserved']
+        increments[order['base_currency']]['available'] = -order['reserved']
+    else:
+        increments[order['market_currency']]['frozen'] = order['reserved']
+        increments[order['market_currency']]['available'] = -order['reserved']
+
+    increments[order['fee_currency']]['frozen'] += order['reserved_fee']
+    increments[order['fee_currency']]['available'] -= order['reserved_fee']
+    return increments
+
+
+def get_order_closed_increments(order: dict) -> dict:
+    increments = make_increments()
+
+    if order['direction'] == OrderDirection.BUY:
+        increments[order['base_currency']]['frozen'] = -order['reserved']
+        increments[order['base_currency']]['available'] = order['reserved'] - order['total']
+        increments[order['market_currency']]['available'] = order['executed_amount']
+    else:
+        increments[order['market_currency']]['frozen'] = -order['reserved']
+        increments[order['market_currency']]['available'] = order['reserved'] - order['executed_amount']
+        increments[order['base_currency']]['available'] = order['total']
+
+    increments[order['fee_currency']]['frozen'] -= order['reserved_fee']
+    increments[order['fee_currency']]['available'] += order['reserved_fee'] - order['fee']
+    return increments
+
+
+def get_transaction_submitted_increments(transaction: dict) -> dict:
+    increments = make_increments()
+
+    if transaction['type'] == TransactionType.WITHDRAWAL:
+        increments[transaction['currency']]['available'] = -transaction['amount']
+        key = 'frozen'
+    else:
+        key = 'pending'
+
+    increments[transaction['currency']][key] = transaction['amount']
+    return increments
+
+
+def get_transaction_confirmed_increments(transaction: dict) -> dict:
+    increments = make_increments()
+
+    if transaction['type'] == TransactionType.WITHDRAWAL:
+        key = 'frozen'
+    else:
+        key = 'pending'
+        increments[transaction['currency']]['available'] = transaction['amount']
+
+    increments[transaction['currency']][key] = -transaction['amount']
+    return increments
+
+
+def make_trade(order: dict, amount: Decimal, price=None, created_at=None) -> Trade:
+    return Trade(
+        _id=str(uuid4()),
+        api_key=order['api_key'],
+        exchange_id=order.get('exchange_id'),
+        order_number=order['_id'],
+        market=order.get('market'),
+        direction=order['direction'],
+        price=price or order['price'],
+        created_at=created_at or utcnow(),
+        amount=amount
+    )
+
+
+def get_recent_trades(storage: Storage, now: datetime,
+                      window=SimpleExecutorParams.TRADE_SEED_WINDOW) -> List[Trade]:
+    trades = storage.get_trades(api_key=None, start_at=now - timedelta(seconds=window))
+    return sorted(trades, key=lambda trade: trade['created_at'])
+
+
+def fill_order(order: Order, trade: Trade):
+    average_price = (trade['amount'] * trade['price'] + order['total']) \
+        / (trade['amount'] + order['executed_amount'])
+
+    if trade['amount'] == order['remaining_amount']:
+        status = OrderStatus.CLOSED
+    else:
+        status = OrderStatus.OPENED
+
+    order = order.copy()
+    order.update(
+        executed_amount=order['executed_amount'] + trade['amount'],
+        average_price=average_price,
+        updated_at=trade['created_at'],
+        status=status
+    )
+    inc = dict(
+        executed_amount=trade['amount']
+    )
+    # set rather than $inc, documents stored before the derived fields have no remaining_amount
+    fields = dict(
+        average_price=average_price,
+        updated_at=trade['created_at'],
+        status=status,
+        total=order['total'],
+        fee=order['fee'],
+        remaining_amount=order['remaining_amount']
+    )
+    return order, inc, fields
+
+
+def make_deposit(api_key, currency, quantity: Decimal, created_at=None) -> Transaction:
+    created_at = created_at or utcnow()
+    return Transaction(
+        _id=str(uuid4()),
+        api_key=api_key,
+        type=TransactionType.DEPOSIT,
+        currency=currency,
+        amount=quantity,
+        address=None,
+        status=TransactionStatus.CONFIRMED,
+        created_at=created_at,
+        updated_at=created_at,
+        fee=Decimal()
+    )
+
+
+class ExecutorLogic:
+    """Storage independent order and fill logic shared by the sync and async executors"""
+
+    def __init__(self, clock=None):
         self.rnd = SystemRandom()
-        self.db = None  # type: Database
+        self.clock = clock or get_clock()  # type: Clock
         self.custom_logic = dict()  # type: Dict[str, CustomLogicMixin]
-        if db:
-            self.init_db(db)
-
-    def init_db(self, db: Database):
-        self.db = db
+        self.listeners = list()  # type: list
 
     def register_custom_logic(self, custom_logic: CustomLogicMixin):
         self.custom_logic[custom_logic.__exchange_id__] = custom_logic
 
+    def register_listener(self, listener):
+        self.listeners.append(listener)
+
+    def notify_trade(self, order: dict, trade: Trade):
+        for listener in self.listeners:
+            if isinstance(listener, TradeListener):
+                listener.on_trade(order.get('exchange_id'), trade)
+
+    def notify_depth(self, order: dict, delta: Decimal):
+        for listener in self.listeners:
+            if isinstance(listener, DepthListener):
+                listener.on_depth_change(order.get('exchange_id'), order['market'], order['direction'],
+                                         order['price'], delta)
+
     def extend_order(self, order: dict) -> dict:
         if order.get('exchange_id') in self.custom_logic:
             return self.custom_logic[order['exchange_id']].extend_order(order)
         return order
 
-    def make_trade(self, order: dict, amount=None) -> dict:
+    def skip_execution(self, non_execute_prob) -> bool:
+        return self.rnd.uniform(0, 1) < non_execute_prob
+
+    def make_trade(self, order: dict, amount=None, price=None) -> dict:
         if not amount:
             amount = min(
                 order['remaining_amount'],
                 Decimal(self.rnd.expovariate(1 / float(order['remaining_amount'])))
             )
 
-        trade = dict(
-            _id=str(uuid4()),
-            api_key=order['api_key'],
-            order_number=order['_id'],
-            direction=order['direction'],
-            price=order['price'],
-            created_at=datetime.utcnow(),
-            amount=amount
+        return make_trade(order, amount, price=price, created_at=self.clock.utcnow())
+
+    def make_order(self, api_key, number, **kwargs) -> Order:
+        order = Order(
+            _id=number,
+            api_key=api_key,
+            status=OrderStatus.OPENED,
+            created_at=self.clock.utcnow()
         )
-        return trade
+        order.update(**kwargs)
+        return self.extend_order(order).materialize()
 
-    def execute_order(self, order: dict,
-                      non_execute_prob=SimpleExecutorParams.NON_EXECUTE_PROB,
-                      trade_amount=None):
+    def make_transaction(self, api_key, number, **kwargs) -> Transaction:
+        transaction = Transaction(
+            _id=number,
+            api_key=api_key,
+            status=TransactionStatus.NON_AUTHORIZED,
+            created_at=self.clock.utcnow()
+        )
+        transaction.update(**kwargs)
+        return transaction
 
-        if self.rnd.uniform(0, 1) < non_execute_prob:
+    def make_status_fields(self, status) -> dict:
+        return dict(
+            status=status,
+            updated_at=self.clock.utcnow()
+        )
+
+    @staticmethod
+    def make_balance(api_key, currency, balance=None) -> Balance:
+        if balance:
+            return balance
+        return Balance(
+            api_key=api_key,
+            currency=currency,
+            available=Decimal()
+        )
+
+    def prepare_fill(self, order: dict, non_execute_prob, trade_amount=None):
+        """Returns the filled order, its trade and the order update, None if the order is skipped this time"""
+        if self.skip_execution(non_execute_prob):
             logger.debug('execute_order: skip execution')
-            return
+            return None
 
         order = self.extend_order(order)
         trade = self.make_trade(order, amount=trade_amount)
-        average_price = (trade['amount'] * trade['price'] + order['total']) \
-            / (trade['amount'] + order['executed_amount'])
-
-        if trade['amount'] == order['remaining_amount']:
-            status = OrderStatus.CLOSED
-        else:
-            status = OrderStatus.OPENED
-
-        self.db.trades.insert_one(obj_dec_to_dec128(trade))
-        order = self.db.orders.find_one_and_update(
-            filter=dict(_id=order['_id']),
-            update={
-                "$inc": dict(
-                    executed_amount=Decimal128(trade['amount'])
-                ),
-                "$set": dict(
-                    average_price=Decimal128(average_price),
-                    updated_at=trade['created_at'],
-                    status=status
-                )
-            },
-            return_document=ReturnDocument.AFTER
-        )
-
-        order = self.extend_order(obj_dec128_to_dec(order))
-        if status == OrderStatus.CLOSED:
-            self.on_order_closed(order)
+        order, inc, fields = fill_order(order, trade)
+        return order, trade, inc, fields
 
+    def after_fill(self, order: dict, trade: Trade):
+        self.notify_trade(order, trade)
+        self.notify_depth(order, -trade['amount'])
         logger.info('execute_order: {} {} (of {}) {} at {} {}'.format(
             trade['direction'], trade['amount'], order['amount'], order['market_currency'],
             trade['price'], order['base_currency']))
+
+    def after_send_order(self, order: dict):
+        self.notify_depth(order, order['amount'])
+        logger.info('send_order: {} {} {} at {} {}'.format(
+            order['direction'], order['amount'], order['market_currency'],
+            order['price'], order['base_currency']))
+
+    def after_cancel_order(self, order: dict) -> dict:
+        self.notify_depth(order, -get_remaining_amount(order))
+        order = self.extend_order(order)
+        logger.info('cancel_order: {} {} of {} {}'.format(
+            order['direction'], order['executed_amount'],
+            order['amount'], order['market_currency']))
+        return order
+
+    @staticmethod
+    def after_send_transaction(transaction: dict):
+        logger.info('send_transaction: {} {} {} -> {}'.format(
+            transaction['type'], transaction['amount'], transaction['currency'],
+            transaction['address']))
+
+    @staticmethod
+    def after_deposit(transaction: dict):
+        logger.info('deposit: {} {}'.format(transaction['amount'], transaction['currency']))
+
+    @staticmethod
+    def after_increment_balances(increments: dict):
+        logger.debug('increment_balances:\n{}'.format(tabulate(increments)))
+
+
+class SimpleExecutor(ExecutorLogic, Executor):
+
+    def __init__(self, db=None, storage=None, journal=None, clock=None):
+        super(SimpleExecutor, self).__init__(clock)
+        self.storage = None  # type: Storage
+        self.journal = None  # type: Journal
+        if db:
+            self.init_db(db)
+        if storage:
+            self.init_storage(storage)
+        if journal:
+            self.init_journal(journal)
+
+    def init_db(self, db: Database):
+        self.init_storage(MongoStorage(db))
+
+    def init_storage(self, storage: Storage):
+        self.storage = storage
+
+    def init_journal(self, journal: Journal):
+        self.journal = journal
+
+    def record(self, _type, api_key, **payload):
+        if self.journal:
+            self.journal.append(_type, api_key, **payload)
+
+    def register_listener(self, listener):
+        super(SimpleExecutor, self).register_listener(listener)
+        if isinstance(listener, DepthListener) and self.storage:
+            for order in self.storage.get_orders(status=OrderStatus.OPENED):
+                listener.on_depth_change(order.get('exchange_id'), order['market'], order['direction'],
+                                         order['price'], get_remaining_amount(order))
+        if isinstance(listener, TradeListener) and self.storage:
+            for trade in get_recent_trades(self.storage, self.clock.utcnow()):
+                listener.on_trade(trade.get('exchange_id'), trade)
+
+    @property
+    def saved_round_trips(self) -> int:
+        return getattr(self.storage, 'saved_round_trips', 0)
+
+    @contextmanager
+    def buffered(self):
+        with self.storage.batch() as buffer:
+            if self.journal:
+                with self.journal.batch():
+                    yield buffer
+            else:
+                yield buffer
+
+    def execute_order(self, order: dict,
+                      non_execute_prob=SimpleExecutorParams.NON_EXECUTE_PROB,
+                      trade_amount=None):
+
+        fill = self.prepare_fill(order, non_execute_prob, trade_amount)
+        if fill is None:
+            return
+
+        order, trade, inc, fields = fill
+        if not self.storage.update_order(
+            api_key=order['api_key'],
+            number=order['_id'],
+            inc=inc,
+            fields=fields,
+            cond=dict(status=OrderStatus.OPENED)
+        ):
+            logger.debug('execute_order: {} was closed meanwhile'.format(order['_id']))
+            return
+        self.storage.insert_trade(trade)
+        self.record(EventType.TRADE, order['api_key'], trade=trade, inc=inc, fields=fields)
+        self.after_fill(order, trade)
+
+        if order['status'] == OrderStatus.CLOSED:
+            increments = self.on_order_closed(order)
+            self.record(EventType.ORDER_CLOSED, order['api_key'], number=order['_id'], increments=increments)
         return order
 
     def sync_transaction(self, transaction: dict):
-        transaction = self.db.transactions.find_one_and_update(
-            filter=dict(
-                _id=transaction['_id'],
-                api_key=transaction['api_key']
-            ),
-            update={
-                '$set': dict(
-                    status=TransactionStatus.CONFIRMED,
-                    updated_at=datetime.utcnow()
-                )
-            },
-            return_document=ReturnDocument.AFTER
+        fields = self.make_status_fields(TransactionStatus.CONFIRMED)
+        self.storage.update_transaction(
+            api_key=transaction['api_key'],
+            number=transaction['_id'],
+            fields=fields
         )
-        self.on_transaction_confirmed(obj_dec128_to_dec(transaction))
+        transaction.update(fields)
+        increments = self.on_transaction_confirmed(transaction)
+        self.record(EventType.TRANSACTION_CONFIRMED, transaction['api_key'], number=transaction['_id'],
+                    fields=fields, increments=increments)
 
     def sync_transactions(self):
-        transactions = self.db.transactions.find(dict(
-            status={'$ne': TransactionStatus.CONFIRMED}
-        ))
+        transactions = self.storage.get_transactions(status=TransactionStatus.UNCONFIRMED)
         for transaction in transactions:
             self.sync_transaction(transaction)
 
     def execute_orders(self):
-        orders = self.db.orders.find(dict(status=OrderStatus.OPENED))
+        orders = self.storage.get_orders(status=OrderStatus.OPENED)
         for order in orders:
-            self.execute_order(obj_dec128_to_dec(order))
+            self.execute_order(order)
 
-    @mongo_auto_reconnect
     def process(self):
-        self.execute_orders()
-        self.sync_transactions()
+        with self.buffered():
+            self.execute_orders()
+            self.sync_transactions()
 
-    @mongo_auto_reconnect
-    def send_order(self, api_key, number, **kwargs):
-        order = dict(
-            _id=number,
-            api_key=api_key,
-            status=OrderStatus.OPENED,
-            created_at=datetime.utcnow()
-        )
-        order.update(**kwargs)
-        self.db.orders.insert_one(obj_dec_to_dec128(order))
+        if self.journal and is_snapshot_due(self.journal):
+            take_snapshot(self.journal)
 
-        order_ex = self.extend_order(order)
-        self.on_order_opened(self.extend_order(order_ex))
+    def send_order(self, api_key, number, **kwargs):
+        order = self.make_order(api_key, number, **kwargs)
+        self.storage.insert_order(order)
 
-        logger.info('send_order: {} {} {} at {} {}'.format(
-            order['direction'], order['amount'], order['market_currency'],
-            order['price'], order['base_currency']))
-        return order_ex
+        increments = self.on_order_opened(order)
+        self.record(EventType.ORDER_OPENED, api_key, order=order, increments=increments)
+        self.after_send_order(order)
+        return order
 
-    @mongo_auto_reconnect
     def send_transaction(self, api_key, number, **kwargs):
-        transaction = dict(
-            _id=number,
-            api_key=api_key,
-            status=TransactionStatus.NON_AUTHORIZED,
-            created_at=datetime.utcnow()
-        )
-        transaction.update(**kwargs)
-
-        self.db.transactions.insert_one(obj_dec_to_dec128(transaction))
-        self.on_transaction_submitted(transaction)
-
-        logger.info('send_transaction: {} {} {} -> {}'.format(
-            transaction['type'], transaction['amount'], transaction['currency'],
-            transaction['address']))
+        transaction = self.make_transaction(api_key, number, **kwargs)
+        self.storage.insert_transaction(transaction)
+        increments = self.on_transaction_submitted(transaction)
+        self.record(EventType.TRANSACTION_SUBMITTED, api_key, transaction=transaction, increments=increments)
+        self.after_send_transaction(transaction)
         return transaction
 
-    @mongo_auto_reconnect
     def get_order(self, api_key, number):
-        order = self.db.orders.find_one(dict(
-            _id=number,
-            api_key=api_key
-        ))
+        order = self.storage.get_order(api_key, number)
         if order:
-            return self.extend_order(obj_dec128_to_dec(order))
+            return self.extend_order(order)
 
-    @mongo_auto_reconnect
     def cancel_order(self, api_key, number):
-        order = self.db.orders.find_one_and_update(
-            filter=dict(
-                _id=number,
-                api_key=api_key
-            ),
-            update={
-                "$set": dict(
-                    status=OrderStatus.CLOSED,
-                    updated_at=datetime.utcnow()
-                )
-            },
-            return_document=ReturnDocument.AFTER
-        )
+        order = self.storage.get_order(api_key, number)
         if order:
-            order_ex = self.extend_order(obj_dec128_to_dec(order))
-            self.on_order_closed(order_ex)
-            logger.info('cancel_order: {} {} of {} {}'.format(
-                order_ex['direction'], order_ex['executed_amount'],
-                order_ex['amount'], order_ex['market_currency']))
+            fields = self.make_status_fields(OrderStatus.CLOSED)
+            if not self.storage.update_order(api_key, number, fields=fields, cond=dict(status=OrderStatus.OPENED)):
+                return self.extend_order(order)
+
+            # fills are applied to opened orders only, the stored one is final now
+            order = self.after_cancel_order(self.storage.get_order(api_key, number))
+            increments = self.on_order_closed(order)
+            self.record(EventType.ORDER_CLOSED, api_key, number=number, fields=fields, increments=increments)
             return order
 
-    @mongo_auto_reconnect
     def get_orders(self, api_key, status, market=None):
-        query = dict(
+        orders = self.storage.get_orders(
             api_key=api_key,
             status=status,
             market=market
         )
-        orders = self.db.orders.find(obj_dropna(query))
-        return list(map(self.extend_order, obj_list_dec128_to_dec(orders)))
+        return list(map(self.extend_order, orders))
 
-    @mongo_auto_reconnect
     def get_transactions(self, api_key, _type=None, currency=None,
                          start_at=None, end_at=None) -> List[dict]:
-        query = {'$and': [
-            obj_dropna(dict(
-                api_key=api_key,
-                type=_type,
-                currency=currency
-            )),
-            *make_mongo_interval_cond('created_at', start_at, end_at)
-        ]}
-        transactions = self.db.transactions.find(query)
-        return obj_list_dec128_to_dec(transactions)
-
-    @mongo_auto_reconnect
+        return self.storage.get_transactions(
+            api_key=api_key,
+            _type=_type,
+            currency=currency,
+            start_at=start_at,
+            end_at=end_at
+        )
+
     def get_trades(self, api_key, order_number=None, market=None, limit=None,
                    start_at=None, end_at=None) -> List[dict]:
-        query = {'$and': [
-            obj_dropna(dict(
-                api_key=api_key,
-                market=market,
-                order_number=order_number
-            )),
-            *make_mongo_interval_cond('created_at', start_at, end_at)
-        ]}
-        trades = self.db.trades.find(query)
-        if limit:
-            trades = trades.limit(limit)
-        return obj_list_dec128_to_dec(trades)
-
-    @mongo_auto_reconnect
+        return self.storage.get_trades(
+            api_key=api_key,
+            order_number=order_number,
+            market=market,
+            limit=limit,
+            start_at=start_at,
+            end_at=end_at
+        )
+
     def get_balances(self, api_key):
-        balances = self.db.balances.find(dict(api_key=api_key))
-        return obj_list_dec128_to_dec(balances)
+        return self.storage.get_balances(api_key)
 
-    @mongo_auto_reconnect
     def get_balance(self, api_key, currency=None):
-        balance = self.db.balances.find_one(dict(
-            api_key=api_key,
-            currency=currency
-        ))
-        if not balance:
-            balance = dict(
-                api_key=api_key,
-                currency=currency,
-                available=Decimal()
-            )
+        return self.make_balance(api_key, currency, self.storage.get_balance(api_key, currency))
 
-        return obj_dec128_to_dec(balance)
-
-    @mongo_auto_reconnect
     def increment_balances(self, api_key, increments: dict):
-        for currency, balance in increments.items():
-            query = dict(
-                api_key=api_key,
-                currency=currency
-            )
-            data = obj_dec_to_dec128(balance)
-            result = self.db.balances.update_one(query, update={'$inc': data})
-            if result.matched_count == 0:
-                self.db.balances.insert_one({
-                    '_id': str(uuid4()),
-                    **query,
-                    **data
-                })
-
-        logger.debug('increment_balances:\n{}'.format(tabulate(increments)))
+        self.storage.increment_balances(api_key, increments)
+        self.after_increment_balances(increments)
 
     def on_order_closed(self, order: dict):
-        increments = defaultdict(lambda: defaultdict(Decimal))
-
-        if order['direction'] == OrderDirection.BUY:
-            increments[order['base_currency']]['frozen'] = -order['reserved']
-            increments[order['base_currency']]['available'] = order['reserved'] - order['total']
-            increments[order['market_currency']]['available'] = order['executed_amount']
-        else:
-            increments[order['market_currency']]['frozen'] = -order['reserved']
-            increments[order['market_currency']]['available'] = order['reserved'] - order['executed_amount']
-            increments[order['base_currency']]['available'] = order['total']
-
-        increments[order['fee_currency']]['frozen'] -= order['reserved_fee']
-        increments[order['fee_currency']]['available'] += order['reserved_fee'] - order['fee']
+        increments = get_order_closed_increments(order)
         self.increment_balances(order['api_key'], increments)
+        return increments
 
     def on_order_opened(self, order: dict):
-        increments = defaultdict(lambda: defaultdict(Decimal))
-
-        if order['direction'] == OrderDirection.BUY:
-            increments[order['base_currency']]['frozen'] = order['reserved']
-            increments[order['base_currency']]['available'] = -order['reserved']
-        else:
-            increments[order['market_currency']]['frozen'] = order['reserved']
-            increments[order['market_currency']]['available'] = -order['reserved']
-
-        increments[order['fee_currency']]['frozen'] += order['reserved_fee']
-        increments[order['fee_currency']]['available'] -= order['reserved_fee']
+        increments = get_order_opened_increments(order)
         self.increment_balances(order['api_key'], increments)
+        return increments
 
     def on_transaction_submitted(self, transaction: dict):
-        increments = defaultdict(lambda: defaultdict(Decimal))
-
-        if transaction['type'] == TransactionType.WITHDRAWAL:
-            increments[transaction['currency']]['available'] = -transaction['amount']
-            key = 'frozen'
-        else:
-            key = 'pending'
-
-        increments[transaction['currency']][key] = transaction['amount']
+        increments = get_transaction_submitted_increments(transaction)
         self.increment_balances(transaction['api_key'], increments)
+        return increments
 
     def on_transaction_confirmed(self, transaction: dict):
-        increments = defaultdict(lambda: defaultdict(Decimal))
-
-        if transaction['type'] == TransactionType.WITHDRAWAL:
-            key = 'frozen'
-        else:
-            key = 'pending'
-            increments[transaction['currency']]['available'] = transaction['amount']
-
-        increments[transaction['currency']][key] = -transaction['amount']
+        increments = get_transaction_confirmed_increments(transaction)
         self.increment_balances(transaction['api_key'], increments)
+        return increments
 
     def deposit(self, api_key, currency, quantity: Decimal):
-        transaction = self.send_transaction(
-            api_key=api_key,
-            number=str(uuid4()),
-            type=TransactionType.DEPOSIT,
-            currency=currency,
-            amount=quantity,
-            address=None,
-            status=TransactionStatus.CONFIRMED,
-            updated_at=datetime.utcnow(),
-            fee=Decimal()
+        transaction = make_deposit(api_key, currency, quantity, created_at=self.clock.utcnow())
+        self.storage.insert_transaction(transaction)
+
+        increments = merge_increments(
+            self.on_transaction_submitted(transaction),
+            self.on_transaction_confirmed(transaction)
         )
-        self.on_transaction_confirmed(transaction)
+        self.record(EventType.DEPOSIT, api_key, transaction=transaction, increments=increments)
+        self.after_deposit(transaction)
+        return transaction
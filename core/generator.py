@@ -0,0 +1,242 @@
+import logging
+import threading
+import numpy as np
+import simplejson as json
+from cachetools import LRUCache
+from datetime import datetime
+
+from core import clock
+from core.payload import Payload
+
+logger = logging.getLogger('testex')
+
+
+class GeneratorParams:
+    TICK_INTERVAL = 1.  # seconds
+    MAX_STEPS = 600  # steps simulated at once, longer idle periods are skipped
+    PROCESS = 'gbm'
+    DRIFT = 0.  # per day
+    VOLATILITY = 0.05  # per sqrt(day)
+    MEAN_REVERSION = 4.  # per day, ou process only
+    SPREAD = 0.002
+    LEVEL_STEP = 0.001
+    DEPTH = 50
+    TAPE_SIZE = 200
+    BUCKET_INTERVAL = 300  # seconds
+    BUCKETS = 288  # 24h
+    RENDER_CACHE_SIZE = 1024
+    TRADE_VALUE = {'BTC': 0.05, 'ETH': 1., 'USDT': 200.}  # mean trade value in base currency
+    MARKETS = {
+        ('BTC', 'ETH'): 0.028,
+        ('BTC', 'LTC'): 0.0083,
+        ('BTC', 'XRP'): 0.000088,
+        ('BTC', 'DASH'): 0.021,
+        ('BTC', 'DOGE'): 0.00000066,
+        ('BTC', 'XMR'): 0.013,
+        ('ETH', 'LTC'): 0.29,
+        ('USDT', 'BTC'): 3450.,
+        ('USDT', 'ETH'): 96.,
+    }
+    CURRENCIES = {
+        'BTC': ('Bitcoin', 0.0005),
+        'ETH': ('Ethereum', 0.006),
+        'LTC': ('Litecoin', 0.01),
+        'XRP': ('Ripple', 1.),
+        'DASH': ('Dash', 0.05),
+        'DOGE': ('Dogecoin', 2.),
+        'XMR': ('Monero', 0.04),
+        'USDT': ('Tether', 5.),
+    }
+
+
+def simulate_gbm(log_price, anchor, z, dt, drift, volatility, mean_reversion):
+    return log_price + np.cumsum((drift - volatility ** 2 / 2) * dt + volatility * np.sqrt(dt) * z, axis=0)
+
+
+def simulate_ou(log_price, anchor, z, dt, drift, volatility, mean_reversion):
+    decay = np.exp(-mean_reversion * dt)
+    noise = volatility * np.sqrt((1 - decay ** 2) / (2 * mean_reversion)) * z
+    path = np.empty_like(z)
+    for i in range(len(z)):
+        log_price = anchor + (log_price - anchor) * decay + noise[i]
+        path[i] = log_price
+    return path
+
+
+processes = dict(
+    gbm=simulate_gbm,
+    ou=simulate_ou
+)
+
+
+class MarketGenerator:
+
+    def __init__(self, markets=None, process=GeneratorParams.PROCESS, drift=GeneratorParams.DRIFT,
+                 volatility=GeneratorParams.VOLATILITY, mean_reversion=GeneratorParams.MEAN_REVERSION,
+                 tick_interval=GeneratorParams.TICK_INTERVAL, seed=None, timer=clock.now):
+        markets = markets or GeneratorParams.MARKETS
+        self.names = sorted(markets)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.currencies = sorted(set(currency for name in self.names for currency in name))
+        self.simulate = processes[process]
+        self.drift = drift
+        self.volatility = volatility
+        self.mean_reversion = mean_reversion
+        self.tick_interval = tick_interval
+        self.timer = timer
+        self.seed = seed if seed is not None else int(np.random.SeedSequence().entropy % 2 ** 32)
+        self.rng = np.random.default_rng(self.seed)
+        self.lock = threading.Lock()
+
+        size = len(self.names)
+        self.anchor = np.log([markets[name] for name in self.names])
+        self.log_price = self.anchor.copy()
+        self.trade_value = np.array([GeneratorParams.TRADE_VALUE.get(base, 1.) for base, _ in self.names])
+
+        self.tape_time = np.zeros(GeneratorParams.TAPE_SIZE)
+        self.tape_step = np.full(GeneratorParams.TAPE_SIZE, -1, dtype=np.int64)
+        self.tape_price = np.zeros((GeneratorParams.TAPE_SIZE, size))
+        self.tape_quantity = np.zeros((GeneratorParams.TAPE_SIZE, size))
+        self.tape_buy = np.zeros((GeneratorParams.TAPE_SIZE, size), dtype=bool)
+
+        self.bucket_id = np.full(GeneratorParams.BUCKETS, -1, dtype=np.int64)
+        self.bucket_open = np.zeros((GeneratorParams.BUCKETS, size))
+        self.bucket_high = np.zeros((GeneratorParams.BUCKETS, size))
+        self.bucket_low = np.zeros((GeneratorParams.BUCKETS, size))
+        self.bucket_volume = np.zeros((GeneratorParams.BUCKETS, size))
+        self.bucket_base_volume = np.zeros((GeneratorParams.BUCKETS, size))
+
+        now = self.timer()
+        self.created_at = datetime.utcfromtimestamp(now)
+        self.steps = 0
+        self.updated_at = now - GeneratorParams.TAPE_SIZE * tick_interval
+        self.advance(now)
+
+    @property
+    def price(self) -> np.ndarray:
+        return np.exp(self.log_price)
+
+    def advance(self, now=None) -> int:
+        with self.lock:
+            now = self.timer() if now is None else now
+            pending = int((now - self.updated_at) // self.tick_interval)
+            if pending > 0:
+                count = min(pending, GeneratorParams.MAX_STEPS)
+                times = self.updated_at + self.tick_interval * np.arange(pending - count + 1, pending + 1)
+                self.step(times)
+                self.updated_at += pending * self.tick_interval
+            return self.steps
+
+    def step(self, times: np.ndarray):
+        z = self.rng.standard_normal((len(times), len(self.names)))
+        dt = self.tick_interval / 86400
+        path = self.simulate(self.log_price, self.anchor, z, dt, self.drift, self.volatility, self.mean_reversion)
+        prices = np.exp(path)
+        quantities = self.trade_value / prices * self.rng.lognormal(0., 1., size=prices.shape)
+        buys = np.diff(path, axis=0, prepend=self.log_price[np.newaxis, :]) >= 0
+
+        tail = slice(-GeneratorParams.TAPE_SIZE, None)
+        steps = self.steps + np.arange(1, len(times) + 1)
+        slots = steps[tail] % GeneratorParams.TAPE_SIZE
+        self.tape_time[slots] = times[tail]
+        self.tape_step[slots] = steps[tail]
+        self.tape_price[slots] = prices[tail]
+        self.tape_quantity[slots] = quantities[tail]
+        self.tape_buy[slots] = buys[tail]
+
+        bucket_ids = (times // GeneratorParams.BUCKET_INTERVAL).astype(np.int64)
+        for bucket_id in np.unique(bucket_ids[-GeneratorParams.BUCKETS:]):
+            rows = bucket_ids == bucket_id
+            slot = bucket_id % GeneratorParams.BUCKETS
+            if self.bucket_id[slot] != bucket_id:
+                self.bucket_id[slot] = bucket_id
+                self.bucket_open[slot] = prices[rows][0]
+                self.bucket_high[slot] = prices[rows].max(axis=0)
+                self.bucket_low[slot] = prices[rows].min(axis=0)
+                self.bucket_volume[slot] = 0.
+                self.bucket_base_volume[slot] = 0.
+            else:
+                self.bucket_high[slot] = np.maximum(self.bucket_high[slot], prices[rows].max(axis=0))
+                self.bucket_low[slot] = np.minimum(self.bucket_low[slot], prices[rows].min(axis=0))
+            self.bucket_volume[slot] += quantities[rows].sum(axis=0)
+            self.bucket_base_volume[slot] += (quantities[rows] * prices[rows]).sum(axis=0)
+
+        self.log_price = path[-1]
+        self.steps = int(steps[-1])
+
+    def get_summaries(self) -> dict:
+        with self.lock:
+            price = self.price
+            current = int(self.updated_at // GeneratorParams.BUCKET_INTERVAL)
+            valid = self.bucket_id > current - GeneratorParams.BUCKETS
+            if not valid.any():
+                return dict(last=price, high=price, low=price, volume=np.zeros_like(price),
+                            base_volume=np.zeros_like(price), prev_day=price, bid=self.best_bid(price),
+                            ask=self.best_ask(price))
+            oldest = np.flatnonzero(valid)[np.argmin(self.bucket_id[valid])]
+            return dict(
+                last=price,
+                high=np.maximum(self.bucket_high[valid].max(axis=0), price),
+                low=np.minimum(self.bucket_low[valid].min(axis=0), price),
+                volume=self.bucket_volume[valid].sum(axis=0),
+                base_volume=self.bucket_base_volume[valid].sum(axis=0),
+                prev_day=self.bucket_open[oldest],
+                bid=self.best_bid(price),
+                ask=self.best_ask(price)
+            )
+
+    @staticmethod
+    def best_bid(price):
+        return price * (1 - GeneratorParams.SPREAD / 2)
+
+    @staticmethod
+    def best_ask(price):
+        return price * (1 + GeneratorParams.SPREAD / 2)
+
+    def get_order_book(self, index, depth=GeneratorParams.DEPTH) -> (np.ndarray, np.ndarray, np.ndarray, np.ndarray):
+        with self.lock:
+            price = np.exp(self.log_price[index])
+            rng = np.random.default_rng([self.seed, self.steps, index])
+        levels = np.arange(depth)
+        bids = self.best_bid(price) * (1 - GeneratorParams.LEVEL_STEP) ** levels
+        asks = self.best_ask(price) * (1 + GeneratorParams.LEVEL_STEP) ** levels
+        quantities = self.trade_value[index] / price * rng.lognormal(1., 1., size=(2, depth)) * (1 + levels / 10)
+        return bids, quantities[0], asks, quantities[1]
+
+    def get_trades(self, index, start=None, end=None) -> list:
+        with self.lock:
+            valid = self.tape_step >= 0
+            if start is not None:
+                valid &= self.tape_time >= start
+            if end is not None:
+                valid &= self.tape_time <= end
+            rows = np.flatnonzero(valid)
+            rows = rows[np.argsort(-self.tape_step[rows])]
+            return list(zip(
+                (self.tape_step[rows] * len(self.names) + index).tolist(),
+                self.tape_time[rows].tolist(),
+                self.tape_price[rows, index].tolist(),
+                self.tape_quantity[rows, index].tolist(),
+                self.tape_buy[rows, index].tolist()
+            ))
+
+
+class RenderCache:
+
+    def __init__(self, generator: MarketGenerator, maxsize=GeneratorParams.RENDER_CACHE_SIZE):
+        self.generator = generator
+        self.entries = LRUCache(maxsize=maxsize)
+        self.lock = threading.Lock()
+
+    def get_value(self, key, build):
+        steps = self.generator.advance()
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None or entry[0] != steps:
+            entry = (steps, build())
+            with self.lock:
+                self.entries[key] = entry
+        return entry[1]
+
+    def get(self, key, build) -> Payload:
+        return self.get_value(('payload', key), lambda: Payload(json.dumps(build()).encode()))
@@ -11,8 +11,12 @@ from typing import List
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 from decimal import Decimal
-from bson import Decimal128
+from bson import Decimal128, Int64
+from collections.abc import Mapping
 from hashlib import sha256
+from flask import request
+
+from core.payload import Payload
 
 
 address_prefixes = {
@@ -41,6 +45,26 @@ def dec128_to_dec(value):
     return value
 
 
+def dec_to_fixed(value, precision=8):
+    if isinstance(value, Decimal):
+        return Int64(value.scaleb(precision).to_integral_value())
+    return value
+
+
+def fixed_to_dec(value, precision=8):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return Decimal(value).scaleb(-precision)
+    return dec128_to_dec(value)
+
+
+def obj_dec_to_fixed(obj: dict, fields=()) -> dict:
+    return {k: dec_to_fixed(v) if k in fields else dec_to_dec128(v) for k, v in obj.items()}
+
+
+def obj_fixed_to_dec(obj: Mapping, fields=()) -> dict:
+    return {k: fixed_to_dec(v) if k in fields else dec128_to_dec(v) for k, v in obj.items()}
+
+
 def obj_dec128_to_dec(obj: dict) -> dict:
     return {k: dec128_to_dec(v) for k, v in obj.items()}
 
@@ -53,7 +77,24 @@ def obj_list_dec128_to_dec(obj_list: List[dict]) -> List[dict]:
     return list(map(obj_dec128_to_dec, obj_list))
 
 
-def requests_retry_session(retries=3, backoff_factor=0.3, status_forcelist=(500, 502, 504), session=None):
+def doc_dec_to_dec128(value):
+    if isinstance(value, Mapping):
+        return {k: doc_dec_to_dec128(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return list(map(doc_dec_to_dec128, value))
+    return dec_to_dec128(value)
+
+
+def doc_dec128_to_dec(value):
+    if isinstance(value, dict):
+        return {k: doc_dec128_to_dec(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return list(map(doc_dec128_to_dec, value))
+    return dec128_to_dec(value)
+
+
+def requests_retry_session(retries=3, backoff_factor=0.3, status_forcelist=(500, 502, 504), session=None,
+                           pool_connections=10, pool_maxsize=10):
     session = session or requests.Session()
     retry = Retry(
         total=retries,
@@ -62,14 +103,30 @@ def requests_retry_session(retries=3, backoff_factor=0.3, status_forcelist=(500,
         backoff_factor=backoff_factor,
         status_forcelist=status_forcelist,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
     session.mount('http://', adapter)
     session.mount('https://', adapter)
     return session
 
 
+def make_payload_response(payload: Payload):
+    headers = {'content-type': 'application/json', 'vary': 'Accept-Encoding'}
+    gzipped = payload.gzipped if 'gzip' in request.accept_encodings else None
+    headers['etag'] = payload.gzip_etag if gzipped else payload.etag
+
+    if payload.status_code == 200 and request.if_none_match.contains_raw(headers['etag']):
+        return b'', 304, headers
+
+    if gzipped:
+        headers['content-encoding'] = 'gzip'
+        return gzipped, payload.status_code, headers
+    return payload.content, payload.status_code, headers
+
+
 def make_flask_response(response):
     headers = {'content-type': 'application/json'}
+    if isinstance(response, Payload):
+        return make_payload_response(response)
     if isinstance(response, requests.Response):
         return response.content, response.status_code, headers
     if isinstance(response, dict):
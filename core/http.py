@@ -0,0 +1,102 @@
+import logging
+import threading
+import requests
+from collections import defaultdict
+from typing import Dict
+from urllib.parse import urlsplit
+
+from core.helpers import requests_retry_session
+from core.replay import HistoryRecorder, HistoryReplay
+
+logger = logging.getLogger('testex')
+
+
+class UpstreamSessionsParams:
+    POOL_SIZE = 10  # connections per host
+    CONNECT_TIMEOUT = 3.05  # seconds
+    READ_TIMEOUT = 10.  # seconds
+    RETRIES = 3
+    BACKOFF_FACTOR = 0.3
+
+
+class UpstreamSessions:
+
+    def __init__(self, pool_size=UpstreamSessionsParams.POOL_SIZE,
+                 connect_timeout=UpstreamSessionsParams.CONNECT_TIMEOUT,
+                 read_timeout=UpstreamSessionsParams.READ_TIMEOUT,
+                 retries=UpstreamSessionsParams.RETRIES,
+                 backoff_factor=UpstreamSessionsParams.BACKOFF_FACTOR):
+        self.sessions = dict()  # type: Dict[str, requests.Session]
+        self.lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.recorder = None  # type: HistoryRecorder
+        self.replay = None  # type: HistoryReplay
+        self.configure(pool_size, connect_timeout, read_timeout, retries, backoff_factor)
+
+    def configure(self, pool_size=None, connect_timeout=None, read_timeout=None, retries=None,
+                  backoff_factor=None, recorder=None, replay=None):
+        self.pool_size = pool_size or UpstreamSessionsParams.POOL_SIZE
+        self.timeout = (
+            connect_timeout or UpstreamSessionsParams.CONNECT_TIMEOUT,
+            read_timeout or UpstreamSessionsParams.READ_TIMEOUT
+        )
+        self.retries = UpstreamSessionsParams.RETRIES if retries is None else retries
+        self.backoff_factor = backoff_factor or UpstreamSessionsParams.BACKOFF_FACTOR
+        self.recorder = recorder
+        self.replay = replay
+        self.close()
+
+    def get_session(self, host) -> requests.Session:
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = self.sessions[host] = requests_retry_session(
+                    retries=self.retries,
+                    backoff_factor=self.backoff_factor,
+                    pool_connections=1,
+                    pool_maxsize=self.pool_size
+                )
+                logger.debug('get_session: new pool for {}'.format(host))
+            return session
+
+    def get(self, url, **kwargs) -> requests.Response:
+        if self.replay is not None:
+            return self.replay.get(url, kwargs.get('params'))
+
+        host = urlsplit(url).netloc
+        kwargs.setdefault('timeout', self.timeout)
+        self.requests[host] += 1
+        try:
+            response = self.get_session(host).get(url=url, **kwargs)
+        except requests.RequestException:
+            self.errors[host] += 1
+            raise
+
+        if self.recorder is not None:
+            self.recorder.record(url, kwargs.get('params'), response)
+        return response
+
+    def get_stats(self) -> dict:
+        stats = dict()
+        with self.lock:
+            for host, session in self.sessions.items():
+                pools = session.get_adapter('https://{}'.format(host)).poolmanager.pools
+                connection_pools = [pools[key] for key in pools.keys()]
+                stats[host] = dict(
+                    requests=self.requests[host],
+                    errors=self.errors[host],
+                    connections=sum(pool.num_connections for pool in connection_pools),
+                    idle_connections=sum(pool.pool.qsize() for pool in connection_pools if pool.pool),
+                    pool_size=self.pool_size
+                )
+        return stats
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+
+upstream = UpstreamSessions()
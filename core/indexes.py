@@ -0,0 +1,113 @@
+import logging
+from pymongo import IndexModel, ASCENDING
+from pymongo.database import Database
+from pymongo.errors import OperationFailure
+
+from core.nonces import NonceStoreParams
+from core.schema import OrderStatus, TransactionStatus
+
+logger = logging.getLogger('testex')
+
+INDEXES = {
+    'orders': [
+        IndexModel(
+            [('status', ASCENDING), ('created_at', ASCENDING)],
+            name='opened_status_created_at',
+            partialFilterExpression={'status': OrderStatus.OPENED}
+        ),
+        IndexModel(
+            [('api_key', ASCENDING), ('status', ASCENDING), ('market', ASCENDING)],
+            name='api_key_status_market'
+        )
+    ],
+    'trades': [
+        IndexModel(
+            [('api_key', ASCENDING), ('market', ASCENDING), ('created_at', ASCENDING)],
+            name='api_key_market_created_at'
+        ),
+        IndexModel(
+            [('api_key', ASCENDING), ('order_number', ASCENDING), ('created_at', ASCENDING)],
+            name='api_key_order_number_created_at'
+        )
+    ],
+    'transactions': [
+        IndexModel(
+            [('status', ASCENDING)],
+            name='unconfirmed_status',
+            partialFilterExpression={'status': {'$in': TransactionStatus.UNCONFIRMED}}
+        ),
+        IndexModel(
+            [('api_key', ASCENDING), ('type', ASCENDING), ('currency', ASCENDING), ('created_at', ASCENDING)],
+            name='api_key_type_currency_created_at'
+        )
+    ],
+    'balances': [
+        IndexModel(
+            [('api_key', ASCENDING), ('currency', ASCENDING)],
+            name='api_key_currency',
+            unique=True
+        )
+    ],
+    'nonces': [
+        IndexModel(
+            [('updated_at', ASCENDING)],
+            name='updated_at_ttl',
+            expireAfterSeconds=NonceStoreParams.TTL
+        )
+    ],
+    'journal': [
+        IndexModel(
+            [('created_at', ASCENDING)],
+            name='created_at'
+        )
+    ],
+    'snapshot_chunks': [
+        IndexModel(
+            [('snapshot_id', ASCENDING)],
+            name='snapshot_id'
+        )
+    ]
+}
+
+
+def ensure_indexes(db: Database, indexes=None):
+    for collection, models in (indexes or INDEXES).items():
+        for model in models:
+            try:
+                db[collection].create_indexes([model])
+            except OperationFailure as e:
+                logger.warning('ensure_indexes: {}.{} not created: {}'.format(
+                    collection, model.document['name'], e))
+
+    logger.info('ensure_indexes: {} collections indexed'.format(len(indexes or INDEXES)))
+
+
+def get_index_usage(db: Database, collection) -> dict:
+    try:
+        stats = db[collection].aggregate([{'$indexStats': {}}])
+    except (OperationFailure, NotImplementedError):
+        return dict()
+    return {item['name']: item['accesses']['ops'] for item in stats}
+
+
+def get_index_report(db: Database, indexes=None) -> list:
+    report = list()
+    for collection, models in (indexes or INDEXES).items():
+        declared = [model.document['name'] for model in models]
+        existing = db[collection].index_information()
+        usage = get_index_usage(db, collection)
+
+        for name in declared:
+            if name not in existing:
+                report.append((collection, name, 'missing', None))
+
+        for name in existing:
+            if name == '_id_':
+                continue
+            status = 'declared' if name in declared else 'undeclared'
+            ops = usage.get(name)
+            if ops == 0:
+                status = 'unused'
+            report.append((collection, name, status, ops))
+
+    return report
@@ -0,0 +1,293 @@
+import logging
+import threading
+import time
+from uuid import uuid4
+from contextlib import contextmanager
+from copy import deepcopy
+from pymongo import ReturnDocument, DESCENDING
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError
+from typing import List
+
+from core.clock import utcnow
+from core.helpers import doc_dec_to_dec128, doc_dec128_to_dec, mongo_auto_reconnect
+from core.schema import EventType, Journal, Storage
+from core.storage.memory import MemoryStorage
+
+logger = logging.getLogger('testex')
+
+
+class JournalParams:
+    SNAPSHOT_INTERVAL = 10000  # events
+    SNAPSHOT_CHUNK_SIZE = 1000  # documents
+    SNAPSHOTS_KEPT = 10
+    REPLAY_BATCH_SIZE = 1000  # events
+    WRITER_TIMEOUT = 300  # seconds, longer than any retried insert
+
+
+def apply_event(storage: Storage, event: dict):
+    if event['type'] == EventType.ORDER_OPENED:
+        storage.insert_order(event['order'])
+    elif event['type'] == EventType.ORDER_CLOSED:
+        if event.get('fields'):
+            storage.update_order(event['api_key'], event['number'], fields=event['fields'])
+    elif event['type'] == EventType.TRADE:
+        storage.insert_trade(event['trade'])
+        if event.get('inc') or event.get('fields'):
+            storage.update_order(
+                api_key=event['api_key'],
+                number=event['trade']['order_number'],
+                inc=event.get('inc'),
+                fields=event.get('fields')
+            )
+    elif event['type'] in [EventType.TRANSACTION_SUBMITTED, EventType.DEPOSIT]:
+        storage.insert_transaction(event['transaction'])
+    elif event['type'] == EventType.TRANSACTION_CONFIRMED:
+        storage.update_transaction(event['api_key'], event['number'], fields=event['fields'])
+    else:
+        raise NotImplementedError(event['type'])
+
+    if event.get('increments'):
+        storage.increment_balances(event['api_key'], event['increments'])
+
+
+def restore(storage: Storage, journal: Journal, until=None, last_seq=None) -> int:
+    snapshot = journal.get_snapshot(until=until)
+    if snapshot:
+        storage.load(snapshot['data'])
+        seq = snapshot['_id']
+    else:
+        storage.load(dict())
+        seq = 0
+
+    events = journal.get_events(after=seq, until=until, last_seq=last_seq)
+    for i in range(0, len(events), JournalParams.REPLAY_BATCH_SIZE):
+        with storage.batch():
+            for event in events[i:i + JournalParams.REPLAY_BATCH_SIZE]:
+                apply_event(storage, event)
+                seq = event['_id']
+
+    logger.info('restore: {} events replayed up to #{}'.format(len(events), seq))
+    return seq
+
+
+def take_snapshot(journal: Journal) -> int:
+    storage = MemoryStorage()
+    # events above the committed seq may still be missing lower seqs, which a snapshot would skip forever
+    seq = restore(storage, journal, last_seq=journal.get_committed_seq())
+    journal.save_snapshot(seq, storage.dump())
+    return seq
+
+
+def is_snapshot_due(journal: Journal, interval=JournalParams.SNAPSHOT_INTERVAL) -> bool:
+    return journal.get_last_seq() - journal.get_snapshot_seq() >= interval
+
+
+class MemoryJournal(Journal):
+
+    def __init__(self):
+        self.events = list()  # type: List[dict]
+        self.snapshots = list()  # type: List[dict]
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def batch(self):
+        yield None
+
+    def append(self, _type, api_key, **payload) -> dict:
+        with self.lock:
+            event = deepcopy(dict(
+                _id=len(self.events) + 1,
+                type=_type,
+                api_key=api_key,
+                created_at=utcnow(),
+                **payload
+            ))
+            self.events.append(event)
+            return event
+
+    def get_events(self, after=0, until=None, last_seq=None) -> List[dict]:
+        events = self.events[after:last_seq]
+        if until:
+            events = [event for event in events if event['created_at'] <= until]
+        return deepcopy(events)
+
+    def get_last_seq(self) -> int:
+        return len(self.events)
+
+    def get_committed_seq(self) -> int:
+        return len(self.events)
+
+    def save_snapshot(self, seq, data: dict):
+        with self.lock:
+            self.snapshots.append(deepcopy(dict(
+                _id=seq,
+                created_at=utcnow(),
+                data=data
+            )))
+            del self.snapshots[:-JournalParams.SNAPSHOTS_KEPT]
+
+    def get_snapshot(self, until=None) -> dict:
+        for snapshot in reversed(self.snapshots):
+            if not until or snapshot['created_at'] <= until:
+                return deepcopy(snapshot)
+
+    def get_snapshot_seq(self) -> int:
+        return self.snapshots[-1]['_id'] if self.snapshots else 0
+
+
+class MongoJournal(Journal):
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.local = threading.local()
+        self.known_seq = 0  # any seen counter value is a lower bound for the next allocated block
+
+    @property
+    def pending(self) -> List[dict]:
+        return getattr(self.local, 'pending', None)
+
+    @mongo_auto_reconnect
+    def allocate_seqs(self, token, count) -> int:
+        # the writer entry is pushed in the same update, so an allocated block is always visible until released
+        counter = self.db.counters.find_one_and_update(
+            filter={'_id': 'journal'},
+            update={
+                '$inc': {'seq': count},
+                '$push': {'writers': {'token': token, 'floor': self.known_seq, 'at': time.time()}}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self.known_seq = max(self.known_seq, counter['seq'])
+        return counter['seq'] - count + 1
+
+    @mongo_auto_reconnect
+    def release_seqs(self, token):
+        self.db.counters.update_one({'_id': 'journal'}, {'$pull': {'writers': {'token': token}}})
+
+    @mongo_auto_reconnect
+    def insert_events(self, events: List[dict]):
+        # seqs are fixed before the first attempt, so a retry only inserts what is missing
+        try:
+            self.db.journal.insert_many(list(map(doc_dec_to_dec128, events)), ordered=False)
+        except BulkWriteError as e:
+            if any(error['code'] != 11000 for error in e.details['writeErrors']):
+                raise
+
+    def write(self, events: List[dict]):
+        # seqs are allocated at write time, so an event never gets a lower seq than the events it depends on
+        token = uuid4().hex
+        first = self.allocate_seqs(token, len(events))
+        for seq, event in enumerate(events, start=first):
+            event['_id'] = seq
+        try:
+            self.insert_events(events)
+        finally:
+            self.release_seqs(token)
+
+    @contextmanager
+    def batch(self):
+        if self.pending is not None:
+            yield self.pending
+            return
+
+        self.local.pending = list()
+        try:
+            yield self.local.pending
+        finally:
+            events, self.local.pending = self.local.pending, None
+            if events:
+                self.write(events)
+
+    def append(self, _type, api_key, **payload) -> dict:
+        event = dict(
+            type=_type,
+            api_key=api_key,
+            created_at=utcnow(),
+            **payload
+        )
+        if self.pending is not None:
+            self.pending.append(event)
+        else:
+            self.write([event])
+        return event
+
+    @mongo_auto_reconnect
+    def get_events(self, after=0, until=None, last_seq=None) -> List[dict]:
+        query = {'_id': {'$gt': after}}
+        if last_seq is not None:
+            query['_id']['$lte'] = last_seq
+        if until:
+            query['created_at'] = {'$lte': until}
+        return list(map(doc_dec128_to_dec, self.db.journal.find(query).sort('_id')))
+
+    @mongo_auto_reconnect
+    def get_last_seq(self) -> int:
+        counter = self.db.counters.find_one({'_id': 'journal'})
+        return counter['seq'] if counter else 0
+
+    @mongo_auto_reconnect
+    def get_committed_seq(self) -> int:
+        counter = self.db.counters.find_one({'_id': 'journal'})
+        if not counter:
+            return 0
+
+        # writers that outlived every retry have crashed, their unwritten seqs are gaps
+        expired_at = time.time() - JournalParams.WRITER_TIMEOUT
+        floors = [writer['floor'] for writer in counter.get('writers', []) if writer['at'] > expired_at]
+        return min([counter['seq']] + floors)
+
+    @mongo_auto_reconnect
+    def save_snapshot(self, seq, data: dict):
+        for collection, documents in data.items():
+            for i in range(0, len(documents), JournalParams.SNAPSHOT_CHUNK_SIZE):
+                # deterministic ids make saving the same snapshot twice idempotent
+                self.db.snapshot_chunks.replace_one(
+                    filter={'_id': '{}:{}:{}'.format(seq, collection, i)},
+                    replacement=doc_dec_to_dec128(dict(
+                        snapshot_id=seq,
+                        collection=collection,
+                        offset=i,
+                        documents=documents[i:i + JournalParams.SNAPSHOT_CHUNK_SIZE]
+                    )),
+                    upsert=True
+                )
+
+        self.db.snapshots.replace_one(
+            filter={'_id': seq},
+            replacement=dict(
+                created_at=utcnow(),
+                counts={collection: len(documents) for collection, documents in data.items()}
+            ),
+            upsert=True
+        )
+
+        expired = self.db.snapshots.find().sort('_id', DESCENDING).skip(JournalParams.SNAPSHOTS_KEPT)
+        expired_ids = [snapshot['_id'] for snapshot in expired]
+        if expired_ids:
+            self.db.snapshots.delete_many({'_id': {'$in': expired_ids}})
+            self.db.snapshot_chunks.delete_many({'snapshot_id': {'$in': expired_ids}})
+
+        expired_at = time.time() - JournalParams.WRITER_TIMEOUT
+        self.db.counters.update_one({'_id': 'journal'}, {'$pull': {'writers': {'at': {'$lte': expired_at}}}})
+
+        logger.info('save_snapshot: #{} saved'.format(seq))
+
+    @mongo_auto_reconnect
+    def get_snapshot(self, until=None) -> dict:
+        query = {'created_at': {'$lte': until}} if until else {}
+        snapshots = list(self.db.snapshots.find(query).sort('_id', DESCENDING).limit(1))
+        if not snapshots:
+            return None
+
+        snapshot = snapshots[0]
+        snapshot['data'] = {collection: list() for collection in snapshot.pop('counts')}
+        for chunk in self.db.snapshot_chunks.find({'snapshot_id': snapshot['_id']}).sort('offset'):
+            snapshot['data'][chunk['collection']].extend(doc_dec128_to_dec(chunk['documents']))
+        return snapshot
+
+    @mongo_auto_reconnect
+    def get_snapshot_seq(self) -> int:
+        snapshots = list(self.db.snapshots.find().sort('_id', DESCENDING).limit(1))
+        return snapshots[0]['_id'] if snapshots else 0
@@ -0,0 +1,291 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from decimal import Decimal
+from functools import wraps
+from queue import Queue
+from typing import Dict, List
+
+from core.executor import SimpleExecutor, get_remaining_amount
+from core.scheduler import MongoLease
+from core.schema import OrderDirection, OrderStatus, EventType, Order
+
+logger = logging.getLogger('testex')
+
+
+class PriceLevels:
+
+    def __init__(self, descending=False):
+        self.descending = descending
+        self.prices = list()  # type: List[Decimal]
+        self.levels = dict()  # type: Dict[Decimal, OrderedDict]
+
+    def __len__(self):
+        return len(self.prices)
+
+    def best_price(self):
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.descending else self.prices[0]
+
+    def best_order(self):
+        price = self.best_price()
+        if price is None:
+            return None
+        return next(iter(self.levels[price].values()))
+
+    def add(self, order: dict):
+        level = self.levels.get(order['price'])
+        if level is None:
+            level = self.levels[order['price']] = OrderedDict()
+            insort(self.prices, order['price'])
+        level[order['_id']] = order
+
+    def remove(self, order: dict) -> bool:
+        level = self.levels.get(order['price'])
+        if level is None or order['_id'] not in level:
+            return False
+
+        del level[order['_id']]
+        if not level:
+            del self.levels[order['price']]
+            del self.prices[bisect_left(self.prices, order['price'])]
+        return True
+
+
+class OrderBook:
+
+    def __init__(self):
+        self.bids = PriceLevels(descending=True)
+        self.asks = PriceLevels()
+
+    def get_side(self, direction) -> PriceLevels:
+        return self.bids if direction == OrderDirection.BUY else self.asks
+
+    def get_opposite_side(self, direction) -> PriceLevels:
+        return self.asks if direction == OrderDirection.BUY else self.bids
+
+    @staticmethod
+    def crosses(order: dict, price) -> bool:
+        if price is None:
+            return False
+        if order['direction'] == OrderDirection.BUY:
+            return order['price'] >= price
+        return order['price'] <= price
+
+    def add(self, order: dict):
+        self.get_side(order['direction']).add(order)
+
+    def remove(self, order: dict) -> bool:
+        return self.get_side(order['direction']).remove(order)
+
+
+class BackgroundWriter:
+
+    def __init__(self):
+        self.queue = Queue()
+        self.thread = None  # type: threading.Thread
+        self.lock = threading.Lock()
+
+    def run(self):
+        while True:
+            f, args = self.queue.get()
+            try:
+                f(*args)
+            except Exception:
+                logger.exception('run: failed to persist')
+            finally:
+                self.queue.task_done()
+
+    def submit(self, f, *args):
+        with self.lock:
+            if not self.thread:
+                self.thread = threading.Thread(target=self.run, name='testex-writer', daemon=True)
+                self.thread.start()
+        self.queue.put((f, args))
+
+    def flush(self):
+        self.queue.join()
+
+
+def flushed(f):
+    @wraps(f)
+    def wrapper(self, *args, **kwargs):
+        self.flush()
+        return f(self, *args, **kwargs)
+    return wrapper
+
+
+class MatchingExecutor(SimpleExecutor):
+
+    def __init__(self, db=None, storage=None, journal=None, clock=None, lease=None):
+        self.books = defaultdict(OrderBook)  # type: Dict[tuple, OrderBook]
+        self.books_loaded = False
+        self.lock = threading.RLock()
+        self.writer = BackgroundWriter()
+        self.lease = lease  # type: MongoLease
+        self.lease_renewed_at = None
+        super(MatchingExecutor, self).__init__(db=db, storage=storage, journal=journal, clock=clock)
+
+    def flush(self):
+        self.writer.flush()
+
+    def ensure_exclusive(self):
+        # the books live in this process only, a second process would match against stale copies of them
+        if self.lease is None:
+            return
+        if self.lease_renewed_at is not None and time.monotonic() - self.lease_renewed_at < self.lease.ttl / 3:
+            return
+        if not self.lease.acquire():
+            raise RuntimeError('ensure_exclusive: the matching executor is running in another process')
+        if self.lease_renewed_at is not None and time.monotonic() - self.lease_renewed_at >= self.lease.ttl:
+            self.books_loaded = False  # another process may have held the lease meanwhile
+        self.lease_renewed_at = time.monotonic()
+
+    def load_books(self):
+        books = defaultdict(OrderBook)
+        for order in self.storage.get_orders(status=OrderStatus.OPENED):
+            # bind custom logic so that fills invalidate the stored derived fields
+            books[order.get('exchange_id'), order['market']].add(self.extend_order(order))
+
+        self.books = books
+        self.books_loaded = True
+        logger.info('load_books: {} books loaded'.format(len(self.books)))
+
+    def get_book(self, exchange_id, market) -> OrderBook:
+        self.ensure_exclusive()
+        if not self.books_loaded:
+            self.load_books()
+        return self.books[exchange_id, market]
+
+    def fill(self, order: dict, amount: Decimal, price: Decimal, created_at: datetime) -> dict:
+        trade = self.make_trade(order, amount=amount, price=price)
+        trade['created_at'] = created_at
+
+        executed_amount = order['executed_amount'] + amount
+        order['average_price'] = \
+            (amount * price + order['executed_amount'] * order.get('average_price', Decimal())) / executed_amount
+        order['executed_amount'] = executed_amount
+        order['updated_at'] = created_at
+        if executed_amount == order['amount']:
+            order['status'] = OrderStatus.CLOSED
+
+        return trade
+
+    def match(self, order: dict):
+        book = self.get_book(order.get('exchange_id'), order['market'])
+        opposite = book.get_opposite_side(order['direction'])
+        makers, taker_trades, maker_trades = list(), list(), list()
+
+        while get_remaining_amount(order) > 0 and book.crosses(order, opposite.best_price()):
+            maker = opposite.best_order()
+            amount = min(get_remaining_amount(order), get_remaining_amount(maker))
+            price = maker['price']
+
+            taker_trades.append(self.fill(order, amount, price, order['created_at']))
+            maker_trades.append(self.fill(maker, amount, price, order['created_at']))
+            makers.append(maker.copy())
+
+            if maker['status'] == OrderStatus.CLOSED:
+                opposite.remove(maker)
+
+        if order['status'] == OrderStatus.OPENED:
+            book.add(order)
+
+        return makers, taker_trades, maker_trades
+
+    def persist_match(self, order: dict, makers: List[dict], taker_trades: List[dict], maker_trades: List[dict]):
+        with self.buffered():
+            order = self.extend_order(order).materialize()
+            self.storage.insert_order(order)
+            increments = self.on_order_opened(order)
+            self.record(EventType.ORDER_OPENED, order['api_key'], order=order, increments=increments)
+
+            for trade in taker_trades:
+                self.storage.insert_trade(trade)
+                self.record(EventType.TRADE, order['api_key'], trade=trade)
+
+            for maker, trade in zip(makers, maker_trades):
+                self.persist_fill(maker, trade)
+
+            if order['status'] == OrderStatus.CLOSED:
+                increments = self.on_order_closed(order)
+                self.record(EventType.ORDER_CLOSED, order['api_key'], number=order['_id'], increments=increments)
+
+    def persist_fill(self, order: dict, trade: dict):
+        order = self.extend_order(order)
+        inc = dict(executed_amount=trade['amount'])
+        fields = dict(
+            average_price=order['average_price'],
+            updated_at=order['updated_at'],
+            status=order['status'],
+            total=order['total'],
+            fee=order['fee'],
+            remaining_amount=order['remaining_amount']
+        )
+        if not self.storage.update_order(api_key=order['api_key'], number=order['_id'], inc=inc, fields=fields,
+                                         cond=dict(status=OrderStatus.OPENED)):
+            logger.warning('persist_fill: {} was closed in storage, fill dropped'.format(order['_id']))
+            return
+        self.storage.insert_trade(trade)
+        self.record(EventType.TRADE, order['api_key'], trade=trade, inc=inc, fields=fields)
+
+        if order['status'] == OrderStatus.CLOSED:
+            increments = self.on_order_closed(order)
+            self.record(EventType.ORDER_CLOSED, order['api_key'], number=order['_id'], increments=increments)
+
+    def execute_orders(self):
+        # orders are matched as soon as they are sent, ticks only keep the lease
+        self.ensure_exclusive()
+
+    def send_order(self, api_key, number, **kwargs):
+        order = Order(
+            _id=number,
+            api_key=api_key,
+            status=OrderStatus.OPENED,
+            created_at=self.clock.utcnow(),
+            executed_amount=Decimal()
+        )
+        order.update(**kwargs)
+
+        with self.lock:
+            makers, taker_trades, maker_trades = self.match(order)
+            order_ex = self.extend_order(order.copy())
+            self.writer.submit(self.persist_match, order.copy(), makers, taker_trades, maker_trades)
+            for trade in taker_trades:
+                self.notify_trade(order, trade)
+            for maker, trade in zip(makers, maker_trades):
+                self.notify_depth(maker, -trade['amount'])
+            if order['status'] == OrderStatus.OPENED:
+                self.notify_depth(order, get_remaining_amount(order))
+
+        logger.info('send_order: {} {} {} at {} {}, {} matched'.format(
+            order['direction'], order['amount'], order['market_currency'],
+            order['price'], order['base_currency'], order_ex['executed_amount']))
+
+        order_ex['resulting_trades'] = taker_trades
+        return order_ex
+
+    def cancel_order(self, api_key, number):
+        with self.lock:
+            self.flush()
+            order = super(MatchingExecutor, self).get_order(api_key, number)
+            if not order:
+                return None
+
+            if order['status'] != OrderStatus.OPENED:
+                return order
+
+            # the order may rest in another process's book, storage has the final say
+            self.get_book(order.get('exchange_id'), order['market']).remove(order)
+            return super(MatchingExecutor, self).cancel_order(api_key, number)
+
+    get_order = flushed(SimpleExecutor.get_order)
+    get_orders = flushed(SimpleExecutor.get_orders)
+    get_transactions = flushed(SimpleExecutor.get_transactions)
+    get_trades = flushed(SimpleExecutor.get_trades)
+    get_balances = flushed(SimpleExecutor.get_balances)
+    get_balance = flushed(SimpleExecutor.get_balance)
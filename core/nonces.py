@@ -0,0 +1,93 @@
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from datetime import datetime
+from hashlib import blake2b
+from pymongo import ReturnDocument
+from pymongo.database import Database
+
+from core.helpers import mongo_auto_reconnect
+from core.schema import NonceStore
+
+
+class NonceStoreParams:
+    SHARED_PATH = '/dev/shm/testex-nonces' if os.path.isdir('/dev/shm') \
+        else os.path.join(tempfile.gettempdir(), 'testex-nonces')
+    SHARED_SLOTS = 65536
+    TTL = 30 * 24 * 3600  # seconds
+
+
+class MemoryNonceStore(NonceStore):
+
+    def __init__(self):
+        self.nonces = dict()
+        self.lock = threading.Lock()
+
+    def check_and_set(self, api_key, nonce: int) -> int:
+        with self.lock:
+            prev_nonce = self.nonces.get(api_key, 0)
+            if nonce > prev_nonce:
+                self.nonces[api_key] = nonce
+            return prev_nonce
+
+
+class SharedNonceStore(NonceStore):
+    slot = struct.Struct('<QQ')  # api key hash, nonce
+
+    def __init__(self, path=NonceStoreParams.SHARED_PATH, slots=NonceStoreParams.SHARED_SLOTS):
+        self.slots = slots
+        self.lock = threading.Lock()
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = slots * self.slot.size
+        if os.fstat(self.fd).st_size < size:
+            os.ftruncate(self.fd, size)
+        self.map = mmap.mmap(self.fd, size)
+
+    @staticmethod
+    def get_key(api_key) -> int:
+        key = int.from_bytes(blake2b(api_key.encode(), digest_size=8).digest(), 'little')
+        return key or 1
+
+    def find_slot(self, key) -> int:
+        index = key % self.slots
+        for _ in range(self.slots):
+            slot_key, _nonce = self.slot.unpack_from(self.map, index * self.slot.size)
+            if slot_key in (key, 0):
+                return index * self.slot.size
+            index = (index + 1) % self.slots
+        raise OverflowError('shared nonce store is full')
+
+    def check_and_set(self, api_key, nonce: int) -> int:
+        key = self.get_key(api_key)
+        with self.lock:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                offset = self.find_slot(key)
+                _key, prev_nonce = self.slot.unpack_from(self.map, offset)
+                if nonce > prev_nonce:
+                    self.slot.pack_into(self.map, offset, key, nonce)
+                return prev_nonce
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+
+class MongoNonceStore(NonceStore):
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    @mongo_auto_reconnect
+    def check_and_set(self, api_key, nonce: int) -> int:
+        prev = self.db.nonces.find_one_and_update(
+            filter={'_id': api_key},
+            update={
+                '$max': {'nonce': nonce},
+                '$set': {'updated_at': datetime.utcnow()}
+            },
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        return prev['nonce'] if prev else 0
@@ -0,0 +1,58 @@
+import gzip
+import threading
+import requests
+import simplejson as json
+from cachetools import LRUCache
+from hashlib import sha1
+
+
+class PayloadParams:
+    GZIP_MIN_SIZE = 1024  # bytes
+    GZIP_LEVEL = 6
+    PARSED_MAXSIZE = 128
+
+
+class Payload:
+    __slots__ = ('content', 'status_code', 'etag', '_gzipped')
+
+    def __init__(self, content: bytes, status_code=200):
+        self.content = content
+        self.status_code = status_code
+        self.etag = '"{}"'.format(sha1(content).hexdigest())
+        self._gzipped = None
+
+    @classmethod
+    def from_response(cls, response: requests.Response):
+        return cls(response.content, response.status_code)
+
+    @property
+    def gzip_etag(self):
+        return self.etag[:-1] + '-gzip"'
+
+    @property
+    def gzipped(self) -> bytes:
+        if len(self.content) < PayloadParams.GZIP_MIN_SIZE:
+            return None
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.content, compresslevel=PayloadParams.GZIP_LEVEL)
+        return self._gzipped
+
+    def __getstate__(self):
+        return self.content, self.status_code
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+
+parsed = LRUCache(maxsize=PayloadParams.PARSED_MAXSIZE)
+parsed_lock = threading.Lock()
+
+
+def parse_payload(payload: Payload):
+    with parsed_lock:
+        data = parsed.get(payload.etag)
+    if data is None:
+        data = json.loads(payload.content, use_decimal=True)
+        with parsed_lock:
+            parsed[payload.etag] = data
+    return data
@@ -2,6 +2,7 @@ from decimal import Decimal, InvalidOperation
 from datetime import datetime
 from uuid import UUID
 
+from core.candles import CandleParams
 from core.poloniex.types import PoloniexParams, PoloniexApiError, PoloniexErrorMessage, PoloniexOrderStatus
 from core.schema import TransactionStatus
 from core.helpers import is_address_valid
@@ -24,6 +25,39 @@ def parse_datetime(timestamp, message='') -> datetime:
     return dt
 
 
+def parse_timestamp(timestamp, message, default=None) -> int:
+    if not timestamp:
+        return default
+
+    try:
+        return int(timestamp)
+    except ValueError:
+        raise PoloniexApiError(message)
+
+
+def parse_period(period) -> int:
+    try:
+        period = int(period)
+    except (ValueError, TypeError):
+        raise PoloniexApiError(PoloniexErrorMessage.INVALID_PERIOD)
+
+    if period not in CandleParams.PERIODS:
+        raise PoloniexApiError(PoloniexErrorMessage.INVALID_PERIOD)
+
+    return period
+
+
+def parse_depth(depth) -> int:
+    try:
+        depth = int(depth)
+        if depth <= 0:
+            raise ValueError
+    except (ValueError, TypeError):
+        depth = PoloniexParams.ORDER_BOOK_DEPTH
+
+    return depth
+
+
 def parse_limit(limit) -> int:
     try:
         limit = int(limit)
@@ -160,3 +194,37 @@ def format_trade(trade: dict) -> dict:
         'category': 'exchange'
     }
     return result
+
+
+def format_resulting_trade(trade: dict) -> dict:
+    result = {
+        'amount': trade['amount'],
+        'date': format_datetime(trade['created_at']),
+        'rate': trade['price'],
+        'total': (trade['price'] * trade['amount']).quantize(PoloniexParams.DECIMAL_SCALE),
+        'tradeID': str(UUID(trade['_id']).int % 1048576),
+        'type': trade['direction']
+    }
+    return result
+
+
+def format_empty_candle() -> dict:
+    return dict(date=0, high=0, low=0, open=0, close=0, volume=0, quoteVolume=0, weightedAverage=0)
+
+
+def format_public_trade(trade: dict) -> dict:
+    trade_id = UUID(trade['_id']).int
+    result = {
+        'globalTradeID': trade_id % 4294967296,
+        'tradeID': trade_id % 1048576,
+        'date': format_datetime(trade['created_at']),
+        'type': trade['direction'],
+        'rate': trade['price'],
+        'amount': trade['amount'],
+        'total': (trade['price'] * trade['amount']).quantize(PoloniexParams.DECIMAL_SCALE)
+    }
+    return result
+
+
+def format_depth_levels(levels: list) -> list:
+    return [['{:.8f}'.format(rate), amount] for rate, amount in levels]
@@ -0,0 +1,148 @@
+from datetime import datetime
+
+from core.generator import GeneratorParams, MarketGenerator, RenderCache
+from core.poloniex.formatters import format_datetime
+from core.poloniex.stub import PoloniexApiStub
+from core.poloniex.types import PoloniexApiError, PoloniexErrorMessage
+
+
+def get_currency_pair(base, quote):
+    return '{}_{}'.format(base, quote)
+
+
+def format_number(value) -> str:
+    return '{:.8f}'.format(value)
+
+
+def parse_int(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+class PoloniexGeneratorStub(PoloniexApiStub):
+
+    def __init__(self, generator: MarketGenerator, *args, **kwargs):
+        super(PoloniexGeneratorStub, self).__init__(*args, **kwargs)
+        self.generator = generator
+        self.rendered = RenderCache(generator)
+        self.currency_pairs = [get_currency_pair(base, quote) for base, quote in generator.names]
+        self.pair_index = {pair: i for i, pair in enumerate(self.currency_pairs)}
+        self.generated_currencies = {
+            currency: {
+                'id': i + 1,
+                'name': GeneratorParams.CURRENCIES.get(currency, (currency,))[0],
+                'humanType': 'BTC Clone',
+                'currencyType': 'address',
+                'txFee': format_number(GeneratorParams.CURRENCIES.get(currency, (currency, 0.))[1]),
+                'minConf': 1,
+                'depositAddress': None,
+                'disabled': 0,
+                'delisted': 0,
+                'frozen': 0
+            }
+            for i, currency in enumerate(generator.currencies)
+        }
+
+    @property
+    def tickers(self) -> dict:
+        return self.rendered.get_value('tickers', self.format_tickers)
+
+    @property
+    def currencies(self) -> dict:
+        return self.generated_currencies
+
+    def format_tickers(self) -> dict:
+        summaries = self.generator.get_summaries()
+        change = summaries['last'] / summaries['prev_day'] - 1
+        return {
+            pair: {
+                'id': i + 1,
+                'last': format_number(summaries['last'][i]),
+                'lowestAsk': format_number(summaries['ask'][i]),
+                'highestBid': format_number(summaries['bid'][i]),
+                'percentChange': format_number(change[i]),
+                'baseVolume': format_number(summaries['base_volume'][i]),
+                'quoteVolume': format_number(summaries['volume'][i]),
+                'isFrozen': '0',
+                'high24hr': format_number(summaries['high'][i]),
+                'low24hr': format_number(summaries['low'][i])
+            }
+            for i, pair in enumerate(self.currency_pairs)
+        }
+
+    def format_24h_volume(self) -> dict:
+        summaries = self.generator.get_summaries()
+        result = dict()
+        totals = dict()
+        for i, (base, quote) in enumerate(self.generator.names):
+            result[self.currency_pairs[i]] = {
+                base: format_number(summaries['base_volume'][i]),
+                quote: format_number(summaries['volume'][i])
+            }
+            totals[base] = totals.get(base, 0.) + summaries['base_volume'][i]
+        for base, total in sorted(totals.items()):
+            result['total{}'.format(base)] = format_number(total)
+        return result
+
+    def format_order_book(self, index, depth) -> dict:
+        bids, bid_quantities, asks, ask_quantities = self.generator.get_order_book(index, depth)
+        return {
+            'asks': [[format_number(rate), amount] for rate, amount in zip(asks, ask_quantities.round(8).tolist())],
+            'bids': [[format_number(rate), amount] for rate, amount in zip(bids, bid_quantities.round(8).tolist())],
+            'isFrozen': '0',
+            'seq': self.generator.steps
+        }
+
+    def return_ticker(self):
+        return self.rendered.get('returnTicker', lambda: self.tickers)
+
+    def return_24h_volume(self):
+        return self.rendered.get('return24hVolume', self.format_24h_volume)
+
+    def return_order_book(self, currency_pair, depth):
+        try:
+            currency_pair = self.parse_currency_pair(currency_pair)
+        except PoloniexApiError as e:
+            return e.get_response()
+        depth = min(max(parse_int(depth) or GeneratorParams.DEPTH, 1), GeneratorParams.DEPTH)
+
+        def build():
+            if currency_pair is None:
+                return {
+                    pair: self.format_order_book(i, depth)
+                    for i, pair in enumerate(self.currency_pairs)
+                }
+            return self.format_order_book(self.pair_index[currency_pair], depth)
+
+        return self.rendered.get(('returnOrderBook', currency_pair, depth), build)
+
+    def return_trade_history(self, currency_pair, start, end):
+        try:
+            currency_pair = self.parse_currency_pair(currency_pair)
+        except PoloniexApiError as e:
+            return e.get_response()
+        if currency_pair is None:
+            return PoloniexApiError(PoloniexErrorMessage.INVALID_CURRENCY_PAIR).get_response()
+        start, end = parse_int(start), parse_int(end)
+
+        def build():
+            return [
+                {
+                    'globalTradeID': trade_id,
+                    'tradeID': trade_id // len(self.currency_pairs),
+                    'date': format_datetime(datetime.utcfromtimestamp(timestamp)),
+                    'type': 'buy' if is_buy else 'sell',
+                    'rate': format_number(price),
+                    'amount': format_number(quantity),
+                    'total': format_number(price * quantity)
+                }
+                for trade_id, timestamp, price, quantity, is_buy
+                in self.generator.get_trades(self.pair_index[currency_pair], start=start, end=end)
+            ]
+
+        return self.rendered.get(('returnTradeHistory', currency_pair, start, end), build)
+
+    def return_currencies(self):
+        return self.rendered.get('returnCurrencies', lambda: self.currencies)
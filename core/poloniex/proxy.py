@@ -1,24 +1,26 @@
 import requests
-import simplejson as json
-from cachetools import TTLCache, cached
 
+from core.breaker import CircuitBreakerParams, guarded_call, last_known_good, make_key
+from core.cache import swr_cached
 from core.helpers import obj_dropna
+from core.http import upstream
+from core.payload import Payload, parse_payload
 from core.poloniex.types import PoloniexApiError, PoloniexErrorMessage
 
 
 class PoloniexRawRequest:
     base_url = 'https://poloniex.com/public'
 
-    def get_response(self, response: requests.Response):
-        return response
+    def get_response(self, payload: Payload):
+        return payload
 
     def request(self, **params):
-        res = requests.get(
+        res = upstream.get(
             url=self.base_url,
             headers={'content-Type': 'application/json'},
             params=obj_dropna(params)
         )
-        return self.get_response(res)
+        return self.get_response(Payload.from_response(res))
 
     def __getattr__(self, command):
         def method(**kwargs):
@@ -28,14 +30,30 @@ class PoloniexRawRequest:
 
 
 class PoloniexJsonRequest(PoloniexRawRequest):
+    failure_thresholds = dict(returnCurrencies=2)
 
-    def get_response(self, response: requests.Response):
-        if response.status_code in [200, 201]:
-            data = json.loads(response.text, use_decimal=True)
+    def get_endpoint(self, command):
+        return '{}?command={}'.format(self.base_url, command)
+
+    def seed(self, command, result):
+        last_known_good.set(make_key(self.get_endpoint(command), dict(command=command)), result, persist=False)
+
+    def request(self, **params):
+        command = params.get('command')
+        return guarded_call(
+            endpoint=self.get_endpoint(command),
+            func=super(PoloniexJsonRequest, self).request,
+            params=params,
+            failure_threshold=self.failure_thresholds.get(command, CircuitBreakerParams.FAILURE_THRESHOLD)
+        )
+
+    def get_response(self, payload: Payload):
+        if payload.status_code in [200, 201]:
+            data = parse_payload(payload)
             if data.get('error'):
                 raise PoloniexApiError(data['error'])
         else:
-            raise requests.HTTPError(response=response)
+            raise requests.HTTPError('{} upstream response'.format(payload.status_code))
 
         return data
 
@@ -46,22 +64,22 @@ class PoloniexApiProxy:
         self.raw = PoloniexRawRequest()
         self.json = PoloniexJsonRequest()
 
-    @cached(TTLCache(ttl=5, maxsize=128))
+    @swr_cached(soft_ttl=5, hard_ttl=60)
     def return_ticker(self):
         return self.raw.returnTicker()
 
-    @cached(TTLCache(ttl=3600, maxsize=128))
+    @swr_cached(soft_ttl=3600, hard_ttl=86400)
     def return_24h_volume(self):
         return self.raw.return24hVolume()
 
-    @cached(TTLCache(ttl=5, maxsize=128))
+    @swr_cached(soft_ttl=5, hard_ttl=60)
     def return_order_book(self, currency_pair, depth):
         return self.raw.returnOrderBook(
             currencyPair=currency_pair,
             depth=depth
         )
 
-    @cached(TTLCache(ttl=5, maxsize=128))
+    @swr_cached(soft_ttl=5, hard_ttl=60)
     def return_trade_history(self, currency_pair, start, end):
         return self.raw.returnTradeHistory(
             currencyPair=currency_pair,
@@ -69,7 +87,7 @@ class PoloniexApiProxy:
             end=end
         )
 
-    @cached(TTLCache(ttl=60, maxsize=128))
+    @swr_cached(soft_ttl=60, hard_ttl=600)
     def return_chart_data(self, currency_pair, start, end, period):
         return self.raw.returnChartData(
             currencyPair=currency_pair,
@@ -78,24 +96,36 @@ class PoloniexApiProxy:
             period=period
         )
 
-    @cached(TTLCache(ttl=3600, maxsize=128))
+    @swr_cached(soft_ttl=3600, hard_ttl=86400)
     def return_currencies(self):
         return self.raw.returnCurrencies()
 
-    @cached(TTLCache(ttl=60, maxsize=128))
+    @swr_cached(soft_ttl=60, hard_ttl=600)
     def return_loan_orders(self, currency):
         return self.raw.returnLoanOrders(currency=currency)
 
     @property
-    @cached(TTLCache(ttl=60, maxsize=128))
+    @swr_cached(soft_ttl=60, hard_ttl=600)
     def tickers(self):
         return self.json.returnTicker()
 
     @property
-    @cached(TTLCache(ttl=3600, maxsize=128))
+    @swr_cached(soft_ttl=3600, hard_ttl=86400)
     def currencies(self):
         return self.json.returnCurrencies()
 
+    def export_bundle(self) -> dict:
+        return dict(
+            tickers=self.json.returnTicker(),
+            currencies=self.json.returnCurrencies()
+        )
+
+    def prewarm(self, bundle: dict):
+        self.json.seed('returnTicker', bundle['tickers'])
+        self.json.seed('returnCurrencies', bundle['currencies'])
+        PoloniexApiProxy.tickers.fget.prime(self, value=bundle['tickers'], stale=True)
+        PoloniexApiProxy.currencies.fget.prime(self, value=bundle['currencies'], stale=True)
+
     def parse_currency(self, currency):
         if not currency:
             raise PoloniexApiError(PoloniexErrorMessage.REQUIRED_PARAMETER_MISSING)
@@ -1,119 +1,214 @@
+import logging
+import requests
+import simplejson as json
 from datetime import datetime
+from functools import partial
 from itertools import groupby
 from decimal import Decimal
 from random import SystemRandom
 
+from core.candles import CandleAggregator, merge_candles
+from core.payload import Payload, parse_payload
 from core.poloniex.proxy import PoloniexApiProxy
 from core.poloniex.formatters import format_balance, parse_datetime, format_deposit, format_withdrawal, \
     format_order, parse_limit, format_trade, format_order_status, parse_decimal, parse_address, \
-    split_currency_pair
+    split_currency_pair, format_resulting_trade, parse_timestamp, parse_period, format_empty_candle, \
+    format_public_trade, parse_depth, format_depth_levels
 from core.poloniex.types import PoloniexApiError, PoloniexErrorMessage, PoloniexParams, PoloniexAccountType
-from core.schema import CustomLogicMixin, OrderDirection, Executor, TransactionType, OrderStatus, OrderType
+from core.schema import CustomLogicMixin, OrderDirection, Executor, TransactionType, OrderStatus, OrderType, \
+    Order, NonceStore
 from core.helpers import sign_message
+from core.depth import DepthBook, merge_levels
+from core.nonces import MemoryNonceStore
+from core.tape import TradeTape, merge_trades
+
+logger = logging.getLogger('testex')
 
 
 class PoloniexApiStub(PoloniexApiProxy, CustomLogicMixin):
     __exchange_id__ = 'poloniex'
 
-    def __init__(self, executor=None, *args, **kwargs):
+    def __init__(self, executor=None, nonce_store=None, *args, **kwargs):
         super(PoloniexApiStub, self).__init__(*args, **kwargs)
-        self.api_key = kwargs.get('api_key')
         self.executor = None  # type: Executor
         self.rnd = SystemRandom(datetime.now().timestamp())
-        self.nonces = dict()
+        self.nonce_store = nonce_store or MemoryNonceStore()  # type: NonceStore
+        self.candles = CandleAggregator(self.__exchange_id__)
+        self.tape = TradeTape(self.__exchange_id__)
+        self.depth_book = DepthBook(self.__exchange_id__)
         if executor:
             self.init_executor(executor)
 
     def get_number(self) -> int:
         return self.rnd.randint(1, 999999999)
 
-    def parse_nonce(self, nonce):
+    @staticmethod
+    def parse_nonce(nonce) -> int:
         try:
-            nonce = int(nonce)
-        except TypeError:
+            return int(nonce)
+        except (TypeError, ValueError):
             raise PoloniexApiError(PoloniexErrorMessage.INVALID_NONCE)
 
-        prev_nonce = self.nonces.get(self.api_key, 0)
-        if int(nonce) <= prev_nonce:
+    def check_nonce(self, api_key, nonce: int):
+        prev_nonce = self.nonce_store.check_and_set(api_key, nonce)
+        if nonce <= prev_nonce:
             raise PoloniexApiError(PoloniexErrorMessage.NONCE_NOT_GREATER.format(
                 prev_nonce=prev_nonce, nonce=nonce))
 
-        self.nonces[self.api_key] = nonce
-
-    def switch_user(self, api_key, api_sign, nonce, data):
-        self.parse_nonce(nonce)
+    def authenticate(self, api_key, api_sign, nonce, data):
+        nonce = self.parse_nonce(nonce)
 
         api_secret = api_key
         if any([not api_key, not api_sign, sign_message(data, api_secret) != api_sign]):
             raise PoloniexApiError(PoloniexErrorMessage.INVALID_API_KEY_SECRET_PAIR)
 
-        self.api_key = api_key
+        self.check_nonce(api_key, nonce)
+
+        return api_key
 
     def init_executor(self, executor):
         self.executor = executor
         self.executor.register_custom_logic(self)
+        self.executor.register_listener(self.candles)
+        self.executor.register_listener(self.tape)
+        self.executor.register_listener(self.depth_book)
+
+    def merge_order_book(self, currency_pair, book: dict, depth) -> dict:
+        result = dict(book)
+        for key, direction in [('bids', OrderDirection.BUY), ('asks', OrderDirection.SELL)]:
+            upstream = [(Decimal(rate), amount) for rate, amount in book[key]]
+            local = self.depth_book.get_levels(currency_pair, direction, depth)
+            result[key] = format_depth_levels(merge_levels(upstream, local, direction == OrderDirection.BUY, depth))
+        return result
 
-    def extend_order(self, order: dict):
-        order = order.copy()
+    def return_order_book(self, currency_pair, depth):
+        payload = super(PoloniexApiStub, self).return_order_book(currency_pair, depth)
+        markets = self.depth_book.get_markets()
+        if not markets or payload.status_code != 200:
+            return payload
+
+        data = parse_payload(payload)
+        if 'error' in data:
+            return payload
+
+        depth = parse_depth(depth)
+        if currency_pair == 'all':
+            result = {
+                pair: self.merge_order_book(pair, book, depth) if pair in markets else book
+                for pair, book in data.items()
+            }
+        elif currency_pair in markets:
+            result = self.merge_order_book(currency_pair, data, depth)
+        else:
+            return payload
+        return Payload(json.dumps(result).encode())
 
-        order['executed_amount'] = order.get('executed_amount', Decimal())
-        order['total'] = (order['executed_amount'] * order.get('average_price', Decimal())) \
+    @staticmethod
+    def get_upstream_list(fetch) -> list:
+        try:
+            payload = fetch()
+        except requests.RequestException as e:
+            logger.warning('get_upstream_list: serving local data only: {}'.format(e))
+            return []
+        if payload.status_code != 200:
+            return []
+        data = parse_payload(payload)
+        return data if isinstance(data, list) else []
+
+    def return_trade_history(self, currency_pair, start, end):
+        if not self.tape.has_market(currency_pair):
+            return super(PoloniexApiStub, self).return_trade_history(currency_pair, start, end)
+        fetch = partial(super(PoloniexApiStub, self).return_trade_history, currency_pair, start, end)
+
+        try:
+            start = parse_timestamp(start, PoloniexErrorMessage.INVALID_START)
+            end = parse_timestamp(end, PoloniexErrorMessage.INVALID_END)
+        except PoloniexApiError as e:
+            return e.get_response()
+
+        limit = None if start or end else PoloniexParams.TRADE_HISTORY_LIMIT
+        trades = self.tape.get_trades(currency_pair, start=start, end=end, limit=limit)
+        return Payload(json.dumps(merge_trades(
+            upstream=self.get_upstream_list(fetch),
+            local=list(map(format_public_trade, trades)),
+            key=lambda trade: trade['date'],
+            limit=limit
+        )).encode())
+
+    def return_chart_data(self, currency_pair, start, end, period):
+        if not self.candles.has_market(currency_pair):
+            return super(PoloniexApiStub, self).return_chart_data(currency_pair, start, end, period)
+        fetch = partial(super(PoloniexApiStub, self).return_chart_data, currency_pair, start, end, period)
+
+        try:
+            candles = self.candles.get_candles(
+                market=currency_pair,
+                period=parse_period(period),
+                start=parse_timestamp(start, PoloniexErrorMessage.INVALID_START, default=0),
+                end=parse_timestamp(end, PoloniexErrorMessage.INVALID_END, default=PoloniexParams.MAX_TIMESTAMP)
+            )
+        except PoloniexApiError as e:
+            return e.get_response()
+        candles = merge_candles(self.get_upstream_list(fetch), candles)
+        return Payload(json.dumps(candles or [format_empty_candle()]).encode())
+
+    def calc_order_fields(self, order: Order):
+        order.total = (order['executed_amount'] * order.get('average_price', Decimal())) \
             .quantize(PoloniexParams.DECIMAL_SCALE)
-        order['remaining_amount'] = order['amount'] - order['executed_amount']
+        order.remaining_amount = order['amount'] - order['executed_amount']
 
         if order['direction'] == OrderDirection.BUY:
-            order['reserved'] = (order['amount'] * order['price']) \
+            order.reserved = (order['amount'] * order['price']) \
                 .quantize(PoloniexParams.DECIMAL_SCALE)
-            order['fee'] = (order['executed_amount'] * PoloniexParams.TAKER_FEE_PCT) \
+            order.fee = (order['executed_amount'] * PoloniexParams.TAKER_FEE_PCT) \
                 .quantize(PoloniexParams.DECIMAL_SCALE)
         else:
-            order['reserved'] = order['amount']
-            order['fee'] = (order['total'] * PoloniexParams.TAKER_FEE_PCT) \
+            order.reserved = order['amount']
+            order.fee = (order.total * PoloniexParams.TAKER_FEE_PCT) \
                 .quantize(PoloniexParams.DECIMAL_SCALE)
 
-        order['reserved_fee'] = Decimal()
-        return order
+        order.reserved_fee = Decimal()
 
-    def check_balance(self, amount: Decimal, currency):
-        balance = self.executor.get_balance(api_key=self.api_key, currency=currency)
+    def check_balance(self, api_key, amount: Decimal, currency):
+        balance = self.executor.get_balance(api_key=api_key, currency=currency)
         if amount > balance.get('available', Decimal()):
             raise PoloniexApiError(PoloniexErrorMessage.NOT_ENOUGH_CURRENCY.format(currency=currency))
 
-    def return_balances(self):
+    def return_balances(self, api_key):
         result = {
             currency: Decimal()
             for currency in self.currencies
         }
 
-        balances = self.executor.get_balances(self.api_key)
+        balances = self.executor.get_balances(api_key)
         for item in balances:
             result[item['currency']] = item.get('available', Decimal())
 
         return result
 
-    def return_complete_balances(self, account):
+    def return_complete_balances(self, api_key, account):
         if account and account != PoloniexAccountType.EXCHANGE:  # TODO: implement others
             raise PoloniexApiError(PoloniexErrorMessage.INVALID_ACCOUNT)
 
-        balances = self.executor.get_balances(self.api_key)
+        balances = self.executor.get_balances(api_key)
         return {
             item['currency']: format_balance(item, self.tickers)
             for item in balances
         }
 
-    def return_deposit_addresses(self):
+    def return_deposit_addresses(self, api_key):
         return dict()
 
-    def generate_new_address(self, currency):
+    def generate_new_address(self, api_key, currency):
         currency = self.parse_currency(currency)
         return dict(
             success=0,
             response=None  # TODO: implement
         )
 
-    def return_deposits_withdrawals(self, start, end):
+    def return_deposits_withdrawals(self, api_key, start, end):
         transactions = self.executor.get_transactions(
-            api_key=self.api_key,
+            api_key=api_key,
             start_at=parse_datetime(start, PoloniexErrorMessage.INVALID_START),
             end_at=parse_datetime(end, PoloniexErrorMessage.INVALID_END)
         )
@@ -126,10 +221,10 @@ class PoloniexApiStub(PoloniexApiProxy, CustomLogicMixin):
             withdrawals=list(map(format_withdrawal, withdrawals))
         )
 
-    def return_open_orders(self, currency_pair):
+    def return_open_orders(self, api_key, currency_pair):
         currency_pair = self.parse_currency_pair(currency_pair)
         orders = self.executor.get_orders(
-            api_key=self.api_key,
+            api_key=api_key,
             status=OrderStatus.OPENED,
             market=currency_pair
         )
@@ -142,10 +237,10 @@ class PoloniexApiStub(PoloniexApiProxy, CustomLogicMixin):
             for market, g in groupby(orders, key=lambda x: x['market'])
         }
 
-    def return_account_trade_history(self, currency_pair, start, end, limit):
+    def return_account_trade_history(self, api_key, currency_pair, start, end, limit):
         currency_pair = self.parse_currency_pair(currency_pair)
         trades = self.executor.get_trades(
-            api_key=self.api_key,
+            api_key=api_key,
             limit=parse_limit(limit),
             market=currency_pair,
             start_at=parse_datetime(start, PoloniexErrorMessage.INVALID_START),
@@ -160,14 +255,14 @@ class PoloniexApiStub(PoloniexApiProxy, CustomLogicMixin):
             for market, g in groupby(trades, key=lambda x: x['market'])
         }
 
-    def return_order_trades(self, order_number):
+    def return_order_trades(self, api_key, order_number):
         trades = self.executor.get_trades(
-            api_key=self.api_key,
+            api_key=api_key,
             order_number=order_number
         )
         return list(map(format_trade, trades))
 
-    def get_order(self, order_number):
+    def get_order(self, api_key, order_number):
         if not order_number:
             raise PoloniexApiError(PoloniexErrorMessage.REQUIRED_PARAMETER_MISSING)
 
@@ -176,14 +271,14 @@ class PoloniexApiStub(PoloniexApiProxy, CustomLogicMixin):
         except TypeError:
             raise PoloniexApiError(PoloniexErrorMessage.INVALID_ORDER_NUMBER)
 
-        order = self.executor.get_order(self.api_key, order_number)
+        order = self.executor.get_order(api_key, order_number)
         if not order:
             raise PoloniexApiError(PoloniexErrorMessage.ORDER_NOT_FOUND)
 
         return order
 
-    def return_order_status(self, order_number):
-        order = self.get_order(order_number)
+    def return_order_status(self, api_key, order_number):
+        order = self.get_order(api_key, order_number)
         if order['status'] == OrderStatus.OPENED:
             return dict(
                 result={order_number: format_order_status(order)},
@@ -191,7 +286,7 @@ class PoloniexApiStub(PoloniexApiProxy, CustomLogicMixin):
             )
         return dict(success=0)
 
-    def send_order(self, direction, currency_pair, rate, amount,
+    def send_order(self, api_key, direction, currency_pair, rate, amount,
                    fill_or_kill=None, immediate_or_cancel=None, post_only=None):
         number = self.get_number()
         price = parse_decimal(rate, PoloniexErrorMessage.INVALID_RATE)
@@ -202,10 +297,10 @@ class PoloniexApiStub(PoloniexApiProxy, CustomLogicMixin):
             raise PoloniexApiError(PoloniexErrorMessage.TOTAL_TOO_SMALL)
 
         base_currency, market_currency = split_currency_pair(market)
-        self.check_balance(amount, base_currency if direction == OrderDirection.BUY else market_currency)
+        self.check_balance(api_key, amount, base_currency if direction == OrderDirection.BUY else market_currency)
 
-        self.executor.send_order(
-            api_key=self.api_key,
+        order = self.executor.send_order(
+            api_key=api_key,
             exchange_id=self.__exchange_id__,
             number=number,
             direction=direction,
@@ -219,32 +314,32 @@ class PoloniexApiStub(PoloniexApiProxy, CustomLogicMixin):
         )
         return dict(
             orderNumber=number,
-            resultingTrades=None  # TODO: implement
+            resultingTrades=list(map(format_resulting_trade, order.get('resulting_trades', [])))
         )
 
-    def cancel_order(self, order_number):
-        order = self.get_order(order_number)
+    def cancel_order(self, api_key, order_number):
+        order = self.get_order(api_key, order_number)
         if order['status'] != OrderStatus.OPENED:
             raise PoloniexApiError(PoloniexErrorMessage.ORDER_NOT_FOUND)
 
-        order = self.executor.cancel_order(self.api_key, order_number)
+        order = self.executor.cancel_order(api_key, order_number)
         return dict(
             amount=order['remaining_amount'],
             message='Order #{} canceled.'.format(order_number),
             success=1
         )
 
-    def move_order(self, order_number, rate, amount=None,
+    def move_order(self, api_key, order_number, rate, amount=None,
                    immediate_or_cancel=None, post_only=None):
         raise NotImplementedError  # TODO: implement
 
-    def withdraw(self, currency, amount, address, payment_id=None):
+    def withdraw(self, api_key, currency, amount, address, payment_id=None):
         currency = self.parse_currency(currency)
         amount = parse_decimal(amount, PoloniexErrorMessage.INVALID_AMOUNT)
-        self.check_balance(amount, currency)
+        self.check_balance(api_key, amount, currency)
 
         self.executor.send_transaction(
-            api_key=self.api_key,
+            api_key=api_key,
             exchange_id=self.__exchange_id__,
             number=self.get_number(),
             type=TransactionType.WITHDRAWAL,
@@ -255,8 +350,7 @@ class PoloniexApiStub(PoloniexApiProxy, CustomLogicMixin):
         )
         return dict(response='Withdrew {} {}.'.format(amount, currency))
 
-    @staticmethod
-    def return_fee_info(self):
+    def return_fee_info(self, api_key):
         return dict(
             makerFee=PoloniexParams.MAKER_FEE_PCT,
             takerFee=PoloniexParams.TAKER_FEE_PCT,
@@ -264,9 +358,9 @@ class PoloniexApiStub(PoloniexApiProxy, CustomLogicMixin):
             nextTier=Decimal()
         )
 
-    def return_available_account_balances(self, account=None):
+    def return_available_account_balances(self, api_key, account=None):
         if account:
             if account != 'exchange':
                 raise NotImplementedError
-            return self.return_balances()
-        return dict(exchange=self.return_balances())
+            return self.return_balances(api_key)
+        return dict(exchange=self.return_balances(api_key))
@@ -6,6 +6,9 @@ class PoloniexParams:
     TAKER_FEE_PCT = Decimal('0.002')
     MAKER_FEE_PCT = Decimal('0.001')
     DECIMAL_SCALE = Decimal('0.00000001')
+    MAX_TIMESTAMP = 9999999999
+    TRADE_HISTORY_LIMIT = 200
+    ORDER_BOOK_DEPTH = 50
 
 
 class PoloniexOrderStatus:
@@ -24,6 +27,7 @@ class PoloniexErrorMessage:
     INVALID_CURRENCY = 'Invalid currency parameter.'
     INVALID_START = 'Invalid start parameter.'
     INVALID_END = 'Invalid end parameter.'
+    INVALID_PERIOD = 'Please specify a valid period.'
     INVALID_CURRENCY_PAIR = 'Invalid currencyPair parameter.'
     INVALID_RATE = 'Invalid rate parameter.'
     INVALID_AMOUNT = 'Invalid amount parameter.'
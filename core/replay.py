@@ -0,0 +1,100 @@
+import atexit
+import gzip
+import logging
+import threading
+import requests
+import simplejson as json
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from core.clock import now
+
+logger = logging.getLogger('testex')
+
+
+def make_record_key(url, params: dict) -> str:
+    return json.dumps([url, sorted((key, str(value)) for key, value in (params or dict()).items())])
+
+
+def open_history(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class HistoryRecorder:
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+        self.records = 0
+        atexit.register(self.close)
+
+    def record(self, url, params: dict, response: requests.Response):
+        line = json.dumps(dict(
+            t=now(),
+            url=url,
+            params={key: str(value) for key, value in (params or dict()).items()},
+            status=response.status_code,
+            content=response.content.decode('utf-8')
+        ))
+        with self.lock:
+            if self.file is None:
+                self.file = open_history(self.path, 'a')
+            self.file.write(line + '\n')
+            self.file.flush()
+            self.records += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class HistoryReplay:
+
+    def __init__(self):
+        self.times = defaultdict(list)  # type: Dict[str, List[float]]
+        self.responses = defaultdict(list)  # type: Dict[str, List[Tuple[int, str]]]
+        self.start = None
+        self.end = None
+        self.served = 0
+
+    @classmethod
+    def load(cls, path):
+        replay = cls()
+        with open_history(path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    replay.add(json.loads(line))
+
+        if replay.start is None:
+            raise ValueError('{} contains no records'.format(path))
+        logger.info('load: {} endpoints recorded from {} to {}'.format(len(replay.times), replay.start, replay.end))
+        return replay
+
+    def add(self, record: dict):
+        key = make_record_key(record['url'], record['params'])
+        i = bisect_right(self.times[key], record['t'])
+        self.times[key].insert(i, record['t'])
+        self.responses[key].insert(i, (record['status'], record['content']))
+        self.start = record['t'] if self.start is None else min(self.start, record['t'])
+        self.end = record['t'] if self.end is None else max(self.end, record['t'])
+
+    def get(self, url, params: dict) -> requests.Response:
+        key = make_record_key(url, params)
+        i = bisect_right(self.times.get(key, []), now()) - 1
+        if i < 0:
+            # serving a later record would leak the future into the virtual past
+            raise requests.ConnectionError('{} was not recorded'.format(key))
+
+        status, content = self.responses[key][i]
+        response = requests.Response()
+        response.url = url
+        response.status_code = status
+        response._content = content.encode('utf-8')
+        self.served += 1
+        return response
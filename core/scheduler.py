@@ -0,0 +1,164 @@
+import atexit
+import logging
+import threading
+from datetime import datetime, timedelta
+from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
+from uuid import uuid4
+
+from core.clock import Clock
+from core.helpers import mongo_auto_reconnect
+from core.schema import Executor
+
+logger = logging.getLogger('testex')
+
+
+class ExecutionSchedulerParams:
+    TICK_INTERVAL = 1.  # seconds
+    STOP_TIMEOUT = 10.  # seconds
+    MAX_CATCH_UP_TICKS = 10000
+    LEASE_TTL = 10.  # seconds
+
+
+def get_tick_interval(tick_interval, clock: Clock):
+    """Ticks follow the clock speed, a frozen clock only ticks when it is advanced"""
+    if not tick_interval or clock.mode == 'frozen':
+        return None
+    return tick_interval / clock.speed
+
+
+class MongoLease:
+    """Lets only one process at a time tick over a shared database"""
+
+    def __init__(self, db: Database, name='scheduler', ttl=ExecutionSchedulerParams.LEASE_TTL):
+        self.db = db
+        self.name = name
+        self.ttl = ttl
+        self.owner = str(uuid4())
+
+    @mongo_auto_reconnect
+    def acquire(self) -> bool:
+        now = datetime.utcnow()  # wall time, leases must expire even if the exchange clock is frozen
+        try:
+            self.db.leases.find_one_and_update(
+                filter={'_id': self.name, '$or': [{'owner': self.owner}, {'expires_at': {'$lt': now}}]},
+                update={'$set': {'owner': self.owner, 'expires_at': now + timedelta(seconds=self.ttl)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    @mongo_auto_reconnect
+    def add_pending_ticks(self, ticks):
+        self.db.leases.update_one(
+            filter={'_id': self.name},
+            update={'$inc': {'pending_ticks': ticks}, '$setOnInsert': {'expires_at': datetime.utcfromtimestamp(0)}},
+            upsert=True
+        )
+
+    @mongo_auto_reconnect
+    def take_pending_ticks(self) -> int:
+        document = self.db.leases.find_one_and_update(
+            filter={'_id': self.name, 'owner': self.owner, 'pending_ticks': {'$gt': 0}},
+            update={'$set': {'pending_ticks': 0}}
+        )
+        return document['pending_ticks'] if document else 0
+
+    @mongo_auto_reconnect
+    def release(self):
+        self.db.leases.delete_one({'_id': self.name, 'owner': self.owner})
+
+
+class ExecutionScheduler:
+
+    def __init__(self, executor=None, interval=ExecutionSchedulerParams.TICK_INTERVAL, lease=None):
+        self.executor = executor  # type: Executor
+        self.interval = interval
+        self.lease = lease  # type: MongoLease
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.wakeup = threading.Event()  # set by catch_up and stop
+        self.pending_lock = threading.Lock()
+        self.pending_ticks = 0
+        self.thread = None  # type: threading.Thread
+        self.ticks = 0
+        self.coalesced_ticks = 0
+        self.leased_ticks = 0
+
+    def tick(self) -> bool:
+        if not self.lock.acquire(blocking=False):
+            self.coalesced_ticks += 1
+            logger.debug('tick: previous tick is still running, coalesced')
+            return False
+
+        try:
+            if self.lease and not self.lease.acquire():
+                self.leased_ticks += 1
+                logger.debug('tick: another process holds the lease, skipped')
+                return False
+            self.executor.process()
+            self.ticks += 1
+        except Exception:
+            logger.exception('tick: processing failed')
+        finally:
+            self.lock.release()
+
+        return True
+
+    def catch_up(self, ticks) -> int:
+        """Queues ticks for the scheduler thread, returns how many were queued"""
+        ticks = max(min(ticks, ExecutionSchedulerParams.MAX_CATCH_UP_TICKS), 0)
+        if self.lease:
+            # the lease holder runs them, it may be another process
+            self.lease.add_pending_ticks(ticks)
+        else:
+            with self.pending_lock:
+                self.pending_ticks += ticks
+        self.wakeup.set()
+        logger.info('catch_up: {} ticks queued'.format(ticks))
+        return ticks
+
+    def take_pending_ticks(self) -> int:
+        with self.pending_lock:
+            ticks, self.pending_ticks = self.pending_ticks, 0
+        if self.lease and self.lease.acquire():
+            ticks += self.lease.take_pending_ticks()
+        return ticks
+
+    def run(self):
+        # without an interval only the queued ticks run, polling the lease for the ones queued elsewhere
+        timeout = self.interval or (self.lease.ttl / 3 if self.lease else None)
+        while not self.stopped.is_set():
+            self.wakeup.wait(timeout)
+            self.wakeup.clear()
+            for _ in range(self.take_pending_ticks() or (1 if self.interval else 0)):
+                if self.stopped.is_set():
+                    break
+                self.tick()
+
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        if self.is_running():
+            return
+
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, name='testex-scheduler', daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+        if self.interval:
+            logger.info('start: ticking every {} seconds'.format(self.interval))
+        else:
+            logger.info('start: ticking on catch up only')
+
+    def stop(self, timeout=ExecutionSchedulerParams.STOP_TIMEOUT):
+        self.stopped.set()
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join(timeout)
+            self.thread = None
+            if self.lease:
+                self.lease.release()
+            logger.info('stop: {} ticks processed, {} coalesced'.format(self.ticks, self.coalesced_ticks))
@@ -1,3 +1,6 @@
+from collections.abc import Mapping, MutableMapping
+from copy import deepcopy
+from decimal import Decimal
 from typing import List
 
 
@@ -54,12 +57,164 @@ class TransactionStatus:
     CANCELED = 'canceled'
     PENDING = 'pending'
     CONFIRMED = 'confirmed'
+    UNCONFIRMED = [NON_AUTHORIZED, CANCELED, PENDING]
+
+
+class EventType:
+    ORDER_OPENED = 'order_opened'
+    ORDER_CLOSED = 'order_closed'
+    TRADE = 'trade'
+    TRANSACTION_SUBMITTED = 'transaction_submitted'
+    TRANSACTION_CONFIRMED = 'transaction_confirmed'
+    DEPOSIT = 'deposit'
+
+
+class Model(MutableMapping):
+    __fields__ = ()
+    __amounts__ = ()
+    __slots__ = ('extra',)
+
+    def __init__(self, **fields):
+        self.update(fields)
+
+    @classmethod
+    def from_document(cls, document: Mapping, convert=None):
+        model = cls.__new__(cls)
+        for key, value in document.items():
+            if convert:
+                value = convert(value)
+            if key in cls.__fields__:
+                setattr(model, key, value)
+            else:
+                model[key] = value
+        return model
+
+    def __getitem__(self, key):
+        try:
+            if key in self.__fields__:
+                return getattr(self, key)
+            return self.extra[key]
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.__fields__:
+            setattr(self, key, value)
+        else:
+            if not hasattr(self, 'extra'):
+                self.extra = dict()
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        try:
+            if key in self.__fields__:
+                delattr(self, key)
+            else:
+                del self.extra[key]
+        except AttributeError:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for field in self.__fields__:
+            if hasattr(self, field):
+                yield field
+        yield from getattr(self, 'extra', ())
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, dict(self))
+
+    def __copy__(self):
+        return type(self).from_document(self)
+
+    def __deepcopy__(self, memo):
+        return type(self).from_document(self, convert=lambda value: deepcopy(value, memo))
+
+    def copy(self):
+        return self.__copy__()
+
+
+class Order(Model):
+    __derived__ = ('total', 'fee', 'remaining_amount', 'reserved', 'reserved_fee')
+    __dependencies__ = ('direction', 'price', 'amount', 'executed_amount', 'average_price')
+    __fields__ = ('_id', 'api_key', 'exchange_id', 'market', 'type', 'direction', 'price', 'amount',
+                  'base_currency', 'market_currency', 'fee_currency', 'status', 'created_at', 'updated_at',
+                  'executed_amount', 'average_price') + __derived__
+    __amounts__ = ('price', 'amount', 'executed_amount', 'average_price') + __derived__
+    __slots__ = __fields__ + ('custom_logic',)
+
+    def __getitem__(self, key):
+        if key in self.__derived__ and not hasattr(self, key):
+            if not hasattr(self, 'custom_logic'):
+                raise KeyError(key)
+            self.custom_logic.calc_order_fields(self)
+        if key == 'executed_amount' and not hasattr(self, key):
+            return Decimal()
+        return super(Order, self).__getitem__(key)
+
+    def __setitem__(self, key, value):
+        if key in self.__dependencies__ and hasattr(self, 'custom_logic'):
+            for field in self.__derived__:
+                if hasattr(self, field):
+                    delattr(self, field)
+        super(Order, self).__setitem__(key, value)
+
+    def __copy__(self):
+        order = super(Order, self).__copy__()
+        if hasattr(self, 'custom_logic'):
+            order.custom_logic = self.custom_logic
+        return order
+
+    def materialize(self):
+        if not hasattr(self, 'total') and hasattr(self, 'custom_logic'):
+            self.custom_logic.calc_order_fields(self)
+        return self
+
+
+class Trade(Model):
+    __fields__ = ('_id', 'api_key', 'exchange_id', 'order_number', 'market', 'direction', 'price', 'amount',
+                  'created_at')
+    __amounts__ = ('price', 'amount')
+    __slots__ = __fields__
+
+
+class Transaction(Model):
+    __fields__ = ('_id', 'api_key', 'exchange_id', 'type', 'currency', 'amount', 'address', 'payment_id', 'fee',
+                  'status', 'created_at', 'updated_at')
+    __amounts__ = ('amount', 'fee')
+    __slots__ = __fields__
+
+
+class Balance(Model):
+    __fields__ = ('_id', 'api_key', 'currency', 'available', 'frozen', 'pending')
+    __amounts__ = ('available', 'frozen', 'pending')
+    __slots__ = __fields__
 
 
 class CustomLogicMixin:
     __exchange_id__ = None
 
-    def extend_order(self, order: dict):
+    def calc_order_fields(self, order: Order):
+        raise NotImplementedError
+
+    def extend_order(self, order: Mapping) -> Order:
+        if not isinstance(order, Order):
+            order = Order.from_document(order)
+        order.custom_logic = self
+        return order
+
+
+class TradeListener:
+
+    def on_trade(self, exchange_id, trade: Trade):
+        raise NotImplementedError
+
+
+class DepthListener:
+
+    def on_depth_change(self, exchange_id, market, direction, price: Decimal, delta: Decimal):
         raise NotImplementedError
 
 
@@ -68,6 +223,9 @@ class Executor:
     def register_custom_logic(self, custom_logic: CustomLogicMixin):
         raise NotImplementedError
 
+    def register_listener(self, listener: TradeListener):
+        raise NotImplementedError
+
     def send_order(self, api_key, number, **kwargs):
         raise NotImplementedError
 
@@ -96,3 +254,87 @@ class Executor:
 
     def get_balance(self, api_key, currency=None) -> dict:
         raise NotImplementedError
+
+
+class Storage:
+
+    def batch(self):
+        raise NotImplementedError
+
+    def insert_order(self, order: dict):
+        raise NotImplementedError
+
+    def update_order(self, api_key, number, inc=None, fields=None, cond=None) -> bool:
+        """Returns False when no order matches the number and the cond field values"""
+        raise NotImplementedError
+
+    def get_order(self, api_key, number) -> dict:
+        raise NotImplementedError
+
+    def get_orders(self, api_key=None, status=None, market=None) -> List[dict]:
+        raise NotImplementedError
+
+    def insert_trade(self, trade: dict):
+        raise NotImplementedError
+
+    def get_trades(self, api_key, order_number=None, market=None, limit=None,
+                   start_at=None, end_at=None) -> List[dict]:
+        raise NotImplementedError
+
+    def insert_transaction(self, transaction: dict):
+        raise NotImplementedError
+
+    def update_transaction(self, api_key, number, fields=None):
+        raise NotImplementedError
+
+    def get_transactions(self, api_key=None, _type=None, currency=None, status=None,
+                         start_at=None, end_at=None) -> List[dict]:
+        raise NotImplementedError
+
+    def get_balances(self, api_key) -> List[dict]:
+        raise NotImplementedError
+
+    def get_balance(self, api_key, currency) -> dict:
+        raise NotImplementedError
+
+    def increment_balances(self, api_key, increments: dict):
+        raise NotImplementedError
+
+    def dump(self) -> dict:
+        raise NotImplementedError
+
+    def load(self, data: dict):
+        raise NotImplementedError
+
+
+class Journal:
+
+    def batch(self):
+        raise NotImplementedError
+
+    def append(self, _type, api_key, **payload) -> dict:
+        raise NotImplementedError
+
+    def get_events(self, after=0, until=None, last_seq=None) -> List[dict]:
+        raise NotImplementedError
+
+    def get_last_seq(self) -> int:
+        raise NotImplementedError
+
+    def get_committed_seq(self) -> int:
+        raise NotImplementedError
+
+    def save_snapshot(self, seq, data: dict):
+        raise NotImplementedError
+
+    def get_snapshot(self, until=None) -> dict:
+        raise NotImplementedError
+
+    def get_snapshot_seq(self) -> int:
+        raise NotImplementedError
+
+
+class NonceStore:
+
+    def check_and_set(self, api_key, nonce: int) -> int:
+        raise NotImplementedError
@@ -0,0 +1,74 @@
+from collections import defaultdict, OrderedDict
+from decimal import Decimal
+from uuid import uuid4
+from pymongo import InsertOne, UpdateOne
+from pymongo.database import Database
+
+from core.helpers import obj_dec_to_dec128
+
+
+class WriteBuffer:
+
+    def __init__(self, encode=obj_dec_to_dec128):
+        self.encode = encode
+        self.requests = OrderedDict()
+        self.balances = OrderedDict()
+        self.operations = 0
+
+    def __len__(self):
+        return self.operations
+
+    def get_requests(self, collection) -> list:
+        if collection not in self.requests:
+            self.requests[collection] = list()
+        return self.requests[collection]
+
+    def insert(self, collection, document: dict):
+        self.get_requests(collection).append(InsertOne(self.encode(document)))
+        self.operations += 1
+
+    def update(self, collection, filter: dict, update: dict):
+        self.get_requests(collection).append(UpdateOne(filter, update))
+        self.operations += 1
+
+    def increment_balances(self, api_key, increments: dict):
+        for currency, balance in increments.items():
+            key = api_key, currency
+            if key not in self.balances:
+                self.balances[key] = defaultdict(Decimal)
+            for field, value in balance.items():
+                self.balances[key][field] += value
+            self.operations += 1
+
+    def get_balance_requests(self) -> list:
+        return [
+            UpdateOne(
+                filter=dict(api_key=api_key, currency=currency),
+                update={
+                    '$inc': self.encode(increments),
+                    '$setOnInsert': {'_id': str(uuid4())}
+                },
+                upsert=True
+            )
+            for (api_key, currency), increments in self.balances.items()
+        ]
+
+    def flush(self, db: Database) -> dict:
+        round_trips = 0
+        for collection, requests in self.requests.items():
+            db[collection].bulk_write(requests, ordered=True)
+            round_trips += 1
+
+        if self.balances:
+            db.balances.bulk_write(self.get_balance_requests(), ordered=True)
+            round_trips += 1
+
+        stats = dict(
+            operations=self.operations,
+            round_trips=round_trips,
+            saved_round_trips=self.operations - round_trips
+        )
+        self.requests.clear()
+        self.balances.clear()
+        self.operations = 0
+        return stats
@@ -0,0 +1,232 @@
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from pymongo.errors import DuplicateKeyError
+from typing import Dict, List
+from uuid import uuid4
+
+from core.helpers import obj_dropna
+from core.schema import Storage, Model, Order, Trade, Transaction, Balance
+
+
+def as_set(value) -> set:
+    if isinstance(value, (list, tuple, set)):
+        return set(value)
+    return {value}
+
+
+class MemoryCollection:
+
+    def __init__(self, model=Model, indexed_fields=()):
+        self.model = model
+        self.documents = defaultdict(dict)  # type: Dict[str, Dict[object, Model]]
+        self.indexes = {field: defaultdict(set) for field in indexed_fields}
+        self.timestamps = defaultdict(list)
+        self.timeline = defaultdict(list)
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return sum(map(len, self.documents.values()))
+
+    def index(self, document: dict, fields=None):
+        key = document['api_key'], document['_id']
+        for field in fields or self.indexes:
+            if field in self.indexes:
+                self.indexes[field][document.get(field)].add(key)
+
+    def unindex(self, document: dict, fields=None):
+        key = document['api_key'], document['_id']
+        for field in fields or self.indexes:
+            if field in self.indexes:
+                self.indexes[field][document.get(field)].discard(key)
+
+    def insert(self, document: dict):
+        document = self.model.from_document(document)
+        api_key, _id = document['api_key'], document['_id']
+        with self.lock:
+            if _id in self.documents[api_key]:
+                raise DuplicateKeyError('duplicate key: {}'.format(_id))
+
+            self.documents[api_key][_id] = document
+            self.index(document)
+
+            created_at = document.get('created_at') or datetime.min
+            position = bisect_right(self.timestamps[api_key], created_at)
+            self.timestamps[api_key].insert(position, created_at)
+            self.timeline[api_key].insert(position, _id)
+
+    def update(self, api_key, _id, inc=None, fields=None, cond=None) -> bool:
+        with self.lock:
+            document = self.documents.get(api_key, {}).get(_id)
+            if document is None or any(document.get(k) != v for k, v in (cond or {}).items()):
+                return False
+
+            changed = list((fields or {}).keys()) + list((inc or {}).keys())
+            self.unindex(document, changed)
+            for field, value in (inc or {}).items():
+                document[field] = document.get(field, Decimal()) + value
+            document.update(fields or {})
+            self.index(document, changed)
+            return True
+
+    def get(self, api_key, _id):
+        document = self.documents.get(api_key, {}).get(_id)
+        if document is not None:
+            return document.copy()
+
+    def get_created_at(self, key):
+        return self.documents[key[0]][key[1]].get('created_at') or datetime.min
+
+    def get_timeline_keys(self, api_key=None, start_at=None, end_at=None) -> list:
+        if api_key is None:
+            keys = [(api_key, _id) for api_key, timeline in self.timeline.items() for _id in timeline]
+            return sorted(keys, key=self.get_created_at)
+
+        timestamps = self.timestamps.get(api_key, [])
+        lo = bisect_right(timestamps, start_at) if start_at else 0
+        hi = bisect_left(timestamps, end_at) if end_at else len(timestamps)
+        return [(api_key, _id) for _id in self.timeline.get(api_key, [])[lo:hi]]
+
+    def get_index_keys(self, conditions: dict):
+        keys = None
+        for field, value in conditions.items():
+            if field in self.indexes:
+                index = self.indexes[field]
+                field_keys = set().union(*(index.get(item, set()) for item in as_set(value)))
+                keys = field_keys if keys is None else keys & field_keys
+        return keys
+
+    @staticmethod
+    def matches(document: dict, api_key=None, start_at=None, end_at=None, **conditions) -> bool:
+        created_at = document.get('created_at') or datetime.min
+        return all([
+            api_key is None or document['api_key'] == api_key,
+            start_at is None or created_at > start_at,
+            end_at is None or created_at < end_at,
+            *(document.get(field) in as_set(value) for field, value in conditions.items())
+        ])
+
+    def find(self, api_key=None, limit=None, start_at=None, end_at=None, **conditions) -> List[dict]:
+        conditions = obj_dropna(conditions)
+        with self.lock:
+            keys = self.get_index_keys(conditions)
+            if keys is None or (api_key is not None and len(keys) > len(self.timeline.get(api_key, []))):
+                keys = self.get_timeline_keys(api_key, start_at, end_at)
+            else:
+                keys = sorted(keys, key=self.get_created_at)
+
+            result = list()
+            for key in keys:
+                document = self.documents[key[0]][key[1]]
+                if self.matches(document, api_key, start_at, end_at, **conditions):
+                    result.append(document.copy())
+                    if limit and len(result) == limit:
+                        break
+
+            return result
+
+
+class MemoryStorage(Storage):
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        self.orders = MemoryCollection(model=Order, indexed_fields=('status', 'market'))
+        self.trades = MemoryCollection(model=Trade, indexed_fields=('market', 'order_number'))
+        self.transactions = MemoryCollection(model=Transaction, indexed_fields=('status', 'type', 'currency'))
+        self.balances = defaultdict(dict)  # type: Dict[str, Dict[str, Balance]]
+
+    @contextmanager
+    def batch(self):
+        yield None
+
+    def insert_order(self, order: dict):
+        self.orders.insert(order)
+
+    def update_order(self, api_key, number, inc=None, fields=None, cond=None) -> bool:
+        return self.orders.update(api_key, number, inc=inc, fields=fields, cond=cond)
+
+    def get_order(self, api_key, number) -> dict:
+        return self.orders.get(api_key, number)
+
+    def get_orders(self, api_key=None, status=None, market=None) -> List[dict]:
+        return self.orders.find(api_key=api_key, status=status, market=market)
+
+    def insert_trade(self, trade: dict):
+        self.trades.insert(trade)
+
+    def get_trades(self, api_key, order_number=None, market=None, limit=None,
+                   start_at=None, end_at=None) -> List[dict]:
+        return self.trades.find(
+            api_key=api_key,
+            limit=limit,
+            start_at=start_at,
+            end_at=end_at,
+            market=market,
+            order_number=order_number
+        )
+
+    def insert_transaction(self, transaction: dict):
+        self.transactions.insert(transaction)
+
+    def update_transaction(self, api_key, number, fields=None):
+        self.transactions.update(api_key, number, fields=fields)
+
+    def get_transactions(self, api_key=None, _type=None, currency=None, status=None,
+                         start_at=None, end_at=None) -> List[dict]:
+        return self.transactions.find(
+            api_key=api_key,
+            start_at=start_at,
+            end_at=end_at,
+            type=_type,
+            currency=currency,
+            status=status
+        )
+
+    def get_balances(self, api_key) -> List[dict]:
+        with self.lock:
+            return [balance.copy() for balance in self.balances.get(api_key, {}).values()]
+
+    def get_balance(self, api_key, currency) -> dict:
+        balance = self.balances.get(api_key, {}).get(currency)
+        if balance is not None:
+            return balance.copy()
+
+    def increment_balances(self, api_key, increments: dict):
+        with self.lock:
+            for currency, balance in increments.items():
+                document = self.balances[api_key].get(currency)
+                if document is None:
+                    document = self.balances[api_key][currency] = Balance(
+                        _id=str(uuid4()),
+                        api_key=api_key,
+                        currency=currency
+                    )
+                for field, value in balance.items():
+                    document[field] = document.get(field, Decimal()) + value
+
+    def dump(self) -> dict:
+        with self.lock:
+            return dict(
+                orders=self.orders.find(),
+                trades=self.trades.find(),
+                transactions=self.transactions.find(),
+                balances=[balance.copy() for balances in self.balances.values() for balance in balances.values()]
+            )
+
+    def load(self, data: dict):
+        with self.lock:
+            self.clear()
+            for order in data.get('orders', []):
+                self.orders.insert(order)
+            for trade in data.get('trades', []):
+                self.trades.insert(trade)
+            for transaction in data.get('transactions', []):
+                self.transactions.insert(transaction)
+            for balance in data.get('balances', []):
+                self.balances[balance['api_key']][balance['currency']] = Balance.from_document(balance)
@@ -0,0 +1,284 @@
+import logging
+import threading
+from bson import Decimal128
+from bson.codec_options import TypeCodec, TypeRegistry
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import partial
+from pymongo import UpdateOne
+from pymongo.database import Database
+from typing import List
+from uuid import uuid4
+
+from core.helpers import dec128_to_dec, dec_to_dec128, dec_to_fixed, fixed_to_dec, obj_dec_to_dec128, \
+    obj_dec_to_fixed, obj_fixed_to_dec, obj_dropna, make_mongo_interval_cond, mongo_auto_reconnect
+from core.schema import Storage, Model, Order, Trade, Transaction, Balance
+from core.storage.buffer import WriteBuffer
+
+logger = logging.getLogger('testex')
+
+
+class MongoStorageParams:
+    MIGRATION_BATCH_SIZE = 1000
+
+
+class DecimalCodec(TypeCodec):
+    python_type = Decimal
+    bson_type = Decimal128
+
+    def transform_python(self, value):
+        return Decimal128(value)
+
+    def transform_bson(self, value):
+        return value.to_decimal()
+
+
+MODELS = {
+    'orders': Order,
+    'trades': Trade,
+    'transactions': Transaction,
+    'balances': Balance
+}
+AMOUNT_FIELDS = frozenset(field for model in MODELS.values() for field in model.__amounts__)
+
+
+def with_decimal_codec(db: Database) -> Database:
+    codec_options = db.codec_options.with_options(type_registry=TypeRegistry([DecimalCodec()]))
+    return db.with_options(codec_options=codec_options)
+
+
+def as_is(obj):
+    return obj
+
+
+def make_update(inc=None, fields=None, encode=obj_dec_to_dec128) -> dict:
+    update = dict()
+    if inc:
+        update['$inc'] = encode(inc)
+    if fields:
+        update['$set'] = encode(fields)
+    return update
+
+
+def migrate_fixed_point(db: Database, reverse=False) -> int:
+    if reverse:
+        convert = lambda value: dec_to_dec128(fixed_to_dec(value))
+    else:
+        convert = lambda value: dec_to_fixed(dec128_to_dec(value))
+    migrated = 0
+    for collection, model in MODELS.items():
+        requests = list()
+        for document in db[collection].find():
+            fields = {k: convert(document[k]) for k in model.__amounts__ if k in document}
+            if not fields:
+                continue
+            requests.append(UpdateOne(
+                filter={'_id': document['_id']},
+                update={'$set': fields}
+            ))
+            if len(requests) == MongoStorageParams.MIGRATION_BATCH_SIZE:
+                db[collection].bulk_write(requests, ordered=False)
+                requests = list()
+            migrated += 1
+
+        if requests:
+            db[collection].bulk_write(requests, ordered=False)
+
+    logger.info('migrate_fixed_point: {} documents migrated'.format(migrated))
+    return migrated
+
+
+def make_in_cond(value):
+    if isinstance(value, (list, tuple, set)):
+        return {'$in': list(value)}
+    return value
+
+
+class MongoStorage(Storage):
+
+    def __init__(self, db: Database, fixed_point=False, decimal_codec=False):
+        self.db = db
+        self.encode, self.decode = obj_dec_to_dec128, dec128_to_dec
+        self.fixed_point = fixed_point
+
+        if decimal_codec:
+            try:
+                self.db = with_decimal_codec(db)
+                self.encode, self.decode = as_is, None
+            except NotImplementedError as e:
+                logger.warning('MongoStorage: decimal codec is not supported, converting documents: {}'.format(e))
+
+        if fixed_point:
+            self.encode, self.decode = partial(obj_dec_to_fixed, fields=AMOUNT_FIELDS), None
+        self.local = threading.local()
+        self.saved_round_trips = 0
+
+    @property
+    def buffer(self) -> WriteBuffer:
+        return getattr(self.local, 'buffer', None)
+
+    @contextmanager
+    def batch(self):
+        if self.buffer is not None:
+            yield self.buffer
+            return
+
+        self.local.buffer = WriteBuffer(encode=self.encode)
+        try:
+            yield self.local.buffer
+        finally:
+            buffer, self.local.buffer = self.local.buffer, None
+            if len(buffer):
+                stats = buffer.flush(self.db)
+                self.saved_round_trips += stats['saved_round_trips']
+                logger.debug('batch: {operations} writes in {round_trips} round-trips '
+                             '({saved_round_trips} saved)'.format(**stats))
+
+    def insert(self, collection, document: dict):
+        if self.buffer is not None:
+            self.buffer.insert(collection, document)
+        else:
+            self.db[collection].insert_one(self.encode(document))
+
+    def update(self, collection, filter: dict, update: dict):
+        if self.buffer is not None:
+            self.buffer.update(collection, filter, update)
+        else:
+            self.db[collection].update_one(filter, update)
+
+    def to_model(self, model, document: dict) -> Model:
+        if self.fixed_point:
+            return model.from_document(obj_fixed_to_dec(document, fields=model.__amounts__))
+        return model.from_document(document, convert=self.decode)
+
+    def to_models(self, model, documents) -> List[Model]:
+        return [self.to_model(model, document) for document in documents]
+
+    @mongo_auto_reconnect
+    def insert_order(self, order: dict):
+        self.insert('orders', order)
+
+    @mongo_auto_reconnect
+    def update_order(self, api_key, number, inc=None, fields=None, cond=None) -> bool:
+        filter = dict(_id=number, api_key=api_key)
+        update = make_update(inc, fields, encode=self.encode)
+        if not cond:
+            self.update('orders', filter, update)
+            return True
+
+        # conditional writes skip the buffer, the caller needs to know if the order still matched
+        filter.update(self.encode(cond))
+        return self.db.orders.update_one(filter, update).matched_count > 0
+
+    @mongo_auto_reconnect
+    def get_order(self, api_key, number) -> dict:
+        order = self.db.orders.find_one(dict(
+            _id=number,
+            api_key=api_key
+        ))
+        if order:
+            return self.to_model(Order, order)
+
+    @mongo_auto_reconnect
+    def get_orders(self, api_key=None, status=None, market=None) -> List[dict]:
+        query = dict(
+            api_key=api_key,
+            status=status,
+            market=market
+        )
+        orders = self.db.orders.find(obj_dropna(query)).sort('created_at')
+        return self.to_models(Order, orders)
+
+    @mongo_auto_reconnect
+    def insert_trade(self, trade: dict):
+        self.insert('trades', trade)
+
+    @mongo_auto_reconnect
+    def get_trades(self, api_key, order_number=None, market=None, limit=None,
+                   start_at=None, end_at=None) -> List[dict]:
+        query = {'$and': [
+            obj_dropna(dict(
+                api_key=api_key,
+                market=market,
+                order_number=order_number
+            )),
+            *make_mongo_interval_cond('created_at', start_at, end_at)
+        ]}
+        trades = self.db.trades.find(query)
+        if limit:
+            trades = trades.limit(limit)
+        return self.to_models(Trade, trades)
+
+    @mongo_auto_reconnect
+    def insert_transaction(self, transaction: dict):
+        self.insert('transactions', transaction)
+
+    @mongo_auto_reconnect
+    def update_transaction(self, api_key, number, fields=None):
+        self.update(
+            collection='transactions',
+            filter=dict(_id=number, api_key=api_key),
+            update=make_update(fields=fields, encode=self.encode)
+        )
+
+    @mongo_auto_reconnect
+    def get_transactions(self, api_key=None, _type=None, currency=None, status=None,
+                         start_at=None, end_at=None) -> List[dict]:
+        query = {'$and': [
+            obj_dropna(dict(
+                api_key=api_key,
+                type=_type,
+                currency=currency,
+                status=make_in_cond(status)
+            )),
+            *make_mongo_interval_cond('created_at', start_at, end_at)
+        ]}
+        transactions = self.db.transactions.find(query)
+        return self.to_models(Transaction, transactions)
+
+    @mongo_auto_reconnect
+    def get_balances(self, api_key) -> List[dict]:
+        balances = self.db.balances.find(dict(api_key=api_key))
+        return self.to_models(Balance, balances)
+
+    @mongo_auto_reconnect
+    def get_balance(self, api_key, currency) -> dict:
+        balance = self.db.balances.find_one(dict(
+            api_key=api_key,
+            currency=currency
+        ))
+        if balance:
+            return self.to_model(Balance, balance)
+
+    @mongo_auto_reconnect
+    def increment_balances(self, api_key, increments: dict):
+        if self.buffer is not None:
+            self.buffer.increment_balances(api_key, increments)
+            return
+
+        for currency, balance in increments.items():
+            self.db.balances.update_one(
+                filter=dict(
+                    api_key=api_key,
+                    currency=currency
+                ),
+                update={
+                    '$inc': self.encode(balance),
+                    '$setOnInsert': {'_id': str(uuid4())}
+                },
+                upsert=True
+            )
+
+    @mongo_auto_reconnect
+    def dump(self) -> dict:
+        return {
+            collection: self.to_models(model, self.db[collection].find())
+            for collection, model in MODELS.items()
+        }
+
+    @mongo_auto_reconnect
+    def load(self, data: dict):
+        for collection in MODELS:
+            self.db[collection].delete_many({})
+            if data.get(collection):
+                self.db[collection].insert_many(list(map(self.encode, data[collection])))
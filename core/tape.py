@@ -0,0 +1,42 @@
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Dict, List
+
+from core.candles import get_timestamp
+from core.schema import Trade, TradeListener
+
+
+class TradeTapeParams:
+    MAX_TRADES = 1000  # per market
+
+
+def merge_trades(upstream: list, local: list, key, limit=None) -> list:
+    trades = sorted(upstream + local, key=key, reverse=True)
+    return trades[:limit] if limit else trades
+
+
+class TradeTape(TradeListener):
+
+    def __init__(self, exchange_id, maxsize=TradeTapeParams.MAX_TRADES):
+        self.exchange_id = exchange_id
+        self.maxsize = maxsize
+        self.markets = dict()  # type: Dict[str, deque]  # appends and copies are atomic, no lock needed
+
+    def on_trade(self, exchange_id, trade: Trade):
+        if exchange_id != self.exchange_id:
+            return
+
+        tape = self.markets.get(trade['market'])
+        if tape is None:
+            tape = self.markets.setdefault(trade['market'], deque(maxlen=self.maxsize))
+        tape.append((get_timestamp(trade['created_at']), trade))
+
+    def has_market(self, market) -> bool:
+        return market in self.markets
+
+    def get_trades(self, market, start=None, end=None, limit=None) -> List[Trade]:
+        entries = list(self.markets.get(market, ()))
+        lo = bisect_left(entries, (start,)) if start is not None else 0
+        hi = bisect_right(entries, (end + 1,)) if end is not None else len(entries)
+        trades = [trade for _, trade in reversed(entries[lo:hi])]
+        return trades[:limit] if limit else trades
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+from importlib.util import find_spec
+from unittest import TestCase, skipUnless
+
+from bson import Int64
+from mongomock import MongoClient
+
+from core.clock import FrozenClock
+from core.executor import SimpleExecutor
+from core.nonces import MemoryNonceStore
+from core.scheduler import MongoLease
+from core.schema import Order, OrderStatus
+from tests.test_trading import POLONIEX_BUY_ORDER
+
+HAS_AIO = all(find_spec(name) for name in ('motor', 'quart', 'aiohttp'))
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+class FakeAsyncExecutor:
+
+    def __init__(self):
+        self.processed = 0
+
+    async def process(self):
+        self.processed += 1
+
+    async def run_sync(self, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+
+@skipUnless(HAS_AIO, 'motor, quart and aiohttp are not installed')
+class AsyncExecutionSchedulerTests(TestCase):
+
+    def test_lazy_lock(self):
+        from core.aio.scheduler import AsyncExecutionScheduler
+
+        scheduler = AsyncExecutionScheduler(executor=FakeAsyncExecutor())
+        self.assertIsNone(scheduler.lock)
+
+        self.assertTrue(run(scheduler.tick()))
+        self.assertEqual(1, scheduler.ticks)
+
+    def test_lease(self):
+        from core.aio.scheduler import AsyncExecutionScheduler
+
+        db = MongoClient().get_database('testex_aio_lease')
+        first = AsyncExecutionScheduler(executor=FakeAsyncExecutor(), lease=MongoLease(db))
+        second = AsyncExecutionScheduler(executor=FakeAsyncExecutor(), lease=MongoLease(db))
+
+        self.assertTrue(run(first.tick()))
+        self.assertFalse(run(second.tick()))
+        self.assertEqual(0, second.executor.processed)
+        self.assertEqual(1, second.leased_ticks)
+
+
+@skipUnless(HAS_AIO, 'motor, quart and aiohttp are not installed')
+class AsyncExecutorTests(TestCase):
+
+    def test_shared_logic(self):
+        from core.aio.executor import AsyncExecutor
+
+        clock = FrozenClock(start=1544400000.)
+        params = dict(POLONIEX_BUY_ORDER, number='aio')
+        order = AsyncExecutor(clock=clock).make_order(**params)
+        self.assertEqual(SimpleExecutor(clock=clock).make_order(**params), order)
+        self.assertEqual(datetime(2018, 12, 10), order['created_at'])
+        self.assertEqual(OrderStatus.OPENED, order['status'])
+
+
+@skipUnless(HAS_AIO, 'motor, quart and aiohttp are not installed')
+class MotorStorageTests(TestCase):
+
+    def test_fixed_point(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from core.aio.storage import MotorStorage
+
+        storage = MotorStorage(AsyncIOMotorClient().get_database('testex_aio'), fixed_point=True)
+        order = Order(_id='1', api_key='key', price=Decimal('0.5'), amount=Decimal('2'), fee=Decimal('0.0025'))
+        document = storage.encode(order)
+        self.assertEqual(Int64(50000000), document['price'])
+        self.assertEqual('1', document['_id'])
+
+        self.assertEqual(Decimal('0.5'), storage.to_model(Order, document)['price'])
+        self.assertEqual(Decimal('0.0025'), storage.to_model(Order, document)['fee'])
+
+
+@skipUnless(HAS_AIO, 'motor, quart and aiohttp are not installed')
+class AsgiAppTests(TestCase):
+
+    def test_nonce_store(self):
+        from asgi import make_nonce_store
+
+        self.assertIsInstance(make_nonce_store('memory'), MemoryNonceStore)
+        self.assertRaises(ValueError, make_nonce_store, 'mongo')
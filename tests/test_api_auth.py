@@ -36,6 +36,13 @@ class ApiAuthTests(FlaskTestCase):
         })
         self.assertTrue(send_order.called)
 
+    @patch('core.bittrex.stub.BittrexApiStub.get_balances', return_value={})
+    def test_bittrex_v11_api_key_passed(self, get_balances):
+        url = 'http://localhost/bittrex.com/api/v1.1/account/getbalances?nonce=1&apikey=1'
+        self.client.get(url, headers={'apisign': sign_message(url, key='1')})
+        get_balances.assert_called_once_with(api_key='1')
+        self.assertFalse(hasattr(self.app.bittrex_stub, 'api_key'))
+
     @parameterized.expand([
         ({}, {}, 'Invalid nonce parameter.'),
         ({'Key': '42'}, {}, 'Invalid nonce parameter.'),
@@ -30,10 +30,10 @@ class BittrexMarketTests(FlaskTestCase):
         ('?market=BTC-XRP&quantity=100&rate=0.000001', 'DUST_TRADE_DISALLOWED_MIN_VALUE_50K_SAT'),
     ])
     @patch('core.bittrex.stub.BittrexApiStub.check_balance')
-    @patch('core.bittrex.stub.BittrexApiStub.switch_user')
+    @patch('core.bittrex.stub.BittrexApiStub.authenticate')
     @patch('core.bittrex.stub.BittrexApiStub.markets', new_callable=PropertyMock, return_value=MARKETS)
     def test_bittrex_market_v11_buylimit_failed(self, query, message,
-                                                _markets, _switch_user, _check_balance):
+                                                _markets, _authenticate, _check_balance):
         rv = self.client.get('/bittrex.com/api/v1.1/market/buylimit' + query)
         self.assertEqual(200, rv.status_code)
         res = dict(result=None, success=False, message=message)
@@ -46,9 +46,9 @@ class BittrexMarketTests(FlaskTestCase):
     @patch('core.executor.SimpleExecutor.send_order')
     @patch('core.bittrex.stub.uuid4', return_value='123')
     @patch('core.bittrex.stub.BittrexApiStub.check_balance')
-    @patch('core.bittrex.stub.BittrexApiStub.switch_user')
+    @patch('core.bittrex.stub.BittrexApiStub.authenticate')
     @patch('core.bittrex.stub.BittrexApiStub.markets', new_callable=PropertyMock, return_value=MARKETS)
-    def test_bittrex_market_v11_limit_succeeded(self, url, _markets, _switch_user, _check_balance,
+    def test_bittrex_market_v11_limit_succeeded(self, url, _markets, _authenticate, _check_balance,
                                                 _uuid4, send_order):
         rv = self.client.get(url)
         self.assertEqual(200, rv.status_code)
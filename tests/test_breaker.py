@@ -0,0 +1,81 @@
+import requests
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from core.bittrex.proxy import BittrexJsonRequest
+from core.breaker import CircuitBreaker, CircuitOpenError, CircuitState, breakers
+from tests.test_public import make_upstream_response
+
+
+class CircuitBreakerTests(TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=30, timer=lambda: self.now)
+        self.failing = MagicMock(side_effect=requests.ConnectionError)
+
+    def test_open(self):
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.breaker.call(self.failing)
+        self.assertEqual(CircuitState.OPEN, self.breaker.state)
+
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(self.failing)
+        self.assertEqual(2, self.failing.call_count)
+        self.assertEqual(1, self.breaker.rejected)
+
+    def test_half_open(self):
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.breaker.call(self.failing)
+
+        self.now = 30
+        with self.assertRaises(requests.ConnectionError):
+            self.breaker.call(self.failing)
+        self.assertEqual(CircuitState.OPEN, self.breaker.state)
+
+        self.now = 60
+        self.assertEqual(1, self.breaker.call(lambda: 1))
+        self.assertEqual(CircuitState.CLOSED, self.breaker.state)
+
+    def test_api_errors_ignored(self):
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                self.breaker.call(MagicMock(side_effect=ValueError))
+        self.assertEqual(CircuitState.CLOSED, self.breaker.state)
+
+    def test_half_open_unexpected_error(self):
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.breaker.call(self.failing)
+
+        self.now = 30
+        with self.assertRaises(ValueError):
+            self.breaker.call(MagicMock(side_effect=ValueError))
+        self.assertEqual(CircuitState.OPEN, self.breaker.state)
+
+        self.now = 60
+        self.assertEqual(1, self.breaker.call(lambda: 1))
+        self.assertEqual(CircuitState.CLOSED, self.breaker.state)
+
+
+class LastKnownGoodTests(TestCase):
+
+    def setUp(self):
+        breakers.clear()
+
+    @patch('requests.Session.get')
+    def test_fallback(self, get):
+        get.return_value = make_upstream_response(b'{"success": true, "result": [{"MarketName": "BTC-LKG"}]}')
+        request = BittrexJsonRequest()
+        self.assertEqual([{'MarketName': 'BTC-LKG'}], request.getmarkets(lkg=1))
+
+        get.side_effect = requests.ConnectionError
+        for _ in range(3):
+            self.assertEqual([{'MarketName': 'BTC-LKG'}], request.getmarkets(lkg=1))
+        self.assertEqual(CircuitState.OPEN, breakers['https://bittrex.com/api/v1.1/public/getmarkets'].state)
+        self.assertEqual(3, get.call_count)
+
+        with self.assertRaises(CircuitOpenError):
+            request.getmarkets(lkg=2)
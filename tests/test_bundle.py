@@ -0,0 +1,56 @@
+import os
+import requests
+import tempfile
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import patch
+
+from core.bittrex.proxy import BittrexApiProxy
+from core.bittrex.stub import BittrexApiStub
+from core.bundle import BundleParams, load_bundle, prewarm, save_bundle
+from core.poloniex.proxy import PoloniexApiProxy
+from core.poloniex.stub import PoloniexApiStub
+
+BUNDLE = dict(
+    version=BundleParams.VERSION,
+    created_at='2018-12-10T00:00:00',
+    bittrex=dict(
+        markets=[{'MarketName': 'BTC-XRP', 'BaseCurrency': 'BTC', 'MarketCurrency': 'XRP',
+                  'MinTradeSize': Decimal('1')}],
+        currencies=[{'Currency': 'BTC', 'TxFee': Decimal('0.0005')}]
+    ),
+    poloniex=dict(
+        tickers={'BTC_XRP': {'last': Decimal('0.00001')}},
+        currencies={'BTC': {'txFee': Decimal('0.0005')}}
+    )
+)
+
+
+class BundleTests(TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'data', 'metadata.json')
+
+    def test_round_trip(self):
+        save_bundle(BUNDLE, self.path)
+        self.assertEqual(BUNDLE, load_bundle(self.path))
+
+    def test_version_mismatch(self):
+        save_bundle(dict(BUNDLE, version=0), self.path)
+        self.assertIsNone(load_bundle(self.path))
+        self.assertIsNone(load_bundle(self.path + '.missing'))
+
+    @patch('requests.Session.get', side_effect=requests.ConnectionError)
+    def test_prewarm_offline(self, _get):
+        bittrex, poloniex = BittrexApiStub(), PoloniexApiStub()
+        prewarm(BUNDLE, bittrex, poloniex)
+
+        for _ in range(2):
+            self.assertEqual('BTC-XRP', bittrex.parse_market('BTC-XRP'))
+            self.assertEqual('BTC', bittrex.parse_currency('BTC'))
+            self.assertEqual('BTC_XRP', poloniex.parse_currency_pair('BTC_XRP'))
+            self.assertEqual('BTC', poloniex.parse_currency('BTC'))
+            for prop in [BittrexApiProxy.markets, BittrexApiProxy.currencies,
+                         PoloniexApiProxy.tickers, PoloniexApiProxy.currencies]:
+                for flight in list(prop.fget.cache.flights.values()):
+                    flight.result(timeout=1)
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import threading
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from core.cache import SwrCache, SqliteCacheStore
+from core.payload import Payload
+
+
+class SwrCacheTests(TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.cache = SwrCache('test', soft_ttl=5, hard_ttl=60, timer=lambda: self.now)
+
+    def test_fresh(self):
+        loader = MagicMock(return_value=1)
+        self.assertEqual(1, self.cache.get('key', loader))
+        self.now = 4
+        self.assertEqual(1, self.cache.get('key', loader))
+        self.assertEqual(1, loader.call_count)
+        self.assertEqual(1, self.cache.stats['hits'])
+
+    def test_stale_while_revalidate(self):
+        self.cache.get('key', lambda: 1)
+        self.now = 10
+        self.assertEqual(1, self.cache.get('key', lambda: 2))
+        self.cache.flights['key'].result(timeout=1)
+        self.assertEqual(2, self.cache.get('key', lambda: 3))
+        self.assertEqual(1, self.cache.stats['stale_hits'])
+        self.assertEqual(1, self.cache.stats['refreshes'])
+
+    def test_hard_expired(self):
+        self.cache.get('key', lambda: 1)
+        self.now = 60
+        self.assertEqual(2, self.cache.get('key', lambda: 2))
+        self.assertEqual(2, self.cache.stats['misses'])
+
+    def test_single_flight(self):
+        started, release = threading.Event(), threading.Event()
+        loader = MagicMock(side_effect=lambda: started.set() or release.wait() and 1)
+
+        results = list()
+        leader = threading.Thread(target=lambda: results.append(self.cache.get('key', loader)))
+        leader.start()
+        started.wait(timeout=1)
+        followers = [threading.Thread(target=lambda: results.append(self.cache.get('key', loader)))
+                     for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        while self.cache.stats['coalesced'] < 4:
+            pass
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(timeout=1)
+
+        self.assertEqual([1] * 5, results)
+        self.assertEqual(1, loader.call_count)
+
+    def test_error_not_cached(self):
+        with self.assertRaises(ValueError):
+            self.cache.get('key', MagicMock(side_effect=ValueError))
+        self.assertEqual(1, self.cache.get('key', lambda: 1))
+        self.assertEqual(1, self.cache.stats['errors'])
+
+
+class SqliteCacheStoreTests(TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(handle)
+        self.store = SqliteCacheStore(self.path, max_entries=2)
+
+    def tearDown(self):
+        self.store.close()
+        os.remove(self.path)
+
+    def test_shared(self):
+        worker = SwrCache('test', soft_ttl=5, hard_ttl=60, store=self.store)
+        worker.get('key', lambda: dict(a=1), store_key='key')
+
+        restarted = SwrCache('test', soft_ttl=5, hard_ttl=60, store=SqliteCacheStore(self.path))
+        loader = MagicMock()
+        self.assertEqual(dict(a=1), restarted.get('key', loader, store_key='key'))
+        self.assertFalse(loader.called)
+        self.assertEqual(1, restarted.stats['store_hits'])
+
+    def test_expired(self):
+        self.store.set('key', 1)
+        self.assertIsNone(self.store.get('key', max_age=0))
+        self.assertEqual(1, self.store.get('key', max_age=60)[0])
+
+    def test_eviction(self):
+        self.store.set('a', 1)
+        self.store.set('b', 2)
+        self.store.get('a', max_age=60)
+        self.store.set('c', 3)
+        self.assertEqual(2, len(self.store))
+        self.assertIsNone(self.store.get('b', max_age=60))
+
+    def test_payload(self):
+        self.store.set('payload', Payload(b'{"last": "1"}', status_code=503))
+        payload = self.store.get('payload', max_age=60)[0]
+        self.assertEqual(b'{"last": "1"}', payload.content)
+        self.assertEqual(503, payload.status_code)
+
+        self.store.set('data', dict(last=Decimal('0.1')))
+        self.assertEqual(dict(last=Decimal('0.1')), self.store.get('data', max_age=60)[0])
+
+    def test_not_serializable(self):
+        self.store.set('key', object())
+        self.assertIsNone(self.store.get('key', max_age=60))
+
+    def test_private_file(self):
+        self.assertEqual(0o600, os.stat(self.path).st_mode & 0o777)
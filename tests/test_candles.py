@@ -0,0 +1,96 @@
+import simplejson as json
+from datetime import datetime
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import patch
+
+from core.candles import CandleAggregator, CandleSeries, get_timestamp, merge_candles
+from core.executor import SimpleExecutor, make_trade
+from core.poloniex.stub import PoloniexApiStub
+from core.poloniex.types import PoloniexErrorMessage
+from core.storage.memory import MemoryStorage
+from tests.test_public import make_upstream_response
+from tests.test_trading import POLONIEX_BUY_ORDER
+
+
+class CandleSeriesTests(TestCase):
+
+    def test_aggregate(self):
+        series = CandleSeries(300)
+        for timestamp, price, amount in [(0, '2', '1'), (10, '3', '1'), (299, '1', '2'), (300, '4', '1')]:
+            series.add(timestamp, Decimal(price), Decimal(amount))
+
+        self.assertEqual(2, len(series))
+        candle = series[0].to_dict()
+        self.assertEqual(dict(date=0, open=Decimal('2'), high=Decimal('3'), low=Decimal('1'), close=Decimal('1'),
+                              volume=Decimal('7'), quoteVolume=Decimal('4'), weightedAverage=Decimal('1.75')),
+                         candle)
+
+    def test_ring(self):
+        series = CandleSeries(300, maxsize=3)
+        for i in range(5):
+            series.add(i * 300, Decimal(i + 1), Decimal('1'))
+
+        self.assertEqual([600, 900, 1200], [series[i].date for i in range(len(series))])
+        self.assertEqual([900], [candle.date for candle in series.get_range(700, 1000)])
+        self.assertEqual([], series.get_range(0, 599))
+
+        series.add(950, Decimal('10'), Decimal('1'))
+        series.add(10, Decimal('10'), Decimal('1'))
+        self.assertEqual(Decimal('10'), series[1].high)
+        self.assertEqual(3, len(series))
+
+    def test_merge(self):
+        upstream = [dict(date=300, high=2, low=1, open=1, close=2, volume=3, quoteVolume=2, weightedAverage=1.5),
+                    dict(date=600, high=1, low=1, open=1, close=1, volume=1, quoteVolume=1, weightedAverage=1)]
+        series = CandleSeries(300)
+        series.add(600, Decimal('3'), Decimal('1'))
+        series.add(900, Decimal('4'), Decimal('1'))
+
+        candles = merge_candles(upstream, [candle.to_dict() for candle in series.get_range(0, 900)])
+        self.assertEqual([300, 600, 900], [candle['date'] for candle in candles])
+        self.assertEqual(dict(date=600, high=3, low=1, open=1, close=3, volume=4, quoteVolume=2, weightedAverage=2),
+                         candles[1])
+
+
+class CandleAggregatorTests(TestCase):
+
+    def setUp(self):
+        self.executor = SimpleExecutor(storage=MemoryStorage())
+        self.stub = PoloniexApiStub(executor=self.executor)
+
+    @patch('requests.Session.get')
+    def test_execute_order(self, get):
+        get.return_value = make_upstream_response(b'[{"date": 0, "high": 0, "low": 0, "open": 0, "close": 0, '
+                                                  b'"volume": 0, "quoteVolume": 0, "weightedAverage": 0}]')
+        order = self.executor.send_order(**dict(POLONIEX_BUY_ORDER, number='candles'))
+        self.executor.execute_order(order, non_execute_prob=0, trade_amount=Decimal('100'))
+
+        payload = self.stub.return_chart_data('BTC_XRP', start=None, end=None, period='300')
+        candles = json.loads(payload.content, use_decimal=True)
+        self.assertEqual(1, len(candles))
+        self.assertEqual(Decimal('0.000001'), candles[0]['close'])
+        self.assertEqual(Decimal('100'), candles[0]['quoteVolume'])
+
+        payload = self.stub.return_chart_data('BTC_XRP', start='1', end='2', period='300')
+        self.assertEqual(0, json.loads(payload.content)[0]['date'])
+
+        response = self.stub.return_chart_data('BTC_XRP', start=None, end=None, period='60')
+        self.assertEqual(dict(error=PoloniexErrorMessage.INVALID_PERIOD), response)
+
+    def test_other_exchange_ignored(self):
+        aggregator = CandleAggregator('poloniex')
+        trade = make_trade(dict(POLONIEX_BUY_ORDER, _id='1'), Decimal('1'))
+        aggregator.on_trade('bittrex', trade)
+        self.assertFalse(aggregator.has_market('BTC_XRP'))
+
+        aggregator.on_trade('poloniex', trade)
+        timestamp = get_timestamp(datetime.utcnow())
+        self.assertEqual(1, len(aggregator.get_candles('BTC_XRP', 86400, 0, timestamp)))
+
+    def test_seeded_from_storage(self):
+        order = self.executor.send_order(**dict(POLONIEX_BUY_ORDER, number='candles-seed'))
+        self.executor.execute_order(order, non_execute_prob=0, trade_amount=Decimal('100'))
+
+        stub = PoloniexApiStub(executor=SimpleExecutor(storage=self.executor.storage))
+        self.assertTrue(stub.candles.has_market('BTC_XRP'))
@@ -0,0 +1,109 @@
+import time
+from datetime import datetime
+from decimal import Decimal
+from mongomock import MongoClient
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from core.clock import Clock, FrozenClock, MongoOffset, ScaledClock, make_clock, set_clock
+from core.executor import SimpleExecutor
+from core.poloniex.stub import PoloniexApiStub
+from core.scheduler import ExecutionScheduler
+from core.storage.memory import MemoryStorage
+from tests.test_case import FlaskTestCase
+from tests.test_trading import POLONIEX_BUY_ORDER
+
+
+class ClockTests(TestCase):
+
+    def test_frozen(self):
+        clock = FrozenClock(start=1544400000.)
+        self.assertEqual(clock.time(), clock.time())
+        clock.advance(86400)
+        self.assertEqual(datetime(2018, 12, 11), clock.utcnow())
+        self.assertRaises(ValueError, clock.advance, -1)
+
+    def test_make_clock(self):
+        self.assertEqual('wall', make_clock().mode)
+        self.assertEqual(1544400000., make_clock('frozen', start=1544400000.).time())
+        clock = make_clock('fast', speed=100.)
+        self.assertIsInstance(clock, ScaledClock)
+        self.assertEqual(100., clock.speed)
+
+    def test_executor_clock(self):
+        clock = FrozenClock(start=1544400000.)
+        executor = SimpleExecutor(storage=MemoryStorage(), clock=clock)
+        PoloniexApiStub(executor=executor)
+
+        order = executor.send_order(**dict(POLONIEX_BUY_ORDER, number='clock'))
+        clock.advance(30 * 86400)
+        executor.execute_order(order, non_execute_prob=0, trade_amount=Decimal('100'))
+
+        self.assertEqual(datetime(2018, 12, 10), executor.get_order(POLONIEX_BUY_ORDER['api_key'], 'clock')['created_at'])
+        trade = executor.storage.get_trades(POLONIEX_BUY_ORDER['api_key'])[0]
+        self.assertEqual(datetime(2019, 1, 9), trade['created_at'])
+
+    def test_shared_offset(self):
+        db = MongoClient().get_database('testex_clock')
+        first = FrozenClock(start=1544400000., offset=MongoOffset(db, refresh_interval=0))
+        second = FrozenClock(start=1544400000., offset=MongoOffset(db, refresh_interval=0))
+
+        first.advance(86400)
+        self.assertEqual(datetime(2018, 12, 11), second.utcnow())
+
+    def test_shared_epoch(self):
+        db = MongoClient().get_database('testex_clock_epoch')
+        timer = MagicMock(return_value=100.)
+        first = ScaledClock(start=1544400000., speed=10., timer=timer,
+                            offset=MongoOffset(db, refresh_interval=0))
+
+        # a worker started later, or after a restart, continues the same virtual time
+        timer.return_value = 103.
+        second = ScaledClock(start=1600000000., speed=1., timer=timer,
+                             offset=MongoOffset(db, refresh_interval=0))
+        self.assertEqual(10., second.speed)
+        self.assertEqual(1544400030., second.time())
+        self.assertEqual(first.time(), second.time())
+
+    def test_shared_frozen_start(self):
+        db = MongoClient().get_database('testex_clock_frozen')
+        FrozenClock(offset=MongoOffset(db, refresh_interval=0)).advance(60)
+        first = FrozenClock(offset=MongoOffset(db, refresh_interval=0))
+        second = FrozenClock(offset=MongoOffset(db, refresh_interval=0))
+        self.assertEqual(first.time(), second.time())
+
+    def test_catch_up(self):
+        executor = MagicMock()
+        scheduler = ExecutionScheduler(executor=executor, interval=None)
+        self.assertEqual(5, scheduler.catch_up(5))
+        self.assertEqual(0, executor.process.call_count)
+
+        scheduler.start()
+        deadline = time.monotonic() + 5
+        while executor.process.call_count < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        scheduler.stop()
+        self.assertEqual(5, executor.process.call_count)
+
+
+class AdminClockTests(FlaskTestCase):
+
+    def tearDown(self):
+        set_clock(Clock())
+
+    def test_advance(self):
+        before = self.client.get('/admin/clock').json
+        self.assertEqual('wall', before['mode'])
+
+        rv = self.client.post('/admin/clock', data=dict(seconds='3600'))
+        self.assertEqual(200, rv.status_code)
+        self.assertGreaterEqual(rv.json['time'] - before['time'], 3600)
+        self.assertEqual(0, rv.json['ticks'])
+
+    def test_advance_disabled(self):
+        self.app.config['ADMIN_CLOCK_ENABLED'] = False
+        self.assertEqual(403, self.client.post('/admin/clock', data=dict(seconds='3600')).status_code)
+
+    def test_advance_invalid(self):
+        self.assertEqual(400, self.client.post('/admin/clock').status_code)
+        self.assertEqual(400, self.client.post('/admin/clock', data=dict(seconds='-1')).status_code)
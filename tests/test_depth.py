@@ -0,0 +1,105 @@
+import simplejson as json
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import patch
+
+from core.bittrex.stub import BittrexApiStub
+from core.depth import DepthSide, merge_levels
+from core.executor import SimpleExecutor
+from core.poloniex.stub import PoloniexApiStub
+from core.schema import OrderDirection
+from core.storage.memory import MemoryStorage
+from tests.test_public import make_upstream_response
+from tests.test_trading import BITTREX_BUY_ORDER, POLONIEX_BUY_ORDER, POLONIEX_SELL_ORDER
+
+
+class DepthSideTests(TestCase):
+
+    def test_update(self):
+        side = DepthSide(descending=True)
+        for price, delta in [('1', '5'), ('3', '1'), ('2', '2'), ('3', '-1'), ('1', '-2')]:
+            side.update(Decimal(price), Decimal(delta))
+
+        self.assertEqual([(Decimal('2'), Decimal('2')), (Decimal('1'), Decimal('3'))], side.top(5))
+        self.assertEqual([(Decimal('2'), Decimal('2'))], side.top(1))
+        self.assertEqual([], side.top(0))
+
+    def test_merge_levels(self):
+        upstream = [(Decimal(5), Decimal(1)), (Decimal(3), Decimal(1)), (Decimal(1), Decimal(1))]
+        local = [(Decimal(4), Decimal(2)), (Decimal(3), Decimal(2))]
+        self.assertEqual([(Decimal(5), Decimal(1)), (Decimal(4), Decimal(2)), (Decimal(3), Decimal(3))],
+                         merge_levels(upstream, local, descending=True, depth=3))
+        self.assertEqual([(Decimal(1), Decimal(1)), (Decimal(3), Decimal(3))],
+                         merge_levels(upstream[::-1], local[::-1], descending=False, depth=2))
+
+
+class OrderBookOverlayTests(TestCase):
+
+    def setUp(self):
+        self.executor = SimpleExecutor(storage=MemoryStorage())
+        self.bittrex = BittrexApiStub(executor=self.executor)
+        self.poloniex = PoloniexApiStub(executor=self.executor)
+
+    @patch('requests.Session.get')
+    def test_return_order_book(self, get):
+        get.return_value = make_upstream_response(
+            b'{"asks": [["0.00000110", 10]], "bids": [["0.00000100", 10], ["0.00000090", 10]], '
+            b'"isFrozen": "0", "seq": 1}'
+        )
+        self.executor.send_order(**dict(POLONIEX_BUY_ORDER, number='overlay-buy'))
+        self.executor.send_order(**dict(POLONIEX_SELL_ORDER, number='overlay-sell', price=Decimal('0.0000012')))
+
+        payload = self.poloniex.return_order_book('BTC_XRP', depth='2')
+        book = json.loads(payload.content, use_decimal=True)
+        self.assertEqual([['0.00000100', Decimal('510')], ['0.00000090', Decimal('10')]], book['bids'])
+        self.assertEqual([['0.00000110', Decimal('10')], ['0.00000120', Decimal('500')]], book['asks'])
+
+        self.executor.cancel_order(POLONIEX_BUY_ORDER['api_key'], 'overlay-buy')
+        book = json.loads(self.poloniex.return_order_book('BTC_XRP', depth='2').content, use_decimal=True)
+        self.assertEqual(Decimal('10'), book['bids'][0][1])
+
+    @patch('requests.Session.get')
+    def test_get_order_book(self, get):
+        get.return_value = make_upstream_response(
+            b'{"success": true, "message": "", "result": {"buy": [], "sell": [{"Quantity": 1, "Rate": 0.1}]}}'
+        )
+        self.assertEqual(200, self.bittrex.get_order_book('BTC-XRP', 'both').status_code)
+
+        order = self.executor.send_order(**dict(BITTREX_BUY_ORDER, number='overlay'))
+        self.executor.execute_order(order, non_execute_prob=0, trade_amount=Decimal('100'))
+        result = self.bittrex.get_order_book('BTC-XRP', 'both')['result']
+        self.assertEqual([dict(Quantity=Decimal('400'), Rate=Decimal('0.000001'))], result['buy'])
+        self.assertEqual([dict(Quantity=Decimal('1'), Rate=Decimal('0.1'))], result['sell'])
+
+    @patch('requests.Session.get')
+    def test_resync_from_storage(self, get):
+        get.return_value = make_upstream_response(
+            b'{"asks": [["0.00000110", 10]], "bids": [["0.00000090", 10]], "isFrozen": "0", "seq": 1}'
+        )
+        other = SimpleExecutor(storage=self.executor.storage)
+        PoloniexApiStub(executor=other)
+
+        other.send_order(**dict(POLONIEX_BUY_ORDER, number='other-worker'))
+        with patch.object(self.executor, 'get_orders') as get_orders:
+            book = json.loads(self.poloniex.return_order_book('BTC_XRP', depth='2').content, use_decimal=True)
+            get_orders.assert_not_called()
+        self.assertEqual([['0.00000090', 10]], book['bids'])
+
+        self.poloniex.depth_book.resync(self.executor)
+        book = json.loads(self.poloniex.return_order_book('BTC_XRP', depth='2').content, use_decimal=True)
+        self.assertEqual(['0.00000100', Decimal('500')], book['bids'][0])
+
+        other.cancel_order(POLONIEX_BUY_ORDER['api_key'], 'other-worker')
+        self.poloniex.depth_book.resync(self.executor)
+        book = json.loads(self.poloniex.return_order_book('BTC_XRP', depth='2').content, use_decimal=True)
+        self.assertEqual([['0.00000090', 10]], book['bids'])
+
+    def test_start(self):
+        self.executor.send_order(**dict(POLONIEX_BUY_ORDER, number='resync'))
+        depth_book = self.poloniex.depth_book
+        depth_book.sides.clear()
+
+        depth_book.start(self.executor, interval=60)
+        depth_book.stop()
+        self.assertEqual(1, depth_book.resyncs)
+        self.assertEqual([(Decimal('0.000001'), Decimal('500'))], depth_book.get_levels('BTC_XRP', OrderDirection.BUY, 1))
@@ -5,7 +5,7 @@ from mongomock import MongoClient
 
 from core.bittrex.stub import BittrexApiStub
 from core.executor import SimpleExecutor
-from core.schema import OrderDirection
+from core.schema import OrderDirection, OrderStatus
 from tests.test_case import patch_decimal128
 
 
@@ -37,8 +37,96 @@ class ExecutionTests(TestCase):
         self.assertEqual(Decimal('100'), order['executed_amount'])
         self.assertEqual(Decimal('0.000001'), order['average_price'])
 
+        stored_order = self.executor.storage.get_order(api_key='test_bittrex_execution', number='5')
+        self.assertEqual(Decimal('400'), stored_order['remaining_amount'])
+        self.assertEqual(Decimal('0.00010000'), stored_order['total'])
+        self.assertEqual(Decimal('0.00050000'), stored_order['reserved'])
+
         trades = self.executor.get_trades(
             api_key='test_bittrex_execution',
             order_number='5'
         )
         self.assertEqual(1, len(trades))
+
+    def test_execute_order_buffered(self):
+        stub = BittrexApiStub(executor=self.executor)
+        order = self.executor.send_order(
+            api_key='test_bittrex_buffered_execution',
+            exchange_id='bittrex',
+            number='6',
+            direction=OrderDirection.SELL,
+            market='BTC-XRP',
+            price=Decimal('0.000001'),
+            amount=Decimal('500'),
+            base_currency='BTC',
+            market_currency='XRP',
+            fee_currency='BTC'
+        )
+
+        saved_round_trips = self.executor.saved_round_trips
+        with self.executor.buffered() as buffer:
+            order = self.executor.execute_order(order, non_execute_prob=0, trade_amount=Decimal('500'))
+            # the fill is a conditional write, only the trade and the balances wait for the flush
+            self.assertEqual(3, len(buffer))
+            self.assertEqual(0, len(self.executor.get_trades('test_bittrex_buffered_execution')))
+
+        self.assertEqual(1, self.executor.saved_round_trips - saved_round_trips)
+        self.assertEqual(OrderStatus.CLOSED, self.executor.get_order('test_bittrex_buffered_execution', '6')['status'])
+
+        xrp_balance = self.executor.get_balance(api_key='test_bittrex_buffered_execution', currency='XRP')
+        self.assertEqual(Decimal(), xrp_balance['frozen'])
+        self.assertEqual(Decimal('-500'), xrp_balance['available'])
+
+        btc_balance = self.executor.get_balance(api_key='test_bittrex_buffered_execution', currency='BTC')
+        self.assertEqual(Decimal('0.00049875'), btc_balance['available'])
+
+    def test_execute_cancelled_order(self):
+        stub = BittrexApiStub(executor=self.executor)
+        order = self.executor.send_order(
+            api_key='test_bittrex_cancelled_execution',
+            exchange_id='bittrex',
+            number='7',
+            direction=OrderDirection.BUY,
+            market='BTC-XRP',
+            price=Decimal('0.000001'),
+            amount=Decimal('500'),
+            base_currency='BTC',
+            market_currency='XRP',
+            fee_currency='BTC'
+        )
+
+        # the tick read the order before the cancel landed
+        self.executor.cancel_order('test_bittrex_cancelled_execution', '7')
+        self.assertIsNone(self.executor.execute_order(order, non_execute_prob=0, trade_amount=Decimal('100')))
+
+        stored_order = self.executor.storage.get_order(api_key='test_bittrex_cancelled_execution', number='7')
+        self.assertEqual(OrderStatus.CLOSED, stored_order['status'])
+        self.assertEqual(Decimal(), stored_order['executed_amount'])
+        self.assertEqual(0, len(self.executor.get_trades('test_bittrex_cancelled_execution')))
+
+        btc_balance = self.executor.get_balance(api_key='test_bittrex_cancelled_execution', currency='BTC')
+        self.assertEqual(Decimal(), btc_balance['available'])
+        self.assertEqual(Decimal(), btc_balance['frozen'])
+
+    def test_execute_legacy_order(self):
+        stub = BittrexApiStub(executor=self.executor)
+        # stored before the derived fields were persisted
+        self.executor.storage.insert_order(dict(
+            _id='8',
+            api_key='test_bittrex_legacy_execution',
+            exchange_id='bittrex',
+            direction=OrderDirection.BUY,
+            market='BTC-XRP',
+            price=Decimal('0.000001'),
+            amount=Decimal('500'),
+            base_currency='BTC',
+            market_currency='XRP',
+            fee_currency='BTC',
+            status=OrderStatus.OPENED,
+            executed_amount=Decimal()
+        ))
+
+        order = self.executor.storage.get_order(api_key='test_bittrex_legacy_execution', number='8')
+        self.executor.execute_order(order, non_execute_prob=0, trade_amount=Decimal('100'))
+        stored_order = self.executor.storage.get_order(api_key='test_bittrex_legacy_execution', number='8')
+        self.assertEqual(Decimal('400'), stored_order['remaining_amount'])
@@ -0,0 +1,114 @@
+import simplejson as json
+import numpy as np
+from parameterized import parameterized
+from unittest import TestCase
+from unittest.mock import patch
+
+from core.bittrex.generator import BittrexGeneratorStub
+from core.generator import GeneratorParams, MarketGenerator
+from core.poloniex.generator import PoloniexGeneratorStub
+from tests.test_case import FlaskTestCase
+
+
+class MarketGeneratorTests(TestCase):
+
+    def setUp(self):
+        self.now = 1544400000.
+
+    def make_generator(self, **kwargs):
+        return MarketGenerator(seed=1, timer=lambda: self.now, **kwargs)
+
+    @parameterized.expand([('gbm',), ('ou',)])
+    def test_deterministic(self, process):
+        first, second = self.make_generator(process=process), self.make_generator(process=process)
+        self.now += 30
+        self.assertEqual(GeneratorParams.TAPE_SIZE + 30, first.advance())
+        second.advance()
+        np.testing.assert_array_equal(first.log_price, second.log_price)
+        self.assertTrue(np.all(first.price > 0))
+
+    def test_advance(self):
+        generator = self.make_generator()
+        steps = generator.advance()
+        self.now += 0.5
+        self.assertEqual(steps, generator.advance())
+
+        self.now += 86400
+        self.assertEqual(steps + GeneratorParams.MAX_STEPS, generator.advance())
+        self.assertEqual(self.now, generator.updated_at + 0.5)
+
+    def test_summaries(self):
+        generator = self.make_generator()
+        summaries = generator.get_summaries()
+        self.assertTrue(np.all(summaries['low'] <= summaries['last']))
+        self.assertTrue(np.all(summaries['last'] <= summaries['high']))
+        self.assertTrue(np.all(summaries['bid'] < summaries['ask']))
+        self.assertTrue(np.all(summaries['volume'] > 0))
+
+    def test_trades(self):
+        generator = self.make_generator()
+        trades = generator.get_trades(0)
+        self.assertEqual(GeneratorParams.TAPE_SIZE, len(trades))
+        self.assertGreater(trades[0][0], trades[-1][0])
+
+        trades = generator.get_trades(0, start=self.now - 9)
+        self.assertEqual(10, len(trades))
+
+
+class GeneratorEndpointsTests(FlaskTestCase):
+
+    def setUp(self):
+        generator = MarketGenerator(seed=1)
+        self.app.bittrex_stub = BittrexGeneratorStub(generator, executor=self.app.executor)
+        self.app.poloniex_stub = PoloniexGeneratorStub(generator, executor=self.app.executor)
+
+    @parameterized.expand([
+        ('/bittrex.com/api/v1.1/public/getmarkets', list),
+        ('/bittrex.com/api/v1.1/public/getcurrencies', list),
+        ('/bittrex.com/api/v1.1/public/getticker?market=BTC-ETH', dict),
+        ('/bittrex.com/api/v1.1/public/getmarketsummaries', list),
+        ('/bittrex.com/api/v1.1/public/getorderbook?market=BTC-ETH&type=both', dict),
+        ('/bittrex.com/api/v1.1/public/getorderbook?market=BTC-ETH&type=sell', list),
+        ('/bittrex.com/api/v1.1/public/getmarketsummary?market=USDT-BTC', list),
+        ('/bittrex.com/api/v1.1/public/getmarkethistory?market=BTC-ETH', list),
+    ])
+    @patch('requests.Session.get')
+    def test_bittrex(self, url, result_type, get):
+        rv = self.client.get(url)
+        self.assertEqual(200, rv.status_code)
+        data = json.loads(rv.data)
+        self.assertTrue(data['success'])
+        self.assertIsInstance(data['result'], result_type)
+        self.assertFalse(get.called)
+
+    @parameterized.expand([
+        ('/poloniex.com/public?command=returnTicker', 'BTC_ETH'),
+        ('/poloniex.com/public?command=return24hVolume', 'totalBTC'),
+        ('/poloniex.com/public?command=returnOrderBook&currencyPair=BTC_ETH&depth=10', 'asks'),
+        ('/poloniex.com/public?command=returnOrderBook&currencyPair=all&depth=10', 'USDT_BTC'),
+        ('/poloniex.com/public?command=returnTradeHistory&currencyPair=BTC_ETH', 'rate'),
+        ('/poloniex.com/public?command=returnCurrencies', 'BTC'),
+    ])
+    @patch('requests.Session.get')
+    def test_poloniex(self, url, key, get):
+        rv = self.client.get(url)
+        self.assertEqual(200, rv.status_code)
+        data = json.loads(rv.data)
+        self.assertIn(key, data[0] if isinstance(data, list) else data)
+        self.assertFalse(get.called)
+
+    def test_invalid_market(self):
+        rv = self.client.get('/bittrex.com/api/v1.1/public/getticker?market=BTC-XXX')
+        self.assertEqual('INVALID_MARKET', rv.json['message'])
+
+        rv = self.client.get('/poloniex.com/public?command=returnOrderBook&currencyPair=BTC_XXX')
+        self.assertIn('error', rv.json)
+
+    def test_order_book(self):
+        rv = self.client.get('/poloniex.com/public?command=returnOrderBook&currencyPair=BTC_ETH&depth=5')
+        bids = [float(rate) for rate, _ in rv.json['bids']]
+        asks = [float(rate) for rate, _ in rv.json['asks']]
+        self.assertEqual(5, len(bids))
+        self.assertEqual(sorted(bids, reverse=True), bids)
+        self.assertEqual(sorted(asks), asks)
+        self.assertLess(bids[0], asks[0])
@@ -0,0 +1,24 @@
+from unittest import TestCase
+from mongomock import MongoClient
+
+from core.indexes import INDEXES, ensure_indexes, get_index_report
+
+
+class IndexesTests(TestCase):
+
+    def setUp(self):
+        self.db = MongoClient().get_database('testex_indexes')
+
+    def test_missing(self):
+        report = get_index_report(self.db)
+        missing = [name for _, name, status, _ in report if status == 'missing']
+        self.assertEqual(sum(map(len, INDEXES.values())), len(missing))
+
+    def test_ensure_indexes(self):
+        ensure_indexes(self.db)
+        ensure_indexes(self.db)
+
+        report = get_index_report(self.db)
+        statuses = set(status for _, _, status, _ in report)
+        self.assertSetEqual({'declared'}, statuses)
+        self.assertIn('api_key_currency', self.db.balances.index_information())
@@ -0,0 +1,191 @@
+from datetime import datetime
+from decimal import Decimal
+from unittest import TestCase
+from mongomock import MongoClient
+
+from core.bittrex.stub import BittrexApiStub
+from core.executor import SimpleExecutor
+from core.journal import MemoryJournal, MongoJournal, restore, take_snapshot
+from core.matching import MatchingExecutor
+from core.schema import OrderDirection, OrderStatus, TransactionType, EventType
+from core.storage.memory import MemoryStorage
+from tests.test_case import patch_decimal128
+from tests.test_matching import make_order
+
+
+class JournalTests(TestCase):
+
+    def setUp(self):
+        self.journal = MemoryJournal()
+        self.executor = SimpleExecutor(storage=MemoryStorage(), journal=self.journal)
+        self.stub = BittrexApiStub(executor=self.executor)
+
+    def trade(self):
+        self.executor.deposit('test', 'BTC', Decimal('1'))
+        order = self.executor.send_order(**make_order('test', '1', OrderDirection.BUY, 'BTC-XRP', '0.00001', '100'))
+        self.executor.execute_order(order, non_execute_prob=0, trade_amount=Decimal('40'))
+        self.executor.send_order(**make_order('test', '2', OrderDirection.BUY, 'BTC-XRP', '0.00001', '100'))
+        self.executor.cancel_order('test', '2')
+        self.executor.send_transaction(
+            api_key='test',
+            number='3',
+            type=TransactionType.WITHDRAWAL,
+            currency='BTC',
+            amount=Decimal('0.1'),
+            address='address'
+        )
+        self.executor.sync_transactions()
+
+    def assertRestored(self, storage):
+        self.assertEqual(
+            {balance['currency']: dict(balance, _id=None) for balance in self.executor.get_balances('test')},
+            {balance['currency']: dict(balance, _id=None) for balance in storage.get_balances('test')}
+        )
+        self.assertEqual(self.executor.storage.get_orders('test'), storage.get_orders('test'))
+        self.assertEqual(self.executor.storage.get_trades('test'), storage.get_trades('test'))
+        self.assertEqual(self.executor.storage.get_transactions('test'), storage.get_transactions('test'))
+
+    def test_events(self):
+        self.trade()
+        self.assertEqual([
+            EventType.DEPOSIT,
+            EventType.ORDER_OPENED,
+            EventType.TRADE,
+            EventType.ORDER_OPENED,
+            EventType.ORDER_CLOSED,
+            EventType.TRANSACTION_SUBMITTED,
+            EventType.TRANSACTION_CONFIRMED
+        ], [event['type'] for event in self.journal.get_events()])
+
+    def test_restore(self):
+        self.trade()
+        storage = MemoryStorage()
+        self.assertEqual(7, restore(storage, self.journal))
+        self.assertRestored(storage)
+
+    def test_restore_from_snapshot(self):
+        self.executor.deposit('test', 'BTC', Decimal('1'))
+        self.assertEqual(1, take_snapshot(self.journal))
+        self.trade()
+
+        storage = MemoryStorage()
+        self.assertEqual(8, restore(storage, self.journal))
+        self.assertRestored(storage)
+
+    def test_restore_until(self):
+        self.executor.deposit('test', 'BTC', Decimal('1'))
+        until = datetime.utcnow()
+        self.executor.deposit('test', 'BTC', Decimal('1'))
+
+        storage = MemoryStorage()
+        self.assertEqual(1, restore(storage, self.journal, until=until))
+        self.assertEqual(Decimal('1'), storage.get_balance('test', 'BTC')['available'])
+
+    def test_restore_matching(self):
+        self.executor = MatchingExecutor(storage=MemoryStorage(), journal=self.journal)
+        self.stub = BittrexApiStub(executor=self.executor)
+        self.executor.send_order(**make_order('test', '1', OrderDirection.SELL, 'BTC-XRP', '0.00001', '100'))
+        self.executor.send_order(**make_order('test', '2', OrderDirection.BUY, 'BTC-XRP', '0.00002', '150'))
+        self.executor.flush()
+
+        storage = MemoryStorage()
+        restore(storage, self.journal)
+        self.assertEqual(OrderStatus.CLOSED, storage.get_order('test', '1')['status'])
+        self.assertRestored(storage)
+
+
+class MongoJournalTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        patch_decimal128()
+        cls.client = MongoClient()
+        cls.db = cls.client.get_database('testex')
+        cls.journal = MongoJournal(cls.db)
+
+    def test_snapshot(self):
+        self.journal.append(EventType.DEPOSIT, 'test', increments={'BTC': {'available': Decimal('1.5')}}, transaction={
+            '_id': '1',
+            'api_key': 'test',
+            'type': TransactionType.DEPOSIT,
+            'currency': 'BTC',
+            'amount': Decimal('1.5')
+        })
+        self.assertEqual(1, take_snapshot(self.journal))
+        self.assertEqual(1, self.journal.get_snapshot_seq())
+
+        self.journal.append(EventType.ORDER_OPENED, 'test', increments={'BTC': {'available': Decimal('-0.5')}}, order={
+            '_id': '2',
+            'api_key': 'test',
+            'status': OrderStatus.OPENED,
+            'amount': Decimal('100')
+        })
+        self.assertEqual(2, self.journal.get_last_seq())
+
+        storage = MemoryStorage()
+        self.assertEqual(2, restore(storage, self.journal))
+        self.assertEqual(Decimal('1'), storage.get_balance('test', 'BTC')['available'])
+        self.assertEqual(Decimal('100'), storage.get_order('test', '2')['amount'])
+        self.assertEqual(Decimal('1.5'), storage.get_transactions('test')[0]['amount'])
+
+    def test_snapshot_saved_twice(self):
+        journal = MongoJournal(self.client.get_database('testex_snapshot_twice'))
+        journal.append(EventType.DEPOSIT, 'test', increments={'BTC': {'available': Decimal('1.5')}}, transaction={
+            '_id': '1',
+            'api_key': 'test',
+            'type': TransactionType.DEPOSIT,
+            'currency': 'BTC',
+            'amount': Decimal('1.5')
+        })
+        take_snapshot(journal)
+        take_snapshot(journal)
+
+        storage = MemoryStorage()
+        self.assertEqual(1, restore(storage, journal))
+        self.assertEqual(1, len(storage.get_transactions('test')))
+
+    def test_batch(self):
+        db = self.client.get_database('testex_journal_batch')
+        journal = MongoJournal(db)
+        with journal.batch():
+            for i in range(3):
+                journal.append(EventType.ORDER_CLOSED, 'test', number=str(i))
+            self.assertEqual(0, db.journal.count_documents({}))
+
+        self.assertEqual(3, journal.get_last_seq())
+        self.assertEqual([1, 2, 3], [event['_id'] for event in journal.get_events()])
+
+    def test_snapshot_skips_pending_writer(self):
+        db = self.client.get_database('testex_journal_pending')
+        journal = MongoJournal(db)
+        journal.append(EventType.ORDER_CLOSED, 'test', number='1')
+
+        pending = MongoJournal(db)
+        first = pending.allocate_seqs('pending', 1)
+        journal.append(EventType.ORDER_CLOSED, 'test', number='3')
+        self.assertEqual(3, journal.get_last_seq())
+        self.assertEqual(0, journal.get_committed_seq())
+        self.assertEqual(0, take_snapshot(journal))
+
+        pending.insert_events([dict(_id=first, type=EventType.ORDER_CLOSED, api_key='test', number='2')])
+        pending.release_seqs('pending')
+        self.assertEqual(3, journal.get_committed_seq())
+        self.assertEqual(3, take_snapshot(journal))
+
+    def test_insert_retried(self):
+        db = self.client.get_database('testex_journal_retried')
+        journal = MongoJournal(db)
+        events = [dict(_id=seq, type=EventType.ORDER_CLOSED, api_key='test', number=str(seq)) for seq in (1, 2)]
+        journal.insert_events(events[:1])
+        journal.insert_events(events)
+        self.assertEqual([1, 2], [event['_id'] for event in journal.get_events()])
+
+    def test_expired_writer(self):
+        db = self.client.get_database('testex_journal_expired')
+        journal = MongoJournal(db)
+        journal.append(EventType.ORDER_CLOSED, 'test', number='1')
+        db.counters.update_one({'_id': 'journal'}, {'$push': {'writers': {'token': 'crashed', 'floor': 0, 'at': 0}}})
+        self.assertEqual(1, journal.get_committed_seq())
+
+        take_snapshot(journal)
+        self.assertEqual([], db.counters.find_one({'_id': 'journal'})['writers'])
@@ -0,0 +1,149 @@
+from unittest import TestCase
+from mongomock import MongoClient
+from decimal import Decimal
+
+from core.bittrex.stub import BittrexApiStub
+from core.executor import SimpleExecutor
+from core.matching import MatchingExecutor, PriceLevels
+from core.scheduler import MongoLease
+from core.schema import OrderDirection, OrderStatus
+from tests.test_case import patch_decimal128
+
+
+def make_order(api_key, number, direction, market, price, amount):
+    return dict(
+        api_key=api_key,
+        exchange_id='bittrex',
+        number=number,
+        direction=direction,
+        market=market,
+        price=Decimal(price),
+        amount=Decimal(amount),
+        base_currency='BTC',
+        market_currency='XRP',
+        fee_currency='BTC'
+    )
+
+
+class PriceLevelsTests(TestCase):
+
+    def test_price_time_priority(self):
+        levels = PriceLevels(descending=True)
+        levels.add(dict(_id='1', price=Decimal('1')))
+        levels.add(dict(_id='2', price=Decimal('2')))
+        levels.add(dict(_id='3', price=Decimal('2')))
+
+        self.assertEqual(Decimal('2'), levels.best_price())
+        self.assertEqual('2', levels.best_order()['_id'])
+
+        self.assertTrue(levels.remove(dict(_id='2', price=Decimal('2'))))
+        self.assertEqual('3', levels.best_order()['_id'])
+
+        self.assertTrue(levels.remove(dict(_id='3', price=Decimal('2'))))
+        self.assertEqual(Decimal('1'), levels.best_price())
+        self.assertFalse(levels.remove(dict(_id='3', price=Decimal('2'))))
+
+
+class MatchingExecutorTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        patch_decimal128()
+        cls.client = MongoClient()
+        cls.db = cls.client.get_database('testex')
+        cls.executor = MatchingExecutor(db=cls.db)
+        cls.stub = BittrexApiStub(executor=cls.executor)
+
+    def test_no_cross(self):
+        self.executor.send_order(**make_order('maker_a', 'a1', OrderDirection.SELL, 'BTC-A', '0.00002', '100'))
+        order = self.executor.send_order(**make_order('taker_a', 'a2', OrderDirection.BUY, 'BTC-A', '0.00001', '100'))
+
+        self.assertEqual(OrderStatus.OPENED, order['status'])
+        self.assertEqual([], order['resulting_trades'])
+
+    def test_cross(self):
+        self.executor.send_order(**make_order('maker_b', 'b1', OrderDirection.SELL, 'BTC-B', '0.00001', '100'))
+        order = self.executor.send_order(**make_order('taker_b', 'b2', OrderDirection.BUY, 'BTC-B', '0.00002', '150'))
+
+        self.assertEqual(OrderStatus.OPENED, order['status'])
+        self.assertEqual(Decimal('100'), order['executed_amount'])
+        self.assertEqual(Decimal('50'), order['remaining_amount'])
+        self.assertEqual(1, len(order['resulting_trades']))
+        self.assertEqual(Decimal('0.00001'), order['resulting_trades'][0]['price'])
+
+        maker = self.executor.get_order(api_key='maker_b', number='b1')
+        self.assertEqual(OrderStatus.CLOSED, maker['status'])
+        self.assertEqual(1, len(self.executor.get_trades(api_key='maker_b')))
+
+        btc_balance = self.executor.get_balance(api_key='maker_b', currency='BTC')
+        self.assertEqual(Decimal('0.0009975'), btc_balance['available'])
+
+        xrp_balance = self.executor.get_balance(api_key='maker_b', currency='XRP')
+        self.assertEqual(Decimal(), xrp_balance['frozen'])
+        self.assertEqual(Decimal('-100'), xrp_balance['available'])
+
+    def test_cancel(self):
+        self.executor.send_order(**make_order('maker_c', 'c1', OrderDirection.SELL, 'BTC-C', '0.00001', '100'))
+        order = self.executor.cancel_order(api_key='maker_c', number='c1')
+        self.assertEqual(OrderStatus.CLOSED, order['status'])
+
+        order = self.executor.send_order(**make_order('taker_c', 'c2', OrderDirection.BUY, 'BTC-C', '0.00001', '100'))
+        self.assertEqual([], order['resulting_trades'])
+
+    def test_restart(self):
+        self.executor.send_order(**make_order('maker_d', 'd1', OrderDirection.SELL, 'BTC-D', '0.00001', '100'))
+        self.executor.flush()
+
+        executor = MatchingExecutor(storage=self.executor.storage)
+        BittrexApiStub(executor=executor)
+        order = executor.send_order(**make_order('taker_d', 'd2', OrderDirection.BUY, 'BTC-D', '0.00001', '100'))
+        self.assertEqual(OrderStatus.CLOSED, order['status'])
+
+        maker = executor.get_order(api_key='maker_d', number='d1')
+        self.assertEqual(OrderStatus.CLOSED, maker['status'])
+        self.assertEqual(Decimal(), maker['remaining_amount'])
+        self.assertEqual(Decimal('0.001'), maker['total'])
+
+        btc_balance = executor.get_balance(api_key='maker_d', currency='BTC')
+        self.assertEqual(Decimal('0.0009975'), btc_balance['available'])
+
+    def make_other_executor(self):
+        executor = MatchingExecutor(storage=self.executor.storage)
+        BittrexApiStub(executor=executor)
+        return executor
+
+    def test_second_process(self):
+        db = MongoClient().get_database('testex_matching_lease')
+        first = MatchingExecutor(storage=self.executor.storage, lease=MongoLease(db, name='matching'))
+        second = MatchingExecutor(storage=self.executor.storage, lease=MongoLease(db, name='matching'))
+
+        first.execute_orders()
+        self.assertRaises(RuntimeError, second.execute_orders)
+        self.assertRaises(RuntimeError, second.get_book, 'bittrex', 'BTC-E')
+
+        first.lease.release()
+        second.execute_orders()
+
+    def test_fill_closed_order(self):
+        self.executor.send_order(**make_order('maker_g', 'g1', OrderDirection.SELL, 'BTC-G', '0.00001', '100'))
+        self.executor.flush()
+        maker = self.executor.get_book('bittrex', 'BTC-G').asks.best_order().copy()
+        SimpleExecutor.cancel_order(self.executor, api_key='maker_g', number='g1')
+
+        # the maker was cancelled in storage behind the book's back
+        trade = self.executor.fill(maker, Decimal('100'), maker['price'], maker['created_at'])
+        self.executor.persist_fill(maker, trade)
+        self.assertEqual(Decimal(), self.executor.get_order(api_key='maker_g', number='g1')['executed_amount'])
+        self.assertEqual([], self.executor.get_trades(api_key='maker_g'))
+
+    def test_cancel_from_other_process(self):
+        other = self.make_other_executor()
+        other.get_book('bittrex', 'BTC-F')
+        self.executor.send_order(**make_order('maker_f', 'f1', OrderDirection.SELL, 'BTC-F', '0.00001', '100'))
+        self.executor.flush()
+
+        order = other.cancel_order(api_key='maker_f', number='f1')
+        self.assertEqual(OrderStatus.CLOSED, order['status'])
+
+        xrp_balance = other.get_balance(api_key='maker_f', currency='XRP')
+        self.assertEqual(Decimal(), xrp_balance['frozen'])
@@ -0,0 +1,46 @@
+import os
+import tempfile
+from unittest import TestCase
+from mongomock import MongoClient
+from parameterized import parameterized
+
+from core.helpers import sign_message
+from core.nonces import MemoryNonceStore, SharedNonceStore, MongoNonceStore
+from tests.test_case import FlaskTestCase
+
+
+def make_shared_store():
+    return SharedNonceStore(path=os.path.join(tempfile.mkdtemp(), 'nonces'), slots=8)
+
+
+class NonceStoreTests(TestCase):
+
+    @parameterized.expand([
+        ('memory', MemoryNonceStore),
+        ('shared', make_shared_store),
+        ('mongo', lambda: MongoNonceStore(MongoClient().get_database('testex')))
+    ])
+    def test_check_and_set(self, _name, make_store):
+        store = make_store()
+        self.assertEqual(0, store.check_and_set('a', 5))
+        self.assertEqual(5, store.check_and_set('a', 5))
+        self.assertEqual(5, store.check_and_set('a', 3))
+        self.assertEqual(0, store.check_and_set('b', 1))
+        self.assertEqual(5, store.check_and_set('a', 6))
+        self.assertEqual(6, store.check_and_set('a', 7))
+
+    def test_shared_between_processes(self):
+        path = os.path.join(tempfile.mkdtemp(), 'nonces')
+        SharedNonceStore(path=path).check_and_set('a', 10)
+        self.assertEqual(10, SharedNonceStore(path=path).check_and_set('a', 11))
+
+
+class BittrexNonceTests(FlaskTestCase):
+
+    def test_nonce_used(self):
+        url = 'http://localhost/bittrex.com/api/v1.1/account/getbalances?nonce=1&apikey=1'
+        headers = {'apisign': sign_message(url, key='1')}
+        self.assertTrue(self.client.get(url, headers=headers).json['success'])
+
+        rv = self.client.get(url, headers=headers)
+        self.assertEqual('NONCE_USED', rv.json['message'])
@@ -1,3 +1,5 @@
+import gzip
+import requests
 from parameterized import parameterized
 from unittest.mock import patch
 from urllib.parse import parse_qsl, urlsplit, ParseResult
@@ -5,6 +7,13 @@ from urllib.parse import parse_qsl, urlsplit, ParseResult
 from tests.test_case import FlaskTestCase
 
 
+def make_upstream_response(content=b'{}', status_code=200) -> requests.Response:
+    response = requests.Response()
+    response._content = content
+    response.status_code = status_code
+    return response
+
+
 class PublicEndpointsTests(FlaskTestCase):
 
     def assert_url_equal(self, route, call_args: dict):
@@ -32,9 +41,9 @@ class PublicEndpointsTests(FlaskTestCase):
         ('/poloniex.com/public?command=returnCurrencies',),
         ('/poloniex.com/public?command=returnLoanOrders&currency=c',),
     ])
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_public(self, url, get):
-        get.return_value = dict()
+        get.return_value = make_upstream_response()
 
         rv = self.client.get(url)
         self.assertEqual(200, rv.status_code)
@@ -44,3 +53,42 @@ class PublicEndpointsTests(FlaskTestCase):
 
         self.client.get(url)
         self.assertEqual(1, get.call_count, msg='cache not working')
+
+    @patch('requests.Session.get')
+    def test_pooled_session(self, get):
+        get.return_value = make_upstream_response()
+
+        self.client.get('/bittrex.com/api/v1.1/public/getmarketsummary?market=pooled')
+        self.client.get('/bittrex.com/api/v1.1/public/getmarkethistory?market=pooled')
+        self.assertEqual((3.05, 10), get.call_args[1]['timeout'])
+
+        rv = self.client.get('/admin/stats')
+        self.assertEqual(200, rv.status_code)
+        self.assertEqual(10, rv.json['upstream']['bittrex.com']['pool_size'])
+        self.assertGreaterEqual(rv.json['upstream']['bittrex.com']['requests'], 2)
+
+    @patch('requests.Session.get')
+    def test_conditional_get(self, get):
+        get.return_value = make_upstream_response(b'{"success": true}')
+
+        rv = self.client.get('/bittrex.com/api/v1.1/public/getticker?market=etag')
+        self.assertEqual(b'{"success": true}', rv.data)
+        etag = rv.headers['ETag']
+
+        rv = self.client.get('/bittrex.com/api/v1.1/public/getticker?market=etag', headers={'If-None-Match': etag})
+        self.assertEqual(304, rv.status_code)
+        self.assertEqual(etag, rv.headers['ETag'])
+
+    @patch('requests.Session.get')
+    def test_gzip(self, get):
+        content = b'{"result": [%s]}' % b', '.join([b'{"Last": 0.00001}'] * 100)
+        get.return_value = make_upstream_response(content)
+
+        rv = self.client.get('/bittrex.com/api/v1.1/public/getmarketsummary?market=gzip',
+                             headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual('gzip', rv.headers['Content-Encoding'])
+        self.assertEqual(content, gzip.decompress(rv.data))
+
+        rv = self.client.get('/bittrex.com/api/v1.1/public/getmarketsummary?market=gzip')
+        self.assertNotIn('Content-Encoding', rv.headers)
+        self.assertEqual(content, rv.data)
@@ -0,0 +1,97 @@
+import os
+import requests
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from unittest import TestCase
+
+from core.candles import get_timestamp
+from core.clock import Clock, ScaledClock, set_clock
+from core.executor import SimpleExecutor
+from core.http import upstream
+from core.poloniex.stub import PoloniexApiStub
+from core.replay import HistoryRecorder, HistoryReplay
+from core.storage.memory import MemoryStorage
+from tests.test_trading import POLONIEX_BUY_ORDER
+
+TICKER_URL = 'https://poloniex.com/public'
+
+
+def make_response(content):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content.encode('utf-8')
+    return response
+
+
+class FakeTimer:
+
+    def __init__(self):
+        self.value = 0.
+
+    def __call__(self):
+        return self.value
+
+
+class ScaledClockTests(TestCase):
+
+    def test_speed(self):
+        timer = FakeTimer()
+        clock = ScaledClock(start=1544400000., speed=60., timer=timer)
+        timer.value = 2.
+        self.assertEqual(1544400120., clock.time())
+        self.assertEqual(datetime(2018, 12, 10, 0, 2), clock.utcnow())
+
+    def test_invalid_speed(self):
+        self.assertRaises(ValueError, ScaledClock, start=0., speed=0.)
+
+
+class HistoryReplayTests(TestCase):
+
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.path = os.path.join(tempfile.mkdtemp(), 'history.jsonl.gz')
+
+    def tearDown(self):
+        set_clock(Clock())
+        upstream.configure()
+
+    def record(self):
+        recorder = HistoryRecorder(self.path)
+        for i, content in enumerate(['{"last": "1"}', '{"last": "2"}']):
+            set_clock(ScaledClock(start=1000. + 60 * i, timer=self.timer))
+            recorder.record(TICKER_URL, dict(command='returnTicker'), make_response(content))
+        recorder.close()
+        return HistoryReplay.load(self.path)
+
+    def test_round_trip(self):
+        replay = self.record()
+        self.assertEqual(1000., replay.start)
+        self.assertEqual(1060., replay.end)
+
+        for start, expected in [(1000., '1'), (1030., '1'), (1060., '2'), (2000., '2')]:
+            set_clock(ScaledClock(start=start, timer=self.timer))
+            response = replay.get(TICKER_URL, dict(command='returnTicker'))
+            self.assertEqual(expected, response.json()['last'])
+
+    def test_before_first_record(self):
+        replay = self.record()
+        set_clock(ScaledClock(start=999., timer=self.timer))
+        self.assertRaises(requests.ConnectionError, replay.get, TICKER_URL, dict(command='returnTicker'))
+
+    def test_upstream_replay(self):
+        upstream.configure(replay=self.record())
+        set_clock(ScaledClock(start=1030., speed=10., timer=self.timer))
+        self.assertEqual('1', upstream.get(TICKER_URL, params=dict(command='returnTicker')).json()['last'])
+        self.timer.value = 3.
+        self.assertEqual('2', upstream.get(TICKER_URL, params=dict(command='returnTicker')).json()['last'])
+        self.assertRaises(requests.ConnectionError, upstream.get, TICKER_URL, params=dict(command='return24hVolume'))
+
+    def test_virtual_trade_time(self):
+        set_clock(ScaledClock(start=1544400000., timer=self.timer))
+        executor = SimpleExecutor(storage=MemoryStorage())
+        PoloniexApiStub(executor=executor)
+        order = executor.send_order(**dict(POLONIEX_BUY_ORDER, number='replay'))
+        executor.execute_order(order, non_execute_prob=0, trade_amount=Decimal('100'))
+        trade = executor.storage.get_trades(POLONIEX_BUY_ORDER['api_key'])[0]
+        self.assertEqual(1544400000, get_timestamp(trade['created_at']))
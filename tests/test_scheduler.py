@@ -0,0 +1,83 @@
+from mongomock import MongoClient
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from core.clock import Clock, FrozenClock, ScaledClock
+from core.scheduler import ExecutionScheduler, MongoLease, get_tick_interval
+
+
+class ExecutionSchedulerTests(TestCase):
+
+    def test_tick(self):
+        executor = MagicMock()
+        scheduler = ExecutionScheduler(executor=executor)
+
+        self.assertTrue(scheduler.tick())
+        self.assertEqual(1, executor.process.call_count)
+        self.assertEqual(1, scheduler.ticks)
+
+    def test_tick_coalesced(self):
+        executor = MagicMock()
+        scheduler = ExecutionScheduler(executor=executor)
+
+        with scheduler.lock:
+            self.assertFalse(scheduler.tick())
+
+        self.assertFalse(executor.process.called)
+        self.assertEqual(1, scheduler.coalesced_ticks)
+
+    def test_tick_failed(self):
+        executor = MagicMock()
+        executor.process.side_effect = ValueError
+        scheduler = ExecutionScheduler(executor=executor)
+
+        self.assertTrue(scheduler.tick())
+        self.assertEqual(0, scheduler.ticks)
+        self.assertFalse(scheduler.lock.locked())
+
+    def test_start_stop(self):
+        executor = MagicMock()
+        scheduler = ExecutionScheduler(executor=executor, interval=0.01)
+
+        scheduler.start()
+        self.assertTrue(scheduler.is_running())
+
+        scheduler.stop()
+        self.assertFalse(scheduler.is_running())
+
+    def test_lease(self):
+        db = MongoClient().get_database('testex_lease')
+        first = ExecutionScheduler(executor=MagicMock(), lease=MongoLease(db))
+        second = ExecutionScheduler(executor=MagicMock(), lease=MongoLease(db))
+
+        self.assertTrue(first.tick())
+        self.assertFalse(second.tick())
+        self.assertTrue(first.tick())
+        self.assertEqual(0, second.executor.process.call_count)
+        self.assertEqual(1, second.leased_ticks)
+
+        first.lease.release()
+        self.assertTrue(second.tick())
+        self.assertEqual(1, second.executor.process.call_count)
+
+    def test_lease_expired(self):
+        db = MongoClient().get_database('testex_lease_expired')
+        self.assertTrue(MongoLease(db, ttl=-1).acquire())
+        self.assertTrue(MongoLease(db).acquire())
+
+    def test_lease_catch_up(self):
+        db = MongoClient().get_database('testex_lease_catch_up')
+        first = ExecutionScheduler(executor=MagicMock(), lease=MongoLease(db))
+        second = ExecutionScheduler(executor=MagicMock(), lease=MongoLease(db))
+        self.assertTrue(first.tick())
+
+        self.assertEqual(3, second.catch_up(3))
+        self.assertEqual(0, second.take_pending_ticks())
+        self.assertEqual(3, first.take_pending_ticks())
+        self.assertEqual(0, first.take_pending_ticks())
+
+    def test_tick_interval(self):
+        self.assertEqual(1., get_tick_interval(1, Clock()))
+        self.assertEqual(0.1, get_tick_interval(1, ScaledClock(speed=10.)))
+        self.assertIsNone(get_tick_interval(1, FrozenClock()))
+        self.assertIsNone(get_tick_interval(None, Clock()))
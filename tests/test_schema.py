@@ -0,0 +1,51 @@
+from copy import deepcopy
+from decimal import Decimal
+from unittest import TestCase
+
+from core.bittrex.stub import BittrexApiStub
+from core.schema import Order, OrderDirection, Trade
+
+
+class OrderModelTests(TestCase):
+
+    def setUp(self):
+        self.stub = BittrexApiStub()
+        self.order = self.stub.extend_order(dict(
+            _id='1',
+            api_key='test',
+            direction=OrderDirection.BUY,
+            price=Decimal('0.00001'),
+            amount=Decimal('100'),
+            comment='extra'
+        ))
+
+    def test_mapping(self):
+        self.assertIsInstance(self.order, Order)
+        self.assertEqual('extra', self.order['comment'])
+        self.assertIsNone(self.order.get('average_price'))
+        self.assertEqual(Decimal(), self.order['executed_amount'])
+        self.assertNotIn('total', dict(self.order))
+        self.assertIn('total', dict(self.order.materialize()))
+        self.assertEqual(Trade(_id='1', amount=Decimal('1')), dict(_id='1', amount=Decimal('1')))
+
+    def test_derived_fields(self):
+        self.assertEqual(Decimal('100'), self.order['remaining_amount'])
+        self.assertEqual(Decimal('0.00100000'), self.order['reserved'])
+        self.assertEqual(Decimal(), self.order['total'])
+
+        self.order['executed_amount'] = Decimal('40')
+        self.order['average_price'] = Decimal('0.00001')
+        self.assertEqual(Decimal('60'), self.order['remaining_amount'])
+        self.assertEqual(Decimal('0.00040000'), self.order['total'])
+
+        self.assertIn('total', dict(self.order))
+        self.order['executed_amount'] = Decimal('50')
+        self.assertNotIn('total', dict(self.order))
+
+    def test_copy(self):
+        self.assertEqual(Decimal('100'), self.order.copy()['remaining_amount'])
+
+        order = deepcopy(self.order)
+        self.assertEqual(self.order, order)
+        with self.assertRaises(KeyError):
+            order['remaining_amount']
@@ -0,0 +1,157 @@
+from bson import BSON, Decimal128, Int64
+from bson.codec_options import CodecOptions, TypeRegistry
+from datetime import datetime
+from unittest import TestCase, skip
+from decimal import Decimal
+from mongomock import MongoClient
+
+from core.bittrex.stub import BittrexApiStub
+from core.executor import SimpleExecutor
+from core.matching import MatchingExecutor
+from core.schema import TransactionType, OrderStatus
+from core.storage.memory import MemoryStorage
+from core.storage.mongo import DecimalCodec, MongoStorage, migrate_fixed_point
+from tests import test_collections, test_execution, test_matching, test_trading
+from tests.test_case import patch_decimal128
+
+
+class MemoryCollectionTests(test_collections.ExecutorCollectionTests):
+
+    @classmethod
+    def setUpClass(cls):
+        storage = MemoryStorage()
+        cls.executor = SimpleExecutor(storage=storage)
+
+        storage.insert_transaction({
+            '_id': '1',
+            'api_key': 'test',
+            'type': TransactionType.WITHDRAWAL,
+            'currency': 'BTC',
+            'created_at': datetime(2018, 12, 1, 10, 10),
+            'amount': Decimal('100')
+        })
+        storage.insert_order({
+            '_id': '2',
+            'api_key': 'test',
+            'status': OrderStatus.OPENED,
+            'market': 'BTC_XRP',
+            'amount': Decimal('100')
+        })
+        storage.insert_trade({
+            '_id': '3',
+            'api_key': 'test',
+            'order_number': '2',
+            'market': 'BTC_XRP',
+            'created_at': datetime(2018, 12, 1, 10, 11),
+            'amount': Decimal('50')
+        })
+        storage.insert_trade({
+            '_id': '4',
+            'api_key': 'test',
+            'order_number': '2',
+            'market': 'BTC_XRP',
+            'created_at': datetime(2018, 12, 1, 10, 12),
+            'amount': Decimal('50')
+        })
+        storage.increment_balances('test', {'XRP': {'available': Decimal('100')}})
+
+    def test_secondary_indexes(self):
+        storage = self.executor.storage
+        storage.update_order('test', '2', fields=dict(status=OrderStatus.CLOSED))
+        self.assertEqual(0, len(storage.get_orders(status=OrderStatus.OPENED)))
+        self.assertEqual(1, len(storage.get_orders(status=OrderStatus.CLOSED, market='BTC_XRP')))
+
+        storage.update_order('test', '2', fields=dict(status=OrderStatus.OPENED))
+        self.assertEqual(1, len(storage.get_orders(status=OrderStatus.OPENED)))
+
+
+class MemoryExecutionTests(test_execution.ExecutionTests):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = SimpleExecutor(storage=MemoryStorage())
+
+    @skip('memory storage writes are not batched')
+    def test_execute_order_buffered(self):
+        pass
+
+
+class MemoryTradingTests(test_trading.ExecutorTradingTests):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = SimpleExecutor(storage=MemoryStorage())
+
+
+class MemoryMatchingExecutorTests(test_matching.MatchingExecutorTests):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = MatchingExecutor(storage=MemoryStorage())
+        cls.stub = BittrexApiStub(executor=cls.executor)
+
+
+class FixedPointExecutionTests(test_execution.ExecutionTests):
+
+    @classmethod
+    def setUpClass(cls):
+        patch_decimal128()
+        cls.db = MongoClient().get_database('testex')
+        cls.executor = SimpleExecutor(storage=MongoStorage(cls.db, fixed_point=True))
+
+    def test_migrate_fixed_point(self):
+        self.db.balances.insert_one({
+            '_id': 'fixed',
+            'api_key': 'test_fixed_point',
+            'currency': 'BTC',
+            'available': Decimal128('0.00000150')
+        })
+        migrate_fixed_point(self.db)
+        self.assertEqual(Int64(150), self.db.balances.find_one({'_id': 'fixed'})['available'])
+
+        balance = self.executor.get_balance('test_fixed_point', 'BTC')
+        self.assertEqual(Decimal('0.0000015'), balance['available'])
+
+        migrate_fixed_point(self.db, reverse=True)
+        self.assertEqual(Decimal128('0.00000150'), self.db.balances.find_one({'_id': 'fixed'})['available'])
+
+    def test_int_ids(self):
+        storage = self.executor.storage
+        storage.insert_order({
+            '_id': 123456789,
+            'api_key': 'test_fixed_ids',
+            'status': OrderStatus.OPENED,
+            'amount': Decimal('1.5')
+        })
+        storage.insert_trade({
+            '_id': 987654321,
+            'api_key': 'test_fixed_ids',
+            'order_number': 123456789,
+            'amount': Decimal('0.5')
+        })
+        storage.update_order('test_fixed_ids', 123456789, fields=dict(status=OrderStatus.CLOSED))
+
+        order = storage.get_order('test_fixed_ids', 123456789)
+        self.assertEqual(123456789, order['_id'])
+        self.assertEqual(Decimal('1.5'), order['amount'])
+        self.assertEqual(OrderStatus.CLOSED, order['status'])
+        self.assertEqual(1, len(storage.get_trades('test_fixed_ids', order_number=123456789)))
+
+        migrate_fixed_point(self.db, reverse=True)
+        self.assertEqual(123456789, self.db.trades.find_one({'_id': 987654321})['order_number'])
+        migrate_fixed_point(self.db)
+        self.assertEqual(Decimal('0.5'), storage.get_trades('test_fixed_ids')[0]['amount'])
+
+
+class DecimalCodecTests(TestCase):
+
+    def test_round_trip(self):
+        codec_options = CodecOptions(type_registry=TypeRegistry([DecimalCodec()]))
+        data = BSON.encode({'amount': Decimal('0.00000150')}, codec_options=codec_options)
+        self.assertEqual(Decimal128('0.00000150'), BSON(data).decode()['amount'])
+        self.assertEqual(Decimal('0.00000150'), BSON(data).decode(codec_options=codec_options)['amount'])
+
+    def test_unsupported(self):
+        storage = MongoStorage(MongoClient().get_database('testex'), decimal_codec=True)
+        storage.increment_balances('test_codec', {'BTC': {'available': Decimal('1.5')}})
+        self.assertEqual(Decimal('1.5'), storage.get_balance('test_codec', 'BTC')['available'])
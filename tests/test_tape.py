@@ -0,0 +1,88 @@
+import requests
+import simplejson as json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import patch
+
+from core.bittrex.stub import BittrexApiStub
+from core.candles import get_timestamp
+from core.executor import SimpleExecutor, make_trade
+from core.poloniex.stub import PoloniexApiStub
+from core.storage.memory import MemoryStorage
+from core.tape import TradeTape
+from tests.test_public import make_upstream_response
+from tests.test_trading import BITTREX_BUY_ORDER, POLONIEX_BUY_ORDER
+
+
+class TradeTapeTests(TestCase):
+
+    def setUp(self):
+        self.tape = TradeTape('poloniex', maxsize=3)
+        self.created_at = datetime(2018, 12, 10)
+        for i in range(5):
+            trade = make_trade(dict(POLONIEX_BUY_ORDER, _id=str(i)), Decimal(i + 1))
+            trade['created_at'] = self.created_at + timedelta(seconds=i)
+            self.tape.on_trade('poloniex', trade)
+
+    def test_bounded(self):
+        trades = self.tape.get_trades('BTC_XRP')
+        self.assertEqual([Decimal(5), Decimal(4), Decimal(3)], [trade['amount'] for trade in trades])
+        self.assertEqual(1, len(self.tape.get_trades('BTC_XRP', limit=1)))
+        self.assertEqual([], self.tape.get_trades('BTC_ETH'))
+
+    def test_range(self):
+        start = get_timestamp(self.created_at)
+        trades = self.tape.get_trades('BTC_XRP', start=start + 3, end=start + 3)
+        self.assertEqual([Decimal(4)], [trade['amount'] for trade in trades])
+
+    def test_other_exchange_ignored(self):
+        self.tape.on_trade('bittrex', make_trade(dict(BITTREX_BUY_ORDER, _id='b'), Decimal(1)))
+        self.assertFalse(self.tape.has_market('BTC-XRP'))
+
+
+class PublicTradeHistoryTests(TestCase):
+
+    def setUp(self):
+        self.executor = SimpleExecutor(storage=MemoryStorage())
+        self.bittrex = BittrexApiStub(executor=self.executor)
+        self.poloniex = PoloniexApiStub(executor=self.executor)
+
+    def execute(self, order_body):
+        order = self.executor.send_order(**order_body)
+        return self.executor.execute_order(order, non_execute_prob=0, trade_amount=Decimal('100'))
+
+    @patch('requests.Session.get')
+    def test_get_market_history(self, get):
+        get.return_value = make_upstream_response(
+            b'{"success": true, "message": "", "result": [{"Id": 1, "TimeStamp": "2018-12-10T10:00:00.000", '
+            b'"Quantity": 1, "Price": 0.1, "Total": 0.1, "FillType": "FILL", "OrderType": "SELL"}]}'
+        )
+        self.execute(dict(BITTREX_BUY_ORDER, number='tape'))
+        result = self.bittrex.get_market_history('BTC-XRP')['result']
+        self.assertEqual(2, len(result))
+        self.assertEqual('BUY', result[0]['OrderType'])
+        self.assertEqual(Decimal('0.0001'), result[0]['Total'])
+        self.assertEqual(1, result[1]['Id'])
+
+    @patch('requests.Session.get')
+    def test_return_trade_history(self, get):
+        get.return_value = make_upstream_response(b'[]')
+        self.execute(dict(POLONIEX_BUY_ORDER, number='tape'))
+        now = get_timestamp(datetime.utcnow())
+
+        payload = self.poloniex.return_trade_history('BTC_XRP', start=str(now - 60), end=str(now + 60))
+        trades = json.loads(payload.content, use_decimal=True)
+        self.assertEqual(1, len(trades))
+        self.assertEqual('buy', trades[0]['type'])
+
+        payload = self.poloniex.return_trade_history('BTC_XRP', start=str(now + 60), end=None)
+        self.assertEqual([], json.loads(payload.content))
+
+    @patch('requests.Session.get', side_effect=requests.ConnectionError)
+    def test_seeded_from_storage(self, _get):
+        self.execute(dict(BITTREX_BUY_ORDER, number='tape-seed'))
+
+        bittrex = BittrexApiStub(executor=SimpleExecutor(storage=self.executor.storage))
+        result = bittrex.get_market_history('BTC-XRP')['result']
+        self.assertEqual(['BUY'], [trade['OrderType'] for trade in result])